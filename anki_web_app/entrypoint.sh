@@ -43,8 +43,9 @@ if [ "$1" = "run_server" ]; then
 elif [ "$1" = "gunicorn" ]; then
     # Start Gunicorn (production server)
     # Ensure gunicorn is in requirements.txt
+    # --preload imports the app (and spaCy models) once in the master so workers share them
     echo "Starting Gunicorn..."
-    exec gunicorn spanish_anki_project.wsgi:application --bind 0.0.0.0:8000 --workers 3
+    exec gunicorn spanish_anki_project.wsgi:application --bind 0.0.0.0:8000 --workers 3 --preload
 else
     # Execute the command passed to the script
     exec "$@"
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Card, CardReview, StudySession, SessionActivity, TokenStatus
+from .models import Card, CardReview, StudySession, SessionActivity, UserVocabulary, GlossaryEntry
 
 # Register your models here.
 
@@ -31,9 +31,17 @@ class SessionActivityAdmin(admin.ModelAdmin):
     search_fields = ['session__user__username']
 
 
-@admin.register(TokenStatus)
-class TokenStatusAdmin(admin.ModelAdmin):
-    list_display = ['status_id', 'user', 'token', 'status', 'updated_at']
-    list_filter = ['status', 'updated_at']
-    search_fields = ['user__username', 'token__text', 'token__normalized']
+@admin.register(UserVocabulary)
+class UserVocabularyAdmin(admin.ModelAdmin):
+    list_display = ['vocab_id', 'user', 'language', 'key', 'status', 'level', 'updated_at']
+    list_filter = ['language', 'status', 'level', 'updated_at']
+    search_fields = ['user__username', 'key']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(GlossaryEntry)
+class GlossaryEntryAdmin(admin.ModelAdmin):
+    list_display = ['glossary_id', 'source_lang', 'target_lang', 'normalized', 'lemma', 'translation', 'source', 'updated_at']
+    list_filter = ['source_lang', 'target_lang', 'source']
+    search_fields = ['normalized', 'lemma', 'translation']
     readonly_fields = ['created_at', 'updated_at']
@@ -4,15 +4,34 @@ Supabase JWT authentication backend for Django.
 Verifies Supabase JWT tokens and maps Supabase user `sub` to Django User.
 """
 import jwt
-import requests
 import base64
+import threading
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import BaseBackend
 from django.conf import settings
 from typing import Optional
 
+from . import http_client
+
 User = get_user_model()
 
+# PyJWKClient caches the fetched key set, so one client per JWKS URL is reused across requests
+_jwks_clients = {}
+_jwks_clients_lock = threading.Lock()
+
+
+def _get_jwks_client(jwks_url: str):
+    """The long-lived JWKS client for a URL."""
+    client = _jwks_clients.get(jwks_url)
+    if client is None:
+        with _jwks_clients_lock:
+            client = _jwks_clients.get(jwks_url)
+            if client is None:
+                from jwt import PyJWKClient
+                client = PyJWKClient(jwks_url, max_cached_keys=5)
+                _jwks_clients[jwks_url] = client
+    return client
+
 
 class SupabaseJWTAuthenticationBackend(BaseBackend):
     """
@@ -87,8 +106,7 @@ class SupabaseJWTAuthenticationBackend(BaseBackend):
                 
                 # Try PyJWKClient first
                 try:
-                    from jwt import PyJWKClient
-                    jwks_client = PyJWKClient(jwks_url, max_cached_keys=5)
+                    jwks_client = _get_jwks_client(jwks_url)
                     signing_key = jwks_client.get_signing_key_from_jwt(token)
                     payload = jwt.decode(
                         token,
@@ -101,7 +119,7 @@ class SupabaseJWTAuthenticationBackend(BaseBackend):
                     print(f"[Auth Backend] PyJWKClient failed: {type(pyjwk_error).__name__}")
                     # Try manual JWKS fetch
                     try:
-                        jwks_response = requests.get(jwks_url, timeout=5)
+                        jwks_response = http_client.get(jwks_url, service='supabase')
                         jwks_response.raise_for_status()
                         jwks = jwks_response.json()
                         
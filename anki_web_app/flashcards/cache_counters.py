@@ -0,0 +1,38 @@
+"""
+Persistent counters for shared caches.
+
+Events that leave no row behind (a tokenization cache miss, a translation
+memory miss) are counted in CacheCounter rows so the stats commands report
+them directly. Counters are named '<cache>:<event>:<scope>' and updated with
+F(), so concurrent workers don't lose counts.
+"""
+
+from typing import Dict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import CacheCounter
+
+
+def increment(key: str, amount: int = 1) -> None:
+    """Add to a counter, creating it on first use."""
+    if not amount:
+        return
+    with transaction.atomic(savepoint=False):
+        rows = CacheCounter.objects.filter(key=key)
+        if not rows.update(count=F('count') + amount):
+            # First event for this counter; a concurrent creator wins the insert and we add after it
+            CacheCounter.objects.bulk_create([CacheCounter(key=key, count=0)], ignore_conflicts=True)
+            rows.update(count=F('count') + amount)
+
+
+def counts(prefix: str) -> Dict[str, int]:
+    """Counters whose key starts with prefix, keyed by the rest of the key."""
+    rows = CacheCounter.objects.filter(key__startswith=prefix).values_list('key', 'count')
+    return {key[len(prefix):]: count for key, count in rows}
+
+
+def reset(prefix: str) -> None:
+    """Delete the counters whose key starts with prefix."""
+    CacheCounter.objects.filter(key__startswith=prefix).delete()
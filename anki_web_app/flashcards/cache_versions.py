@@ -0,0 +1,40 @@
+"""
+Version counters for in-process caches.
+
+A per-process structure (known-word sets, phrase matchers) stores the version
+it was built at and is rebuilt when the counter has moved on. Counters are
+CacheVersion rows, so all worker processes read the same value whatever the
+cache backend is (the default LocMemCache is private to each worker). Writers
+bump the counter inside the transaction that changes the underlying data;
+other workers see the new version once it commits.
+
+A missing row reads as version 0. Rows are never deleted, so committed
+versions only move forward.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import CacheVersion
+
+
+def get_version(key: str) -> int:
+    """Current value of a version counter (one primary-key read)."""
+    version = CacheVersion.objects.filter(key=key).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_version(key: str) -> int:
+    """
+    Advance a version counter and return the new value.
+
+    Runs in the caller's transaction when there is one, so the bump commits
+    (or rolls back) together with the data change.
+    """
+    with transaction.atomic(savepoint=False):
+        rows = CacheVersion.objects.filter(key=key)
+        if not rows.update(version=F('version') + 1):
+            # First bump of this counter; a concurrent creator wins the insert and we increment after it
+            CacheVersion.objects.bulk_create([CacheVersion(key=key, version=0)], ignore_conflicts=True)
+            rows.update(version=F('version') + 1)
+        return rows.values_list('version', flat=True).get()
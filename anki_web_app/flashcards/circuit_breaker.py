@@ -0,0 +1,166 @@
+"""
+Per-provider circuit breakers shared by all workers through the cache.
+
+Each provider (http_client service name, or 'google_tts') counts calls and
+failures in time buckets covering the last CIRCUIT_BREAKER_WINDOW seconds.
+When at least CIRCUIT_BREAKER_MIN_CALLS calls were made and the failure rate
+reaches CIRCUIT_BREAKER_FAILURE_RATE, the circuit opens: calls are refused
+immediately (callers degrade) for CIRCUIT_BREAKER_OPEN_SECONDS. After that
+the circuit is half-open and lets exactly one probe call through (claimed
+with cache.add across workers); its success closes the circuit, its failure
+opens it again. Only the probe moves the circuit out of OPEN/HALF_OPEN:
+results of other calls that were already in flight when the circuit opened
+are ignored until it is CLOSED again.
+
+With a per-process cache backend (LocMemCache) each worker has its own
+breakers; a shared backend (Redis/Memcached) trips them for all workers at
+once.
+"""
+
+import contextvars
+import time
+import uuid
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+BUCKET_SECONDS = 10
+
+# Providers reported by states()
+SERVICES = ['deepl', 'wiktionary', 'elevenlabs', 'supabase', 'google_tts']
+
+# {service: claim id} of the probes held by the current call (replaced, never mutated)
+_held_probes = contextvars.ContextVar('circuit_held_probes', default={})
+
+
+def _window() -> int:
+    return getattr(settings, 'CIRCUIT_BREAKER_WINDOW', 60)
+
+
+def _min_calls() -> int:
+    return getattr(settings, 'CIRCUIT_BREAKER_MIN_CALLS', 5)
+
+
+def _failure_rate() -> float:
+    return getattr(settings, 'CIRCUIT_BREAKER_FAILURE_RATE', 0.5)
+
+
+def _open_seconds() -> int:
+    return getattr(settings, 'CIRCUIT_BREAKER_OPEN_SECONDS', 30)
+
+
+def _open_key(service: str) -> str:
+    return f"circuit:{service}:open_until"
+
+
+def _probe_key(service: str) -> str:
+    return f"circuit:{service}:probe"
+
+
+def _bucket_keys(service: str, kind: str) -> List[str]:
+    current = int(time.time() // BUCKET_SECONDS)
+    count = max(1, _window() // BUCKET_SECONDS)
+    return [f"circuit:{service}:{kind}:{bucket}" for bucket in range(current - count + 1, current + 1)]
+
+
+def _increment(key: str) -> None:
+    # add() is a no-op when the bucket exists; incr() fails only if it expired in between
+    cache.add(key, 0, _window() + BUCKET_SECONDS)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, _window() + BUCKET_SECONDS)
+
+
+def _window_counts(service: str):
+    call_keys = _bucket_keys(service, 'calls')
+    failure_keys = _bucket_keys(service, 'failures')
+    values = cache.get_many(call_keys + failure_keys)
+    calls = sum(values.get(key, 0) for key in call_keys)
+    failures = sum(values.get(key, 0) for key in failure_keys)
+    return calls, failures
+
+
+def state(service: str) -> str:
+    """CLOSED, OPEN or HALF_OPEN."""
+    open_until = cache.get(_open_key(service))
+    if open_until is None:
+        return CLOSED
+    return OPEN if time.time() < open_until else HALF_OPEN
+
+
+def allow(service: str) -> bool:
+    """
+    Whether a call to the provider may be made now.
+
+    A half-open circuit allows one caller (the probe); everyone else is
+    refused until the probe has reported its outcome.
+    """
+    current = state(service)
+    if current == CLOSED:
+        return True
+    if current == OPEN:
+        return False
+    # The probe claim expires so a probe lost with its worker doesn't keep the circuit half-open
+    claim = uuid.uuid4().hex
+    if not cache.add(_probe_key(service), claim, _open_seconds()):
+        return False
+    _held_probes.set({**_held_probes.get(), service: claim})
+    return True
+
+
+def _release_probe(service: str) -> bool:
+    """Forget this call's probe claim; True if it still held the service's probe."""
+    held = _held_probes.get()
+    claim = held.get(service)
+    if claim is None:
+        return False
+    _held_probes.set({name: value for name, value in held.items() if name != service})
+    return cache.get(_probe_key(service)) == claim
+
+
+def _open(service: str) -> None:
+    cache.set(_open_key(service), time.time() + _open_seconds(), None)
+    cache.delete(_probe_key(service))
+    print(f"[circuit_breaker] Circuit for {service} opened for {_open_seconds()}s")
+
+
+def record_success(service: str) -> None:
+    is_probe = _release_probe(service)
+    if state(service) != CLOSED:
+        if not is_probe:
+            # A call started before the circuit opened; only the probe decides
+            return
+        # The probe succeeded; start over with a clean window
+        cache.delete_many([_open_key(service), _probe_key(service)])
+        cache.delete_many(_bucket_keys(service, 'calls') + _bucket_keys(service, 'failures'))
+        print(f"[circuit_breaker] Circuit for {service} closed")
+        return
+    _increment(_bucket_keys(service, 'calls')[-1])
+
+
+def record_failure(service: str) -> None:
+    is_probe = _release_probe(service)
+    if state(service) != CLOSED:
+        if is_probe:
+            _open(service)
+        return
+    _increment(_bucket_keys(service, 'calls')[-1])
+    _increment(_bucket_keys(service, 'failures')[-1])
+    calls, failures = _window_counts(service)
+    if calls >= _min_calls() and failures >= calls * _failure_rate():
+        _open(service)
+
+
+def states() -> Dict[str, Dict]:
+    """State and current window counts of every provider (shown by the health endpoint)."""
+    result = {}
+    for service in SERVICES:
+        calls, failures = _window_counts(service)
+        result[service] = {'state': state(service), 'calls': calls, 'failures': failures}
+    return result
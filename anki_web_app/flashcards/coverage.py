@@ -0,0 +1,175 @@
+"""
+Per-lesson known-word coverage.
+
+A LessonCoverage row holds, for one lesson and user, the number of distinct
+words, how many of them are not known yet, and how much of the running text is
+known. Rows are computed with one aggregate query the first time a lesson is
+listed and afterwards adjusted in place when vocabulary statuses change, so the
+lesson list can sort and filter by difficulty with a plain join. Packed lessons
+are counted from their LessonKeyCount rows instead of Token rows.
+"""
+
+from typing import Iterable
+
+from django.db.models import Case, Count, Exists, F, FloatField, IntegerField, OuterRef, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from .models import Lesson, LessonCoverage, LessonKeyCount, Lexeme, Token, UserVocabulary
+
+# Tokens with at least one word character count as words (punctuation doesn't)
+WORD_REGEX = r'\w'
+
+# Coverage rows per UPDATE when applying deltas
+LESSON_BATCH_SIZE = 500
+
+
+def compute_lesson_coverage(lesson: Lesson, user) -> LessonCoverage:
+    """
+    Compute coverage for a lesson from scratch and store it.
+    All four counts come from a single aggregate query over the lesson's tokens.
+    """
+    if lesson.packed_token_count is not None:
+        return _store_coverage(lesson, user, _packed_totals(lesson, user))
+
+    is_known = Exists(
+        UserVocabulary.objects.filter(user=user, language=lesson.language, key=OuterRef('lexeme__key'), status='known')
+    )
+    totals = (
+        Token.objects.filter(lesson=lesson, lexeme__normalized__regex=WORD_REGEX)
+        .annotate(vocab_key=F('lexeme__key'), is_known=is_known)
+        .aggregate(
+            total_words=Count('token_id'),
+            known_words=Count('token_id', filter=Q(is_known=True)),
+            unique_words=Count('vocab_key', distinct=True),
+            known_unique_words=Count('vocab_key', distinct=True, filter=Q(is_known=True)),
+        )
+    )
+    return _store_coverage(lesson, user, totals)
+
+
+def _packed_totals(lesson: Lesson, user) -> dict:
+    """Coverage counts of a packed lesson from its key counts (one aggregate query)."""
+    is_known = Exists(
+        UserVocabulary.objects.filter(user=user, language=lesson.language, key=OuterRef('key'), status='known')
+    )
+    return (
+        LessonKeyCount.objects.filter(lesson=lesson)
+        .annotate(is_known=is_known)
+        .aggregate(
+            total_words=Coalesce(Sum('occurrences'), 0),
+            known_words=Coalesce(Sum('occurrences', filter=Q(is_known=True)), 0),
+            unique_words=Count('count_id'),
+            known_unique_words=Count('count_id', filter=Q(is_known=True)),
+        )
+    )
+
+
+def _store_coverage(lesson: Lesson, user, totals: dict) -> LessonCoverage:
+    coverage = LessonCoverage(
+        lesson=lesson,
+        user=user,
+        unique_words=totals['unique_words'],
+        unknown_words=totals['unique_words'] - totals['known_unique_words'],
+        total_words=totals['total_words'],
+        known_words=totals['known_words'],
+    )
+    coverage.update_percentage()
+    LessonCoverage.objects.bulk_create(
+        [coverage],
+        update_conflicts=True,
+        unique_fields=['lesson', 'user'],
+        update_fields=['unique_words', 'unknown_words', 'total_words', 'known_words', 'known_percentage', 'updated_at'],
+    )
+    return coverage
+
+
+def ensure_lesson_coverage(user) -> int:
+    """
+    Compute coverage for the user's lessons that don't have it yet.
+
+    Returns:
+        Number of lessons computed
+    """
+    missing = Lesson.objects.filter(user=user).exclude(coverages__user=user).only('lesson_id', 'language', 'packed_token_count')
+    count = 0
+    for lesson in missing:
+        compute_lesson_coverage(lesson, user)
+        count += 1
+    return count
+
+
+def invalidate_lesson_coverage(lesson: Lesson) -> None:
+    """Drop cached coverage after a lesson's tokens changed; it is recomputed on the next listing."""
+    LessonCoverage.objects.filter(lesson=lesson).delete()
+
+
+def apply_vocabulary_change(user, language: str, keys: Iterable[str], now_known: bool) -> None:
+    """
+    Adjust stored coverage after words flipped between known and not known.
+
+    Only pass keys whose known-ness actually changed. Two grouped queries count
+    the affected occurrences per lesson (Token rows, and LessonKeyCount rows for
+    packed lessons); the coverage rows are then adjusted
+    with F() expressions in one UPDATE (per LESSON_BATCH_SIZE lessons), so
+    concurrent changes add up instead of overwriting each other. Lessons
+    without a coverage row are left alone.
+
+    Args:
+        user: Owner of the vocabulary entries
+        language: Language of the entries
+        keys: Vocabulary keys that became known (now_known=True) or stopped being known
+        now_known: Direction of the change
+    """
+    keys = set(keys)
+    if not keys:
+        return
+
+    # Integer join: the keys' lexemes come from the (language, key) index
+    lexemes = Lexeme.objects.filter(language=language, key__in=keys).values('lexeme_id')
+    deltas = (
+        Token.objects.filter(lesson__user=user, lesson__language=language, lexeme__in=lexemes)
+        .filter(lesson__packed_token_count__isnull=True, lexeme__normalized__regex=WORD_REGEX)
+        .annotate(vocab_key=F('lexeme__key'))
+        .values('lesson_id')
+        .annotate(occurrences=Count('token_id'), words=Count('vocab_key', distinct=True))
+        .order_by()
+    )
+    packed_deltas = (
+        LessonKeyCount.objects.filter(lesson__user=user, lesson__language=language, key__in=keys)
+        .values('lesson_id')
+        .annotate(occurrences=Sum('occurrences'), words=Count('count_id'))
+        .order_by()
+    )
+    deltas = {row['lesson_id']: row for row in deltas}
+    deltas.update((row['lesson_id'], row) for row in packed_deltas)
+    _apply_deltas(user, deltas, 1 if now_known else -1)
+
+
+def _per_lesson(deltas: dict, lesson_ids, field: str, sign: int) -> Case:
+    return Case(
+        *[When(lesson_id=lesson_id, then=Value(sign * deltas[lesson_id][field])) for lesson_id in lesson_ids],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _apply_deltas(user, deltas: dict, sign: int) -> None:
+    """Add {lesson_id: {occurrences, words}} to the user's coverage rows in place."""
+    lesson_ids = sorted(deltas)
+    now = timezone.now()
+    for start in range(0, len(lesson_ids), LESSON_BATCH_SIZE):
+        batch = lesson_ids[start:start + LESSON_BATCH_SIZE]
+        # Every expression reads the row's old values, so the percentage uses the new known_words explicitly
+        known_words = F('known_words') + _per_lesson(deltas, batch, 'occurrences', sign)
+        LessonCoverage.objects.filter(user=user, lesson_id__in=batch).update(
+            known_words=known_words,
+            unknown_words=F('unknown_words') - _per_lesson(deltas, batch, 'words', sign),
+            known_percentage=Case(
+                When(total_words=0, then=Value(0.0)),
+                default=Round(Cast(known_words, FloatField()) * 100.0 / F('total_words'), 1),
+                output_field=FloatField(),
+            ),
+            updated_at=now,
+        )
+
@@ -0,0 +1,74 @@
+"""
+Per-request deadline budgets for outbound calls.
+
+A view that must answer quickly wraps its lookups in budget(seconds). Every
+outbound request made inside it (http_client, Google TTS) has its timeouts
+clamped to the time left, skips retries that no longer fit and is not sent
+at all once the budget is spent. Services that were skipped, timed out or had
+an open circuit are noted on the budget, so the view can return the data it
+has and report what is missing (degraded) instead of queuing behind a slow
+provider.
+
+The budget is held in a context variable: code run through
+contextvars.copy_context() (e.g. thread pool fan-out) shares it.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+_current = contextvars.ContextVar('deadline_budget', default=None)
+
+
+class Budget:
+    """Time budget of one request and the services it had to do without."""
+
+    def __init__(self, seconds: float, parent: Optional['Budget'] = None):
+        expires_at = time.monotonic() + seconds
+        # A nested budget never outlives the one around it
+        self.expires_at = min(expires_at, parent.expires_at) if parent else expires_at
+        self._degraded: List[str] = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def note_degraded(self, service: str) -> None:
+        with self._lock:
+            if service not in self._degraded:
+                self._degraded.append(service)
+
+    @property
+    def degraded(self) -> List[str]:
+        with self._lock:
+            return list(self._degraded)
+
+
+@contextmanager
+def budget(seconds: float):
+    """Run the block with a deadline `seconds` from now (yields the Budget)."""
+    current = Budget(seconds, parent=_current.get())
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def current() -> Optional[Budget]:
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None outside of one."""
+    active = _current.get()
+    return None if active is None else active.remaining()
+
+
+def note_degraded(service: str) -> None:
+    """Record that a service's data is missing from the current request (no-op outside a budget)."""
+    active = _current.get()
+    if active is not None:
+        active.note_degraded(service)
@@ -1,13 +1,19 @@
 """
 Dictionary service using Wiktionary API (free, no API key required).
 Fetches word definitions, meanings, part of speech, and example sentences.
+Words in the offline Wiktionary index (wiktionary_index.py) are answered
+locally without a request.
 """
 
 import requests
+from django.conf import settings
 from django.core.cache import cache
 from typing import Optional, Dict, List
 import re
 
+from . import http_client, single_flight
+from .wiktionary_index import get_wiktionary_index
+
 
 def get_wiktionary_language_code(language: str) -> str:
     """
@@ -24,7 +30,63 @@ def get_wiktionary_language_code(language: str) -> str:
     return lang_map.get(language.lower(), language.capitalize())
 
 
-def get_dictionary_entry(word: str, source_lang: str = 'de', target_lang: str = 'en') -> Optional[Dict]:
+def normalize_dictionary_word(word: str) -> str:
+    """Lowercase a word and strip surrounding punctuation (the form entries are cached under)."""
+    if not word:
+        return ''
+    normalized_word = word.lower().strip()
+    # Remove leading/trailing punctuation
+    normalized_word = re.sub(r'^[.,;:!?()\[\]„""\'…]+', '', normalized_word)
+    normalized_word = re.sub(r'[.,;:!?()\[\]„""\'…]+$', '', normalized_word)
+    return normalized_word
+
+
+# Seconds entries are cached: found, not in Wiktionary (404 or nothing parseable) and after errors
+ENTRY_CACHE_TTL = 60 * 60 * 24 * 30
+
+
+def _not_found_ttl() -> int:
+    return getattr(settings, 'DICTIONARY_NOT_FOUND_CACHE_TTL', 60 * 60 * 24)
+
+
+def _error_ttl() -> int:
+    return getattr(settings, 'DICTIONARY_ERROR_CACHE_TTL', 60 * 5)
+
+
+def _cache_key(normalized_word: str, source_lang: str) -> str:
+    return f"dictionary:{source_lang}:{normalized_word}"
+
+
+def get_cached_dictionary_entries(words, source_lang: str = 'de') -> Dict[str, Dict]:
+    """
+    Cached dictionary entries of several words: the offline index first, then one
+    cache round trip for the rest. Never calls Wiktionary; words without a cached
+    entry (or cached as missing) are left out.
+    """
+    normalized = {}
+    for word in set(words):
+        normalized_word = normalize_dictionary_word(word)
+        if normalized_word:
+            normalized.setdefault(normalized_word, []).append(word)
+    entries = {}
+    index = get_wiktionary_index()
+    if index is not None and normalized:
+        for normalized_word, entry in index.lookup_many(source_lang, normalized).items():
+            for word in normalized.pop(normalized_word):
+                entries[word] = entry
+    keys = {_cache_key(normalized_word, source_lang): forms for normalized_word, forms in normalized.items()}
+    if not keys:
+        return entries
+    for key, entry in cache.get_many(list(keys)).items():
+        if entry:
+            for word in keys[key]:
+                entries[word] = entry
+    return entries
+
+
+def get_dictionary_entry(
+    word: str, source_lang: str = 'de', target_lang: str = 'en', lemma: Optional[str] = None
+) -> Optional[Dict]:
     """
     Get dictionary entry from Wiktionary API.
     Returns dictionary data with meanings, part of speech, and example sentences.
@@ -41,25 +103,77 @@ def get_dictionary_entry(word: str, source_lang: str = 'de', target_lang: str =
         'pronunciation': '...',
         'etymology': '...'
     }
-    """
-    if not word or len(word.strip()) == 0:
-        return None
     
-    # Normalize word (lowercase, strip punctuation)
-    normalized_word = word.lower().strip()
-    # Remove leading/trailing punctuation
-    normalized_word = re.sub(r'^[.,;:!?()\[\]„""\'…]+', '', normalized_word)
-    normalized_word = re.sub(r'[.,;:!?()\[\]„""\'…]+$', '', normalized_word)
+    The offline Wiktionary index is consulted first (the form, then its lemma);
+    words it doesn't have go through the cache and the API.
+    
+    Entries are cached per (language, word). With a lemma, inflected forms share
+    the lemma's entry: a cached lemma entry answers the form without a request,
+    and when the form itself has no entry the lemma is looked up instead. Either
+    way the entry is also cached under the form. Words Wiktionary doesn't have
+    are cached as missing ({}) for a shorter time, so they aren't requested
+    again on every click.
     
+    Concurrent lookups of the same word share one Wiktionary request (single_flight.py).
+    """
+    normalized_word = normalize_dictionary_word(word)
     if not normalized_word:
         return None
+    normalized_lemma = normalize_dictionary_word(lemma) if lemma else ''
+    if normalized_lemma == normalized_word:
+        normalized_lemma = ''
+    
+    index = get_wiktionary_index()
+    if index is not None:
+        offline = index.lookup(source_lang, normalized_word)
+        if not offline and normalized_lemma:
+            offline = index.lookup(source_lang, normalized_lemma)
+        if offline:
+            return offline
     
-    # Check cache first
-    cache_key = f"dictionary:{source_lang}:{normalized_word}"
+    # Check cache
+    cache_key = _cache_key(normalized_word, source_lang)
     cached = cache.get(cache_key)
     if cached:
         return cached
     
+    lemma_key = _cache_key(normalized_lemma, source_lang) if normalized_lemma else None
+    lemma_cached = cache.get(lemma_key) if lemma_key else None
+    if lemma_cached:
+        cache.set(cache_key, lemma_cached, ENTRY_CACHE_TTL)
+        return lemma_cached
+    
+    if cached is None:
+        entry = _lookup_dictionary_entry(word, normalized_word, source_lang, target_lang)
+        if entry:
+            return entry
+    
+    # The form has no entry of its own; fall back to its lemma
+    if not lemma_key:
+        return None
+    if lemma_cached is None:
+        lemma_cached = _lookup_dictionary_entry(lemma, normalized_lemma, source_lang, target_lang)
+    if not lemma_cached:
+        return None
+    cache.set(cache_key, lemma_cached, ENTRY_CACHE_TTL)
+    return lemma_cached
+
+
+def _lookup_dictionary_entry(word: str, normalized_word: str, source_lang: str, target_lang: str) -> Optional[Dict]:
+    """Request an entry once for all concurrent callers; None when Wiktionary has none."""
+    cache_key = _cache_key(normalized_word, source_lang)
+    # A cached {} (missing) also ends the wait for another worker's request
+    entry = single_flight.run(
+        cache_key,
+        lambda: _request_dictionary_entry(word, normalized_word, source_lang, target_lang),
+        lookup=lambda: cache.get(cache_key),
+    )
+    return entry or None
+
+
+def _request_dictionary_entry(word: str, normalized_word: str, source_lang: str, target_lang: str) -> Optional[Dict]:
+    """Fetch and parse a Wiktionary entry, caching the entry or its absence."""
+    cache_key = _cache_key(normalized_word, source_lang)
     try:
         # Wiktionary API endpoint
         # Format: https://en.wiktionary.org/api/rest_v1/page/definition/{word}
@@ -75,10 +189,11 @@ def get_dictionary_entry(word: str, source_lang: str = 'de', target_lang: str =
             'User-Agent': 'SpanishAnkiApp/1.0 (Language Learning App; https://github.com/yourusername/spanish-anki)'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, service='wiktionary', headers=headers)
         
         if response.status_code == 404:
             # Word not found in Wiktionary
+            cache.set(cache_key, {}, _not_found_ttl())
             return None
         
         response.raise_for_status()
@@ -88,18 +203,24 @@ def get_dictionary_entry(word: str, source_lang: str = 'de', target_lang: str =
         dictionary_entry = _parse_wiktionary_response(data, source_lang, target_lang)
         
         if dictionary_entry:
-            # Cache for 30 days
-            cache.set(cache_key, dictionary_entry, 60 * 60 * 24 * 30)
+            cache.set(cache_key, dictionary_entry, ENTRY_CACHE_TTL)
             return dictionary_entry
+        # A page without a section for this language is as good as a 404
+        cache.set(cache_key, {}, _not_found_ttl())
+        return None
             
+    except (http_client.CircuitOpenError, http_client.DeadlineExceeded) as e:
+        # Not sent: nothing was learned about the word, so nothing is cached
+        print(f"Dictionary API error for '{word}': {e}")
+        return None
     except requests.exceptions.RequestException as e:
         print(f"Dictionary API error for '{word}': {e}")
+        cache.set(cache_key, {}, _error_ttl())
         return None
     except Exception as e:
         print(f"Dictionary parsing error for '{word}': {e}")
+        cache.set(cache_key, {}, _error_ttl())
         return None
-    
-    return None
 
 
 def _parse_wiktionary_response(data: Dict, source_lang: str, target_lang: str) -> Optional[Dict]:
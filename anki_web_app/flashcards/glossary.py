@@ -0,0 +1,144 @@
+"""
+Per-language glossary of word translations.
+
+A GlossaryEntry holds the translation and dictionary entry of one normalized
+word form for a language pair. Token clicks read it before calling any
+external service and write back what they fetched; adding a word to
+flashcards records the card's back when the glossary has nothing yet. New
+lessons are annotated from it with a single UPDATE, so most clicks on common
+words are answered from the database.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Exists, OuterRef, Subquery
+
+from .lexemes import LOOKUP_BATCH_SIZE
+from .models import GlossaryEntry, Lesson, Lexeme, Token
+
+
+def _combine(own: Optional[GlossaryEntry], base: Optional[GlossaryEntry]) -> Optional[Dict]:
+    """A form's own entry, with the lemma's dictionary entry filling a gap."""
+    if own is None and base is None:
+        return None
+    translation = own.translation if own else None
+    dictionary_entry = own.dictionary_entry if own and own.dictionary_entry.get('meanings') else {}
+    if not dictionary_entry and base is not None and base.dictionary_entry.get('meanings'):
+        dictionary_entry = base.dictionary_entry
+    if not translation and not dictionary_entry:
+        return None
+    return {'translation': translation, 'dictionary_entry': dictionary_entry}
+
+
+def lookup_many(
+    source_lang: str, target_lang: str, forms: Iterable[Tuple[str, Optional[str]]]
+) -> Dict[Tuple[str, str], Dict]:
+    """
+    Glossary data for many word forms, batched.
+
+    Args:
+        forms: (normalized, lemma) pairs
+
+    Returns:
+        {(normalized, lemma or ''): {'translation', 'dictionary_entry'}} for the known forms
+    """
+    forms = {(normalized, lemma or '') for normalized, lemma in forms if normalized}
+    words = sorted({normalized for normalized, _ in forms} | {lemma for _, lemma in forms if lemma})
+    entries = {}
+    for start in range(0, len(words), LOOKUP_BATCH_SIZE):
+        for entry in GlossaryEntry.objects.filter(
+            source_lang=source_lang, target_lang=target_lang, normalized__in=words[start:start + LOOKUP_BATCH_SIZE]
+        ):
+            entries[entry.normalized] = entry
+
+    results = {}
+    for normalized, lemma in forms:
+        known = _combine(entries.get(normalized), entries.get(lemma) if lemma else None)
+        if known:
+            results[(normalized, lemma)] = known
+    return results
+
+
+def lookup(source_lang: str, target_lang: str, normalized: str, lemma: Optional[str] = None) -> Optional[Dict]:
+    """
+    Glossary data for a word form (one query).
+
+    The form's own entry wins; the lemma's entry fills in a missing dictionary
+    entry (e.g. "sah" borrows the dictionary entry of "sehen").
+
+    Returns:
+        {'translation': str or None, 'dictionary_entry': dict} or None when nothing is known
+    """
+    return lookup_many(source_lang, target_lang, [(normalized, lemma)]).get((normalized, lemma or ''))
+
+
+def record(
+    source_lang: str,
+    target_lang: str,
+    normalized: str,
+    lemma: Optional[str] = None,
+    translation: Optional[str] = None,
+    dictionary_entry: Optional[Dict] = None,
+    source: str = 'machine',
+    overwrite: bool = True,
+) -> Optional[GlossaryEntry]:
+    """
+    Store what is known about a word form. Only the given values are written.
+
+    Args:
+        overwrite: Replace existing values (False only fills gaps)
+    """
+    if not normalized or not (translation or (dictionary_entry and dictionary_entry.get('meanings'))):
+        return None
+    entry, created = GlossaryEntry.objects.get_or_create(
+        source_lang=source_lang,
+        target_lang=target_lang,
+        normalized=normalized,
+        defaults={
+            'lemma': lemma or '',
+            'translation': translation,
+            'dictionary_entry': dictionary_entry or {},
+            'source': source,
+        },
+    )
+    if created:
+        return entry
+
+    update_fields = []
+    if translation and (overwrite or not entry.translation) and translation != entry.translation:
+        entry.translation = translation
+        entry.source = source
+        update_fields += ['translation', 'source']
+    if dictionary_entry and dictionary_entry.get('meanings') and (overwrite or not entry.dictionary_entry.get('meanings')):
+        entry.dictionary_entry = dictionary_entry
+        update_fields.append('dictionary_entry')
+    if lemma and not entry.lemma:
+        entry.lemma = lemma
+        update_fields.append('lemma')
+    if update_fields:
+        entry.save(update_fields=update_fields + ['updated_at'])
+    return entry
+
+
+def annotate_lesson_tokens(lesson: Lesson, target_lang: str = 'en') -> int:
+    """
+    Copy glossary translations onto a lesson's tokens in one UPDATE.
+
+    Only tokens without a translation are touched. Lessons stored packed have
+    no token rows yet; their clicks read the glossary directly.
+
+    Returns:
+        Number of tokens annotated
+    """
+    # The token's normalized form, read through its lexeme (UPDATE can't join)
+    word_form = Lexeme.objects.filter(lexeme_id=OuterRef(OuterRef('lexeme_id'))).values('normalized')[:1]
+    entries = GlossaryEntry.objects.filter(
+        source_lang=lesson.language,
+        target_lang=target_lang,
+        normalized=Subquery(word_form),
+        translation__isnull=False,
+    ).exclude(translation='')
+    return Token.objects.filter(lesson=lesson, translation__isnull=True).filter(Exists(entries)).update(
+        translation=Subquery(entries.values('translation')[:1]),
+        dictionary_entry=Subquery(entries.values('dictionary_entry')[:1]),
+    )
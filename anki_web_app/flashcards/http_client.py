@@ -0,0 +1,263 @@
+"""
+Shared outbound HTTP client.
+
+Every external call (DeepL, Wiktionary, ElevenLabs, Supabase JWKS) goes
+through one requests.Session per host, so connections are kept alive and
+reused from a bounded pool instead of paying DNS + TCP + TLS per call.
+
+Each service has its own (connect, read) timeout and retry budget. Failed
+attempts are retried with exponential backoff and full jitter, honoring
+Retry-After on 429/503. GET requests retry on any connection error, timeout
+or retryable status; POST requests (paid, not idempotent) only retry when the
+request never reached the server (connect timeout) or was rejected before
+processing (429/503).
+
+Latency, error and retry counts are recorded per host; latency_stats() reports
+them for this process (also shown by the health endpoint).
+
+Named services also go through a circuit breaker (circuit_breaker.py): while a
+service's circuit is open, requests fail immediately with CircuitOpenError.
+Inside a deadline budget (deadline.py) timeouts are clamped to the time left,
+retries that no longer fit are skipped and requests past the deadline fail
+with DeadlineExceeded. Both are RequestExceptions, so callers that already
+degrade on network errors degrade the same way.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import circuit_breaker, deadline
+
+# Connections kept per host (one pool per host)
+POOL_MAXSIZE = 10
+
+# (connect, read) timeouts in seconds and retries after the first attempt
+SERVICES = {
+    'deepl': {'timeout': (3.05, 10), 'retries': 2},
+    'wiktionary': {'timeout': (3.05, 10), 'retries': 2},
+    'elevenlabs': {'timeout': (3.05, 30), 'retries': 1},
+    'supabase': {'timeout': (3.05, 5), 'retries': 2},
+}
+DEFAULT_SERVICE = {'timeout': (3.05, 10), 'retries': 1}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses meaning the server did not process the request (safe to resend a POST)
+REJECTED_STATUSES = {429, 503}
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 4.0
+
+# Latency samples kept per host for percentiles
+LATENCY_SAMPLES = 200
+
+# Don't start an attempt with less time than this left in the deadline budget
+MIN_ATTEMPT_SECONDS = 0.1
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_metrics: Dict[str, Dict] = {}
+_metrics_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The service's circuit is open; the request was not sent."""
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The request's deadline budget ran out before the request could be sent."""
+
+
+def _host(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str) -> requests.Session:
+    """The shared keep-alive session for a URL's host."""
+    host = _host(url)
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[host] = session
+    return session
+
+
+def _backoff(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """Full-jitter exponential backoff; Retry-After wins when the server sends one."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _record(host: str, seconds: float, error: bool, retried: bool) -> None:
+    with _metrics_lock:
+        metrics = _metrics.get(host)
+        if metrics is None:
+            metrics = _metrics[host] = {
+                'requests': 0, 'errors': 0, 'retries': 0, 'total_seconds': 0.0,
+                'max_seconds': 0.0, 'samples': deque(maxlen=LATENCY_SAMPLES),
+            }
+        metrics['requests'] += 1
+        metrics['errors'] += int(error)
+        metrics['retries'] += int(retried)
+        metrics['total_seconds'] += seconds
+        metrics['max_seconds'] = max(metrics['max_seconds'], seconds)
+        metrics['samples'].append(seconds)
+
+
+def _should_retry(method: str, response=None, error: Optional[Exception] = None) -> bool:
+    if error is not None:
+        if method == 'GET':
+            return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+        return isinstance(error, requests.exceptions.ConnectTimeout)
+    statuses = RETRY_STATUSES if method == 'GET' else REJECTED_STATUSES
+    return response.status_code in statuses
+
+
+def _clamp_timeout(timeout, remaining: Optional[float]):
+    """Limit a (connect, read) or single timeout to the time left in the budget."""
+    if remaining is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+def _fits_budget(delay: float) -> bool:
+    """Whether waiting `delay` seconds still leaves time for another attempt."""
+    remaining = deadline.remaining()
+    return remaining is None or remaining - delay >= MIN_ATTEMPT_SECONDS
+
+
+def _send(method: str, url: str, host: str, timeout, attempts: int, kwargs) -> requests.Response:
+    session = get_session(url)
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=_clamp_timeout(timeout, deadline.remaining()), **kwargs)
+        except requests.exceptions.RequestException as e:
+            retry = not last and _should_retry(method, error=e)
+            delay = _backoff(attempt) if retry else 0.0
+            retry = retry and _fits_budget(delay)
+            _record(host, time.monotonic() - started, True, retry)
+            if not retry:
+                raise
+            time.sleep(delay)
+            continue
+        retry = not last and _should_retry(method, response=response)
+        delay = _backoff(attempt, response) if retry else 0.0
+        retry = retry and _fits_budget(delay)
+        _record(host, time.monotonic() - started, response.status_code >= 500, retry)
+        if not retry:
+            return response
+        response.close()
+        time.sleep(delay)
+
+
+def request(method: str, url: str, service: Optional[str] = None, retries: Optional[int] = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the host's pooled session.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        service: Key in SERVICES for timeouts and retries
+        retries: Override the service's retry count
+        **kwargs: Passed to requests (timeout defaults to the service's)
+
+    Returns:
+        The last response (callers check the status as with requests)
+
+    Raises:
+        CircuitOpenError: when the service's circuit is open
+        DeadlineExceeded: when the deadline budget is spent
+        requests.exceptions.RequestException: when the last attempt failed
+    """
+    method = method.upper()
+    config = SERVICES.get(service, DEFAULT_SERVICE)
+    timeout = kwargs.pop('timeout', config['timeout'])
+    attempts = 1 + (config['retries'] if retries is None else retries)
+    host = _host(url)
+    name = service or host
+
+    remaining = deadline.remaining()
+    if remaining is not None and remaining < MIN_ATTEMPT_SECONDS:
+        deadline.note_degraded(name)
+        raise DeadlineExceeded(f"Deadline exceeded before {method} {url}")
+    if service is not None and not circuit_breaker.allow(service):
+        deadline.note_degraded(name)
+        raise CircuitOpenError(f"Circuit for {service} is open")
+
+    try:
+        response = _send(method, url, host, timeout, attempts, kwargs)
+    except requests.exceptions.RequestException:
+        deadline.note_degraded(name)
+        if service is not None:
+            circuit_breaker.record_failure(service)
+        raise
+    failed = response.status_code >= 500 or response.status_code == 429
+    if failed:
+        deadline.note_degraded(name)
+    if service is not None:
+        if failed:
+            circuit_breaker.record_failure(service)
+        else:
+            circuit_breaker.record_success(service)
+    return response
+
+
+def get(url: str, service: Optional[str] = None, **kwargs) -> requests.Response:
+    return request('GET', url, service=service, **kwargs)
+
+
+def post(url: str, service: Optional[str] = None, **kwargs) -> requests.Response:
+    return request('POST', url, service=service, **kwargs)
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_stats() -> Dict[str, Dict]:
+    """Per-host request counts and latencies (milliseconds) for this process."""
+    with _metrics_lock:
+        snapshot = {host: dict(metrics, samples=list(metrics['samples'])) for host, metrics in _metrics.items()}
+    stats = {}
+    for host, metrics in snapshot.items():
+        samples = metrics['samples']
+        stats[host] = {
+            'requests': metrics['requests'],
+            'errors': metrics['errors'],
+            'retries': metrics['retries'],
+            'avg_ms': round(1000 * metrics['total_seconds'] / metrics['requests'], 1),
+            'p50_ms': round(1000 * _percentile(samples, 0.5), 1),
+            'p95_ms': round(1000 * _percentile(samples, 0.95), 1),
+            'max_ms': round(1000 * metrics['max_seconds'], 1),
+        }
+    return stats
+
+
+def reset() -> None:
+    """Close all sessions and clear metrics (tests, after fork)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+    with _metrics_lock:
+        _metrics.clear()
@@ -0,0 +1,239 @@
+"""
+Lesson ingestion: turns text into Lesson + Token rows.
+
+Tokens are inserted with bulk_create in fixed-size batches straight from the
+tokenizer generator, so memory stays bounded by the batch size rather than
+the length of the text. Book-length uploads are read chunk by chunk and can
+optionally be split into one lesson per chapter.
+"""
+
+import codecs
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.db import transaction
+
+from . import glossary, packed_tokens
+from .lemma_frequency import add_lesson_frequencies
+from .lexemes import assign_lexemes, lexeme_form
+from .models import Lesson, Token
+from .tokenization import iter_tokenize_chunks
+
+# Number of Token rows per INSERT
+TOKEN_BATCH_SIZE = 1000
+
+# Lines that start a new chapter when splitting a book into lessons
+CHAPTER_HEADING_PATTERN = re.compile(
+    r'^\s*(?:(?:chapter|kapitel|cap[ií]tulo|chapitre|capitolo|teil|parte|part)\s+(?:\d+|[IVXLC]+)\b|#{1,3}\s+\S)',
+    re.IGNORECASE,
+)
+MAX_HEADING_LENGTH = 80
+
+# Token dict keys that map to Token model fields (the word form goes to the Lexeme)
+TOKEN_FIELDS = ('text', 'start_offset', 'end_offset')
+
+
+def bulk_insert_tokens(
+    lesson: Lesson,
+    tokens: Iterable[Dict],
+    batch_size: int = TOKEN_BATCH_SIZE,
+    packed: Optional[bool] = None,
+) -> int:
+    """
+    Insert tokenizer output for a lesson in batches.
+
+    Args:
+        lesson: Saved lesson the tokens belong to
+        tokens: Iterable of token dicts (from tokenize_text or iter_tokenize_chunks)
+        batch_size: Rows per bulk_create call
+        packed: Store the stream packed on the lesson instead of as rows
+            (defaults to the PACKED_TOKEN_STORAGE setting)
+
+    Each batch is linked to its interned Lexeme rows before it is inserted,
+    and the inserted tokens are pre-annotated from the shared glossary.
+    Also records the lesson's word counts in the user's LemmaFrequency index,
+    counted from the token stream as it goes by.
+    
+    Returns:
+        Number of tokens inserted
+    """
+    if packed is None:
+        packed = packed_tokens.is_enabled()
+    if packed:
+        count, key_counts = packed_tokens.store_packed_tokens(lesson, tokens)
+        add_lesson_frequencies(lesson, key_counts)
+        return count
+    if lesson.packed_token_count is not None:
+        lesson.packed_tokens = None
+        lesson.packed_token_count = None
+        lesson.save(update_fields=['packed_tokens', 'packed_token_count'])
+        lesson.key_counts.all().delete()
+
+    count = 0
+    batch = []
+    forms = []
+    key_counts = Counter()
+    for token_data in tokens:
+        batch.append(Token(lesson=lesson, **{field: token_data[field] for field in TOKEN_FIELDS}))
+        forms.append(lexeme_form(token_data))
+        if token_data.get('type') == 'word':
+            key = token_data['lemma'] or token_data['normalized']
+            if key:
+                key_counts[key] += 1
+        if len(batch) >= batch_size:
+            assign_lexemes(lesson.language, batch, forms)
+            Token.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+            forms = []
+    if batch:
+        assign_lexemes(lesson.language, batch, forms)
+        Token.objects.bulk_create(batch)
+        count += len(batch)
+    glossary.annotate_lesson_tokens(lesson)
+    add_lesson_frequencies(lesson, key_counts)
+    return count
+
+
+def iter_decoded_chunks(uploaded_file, encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Decode an uploaded file chunk by chunk.
+    Multi-byte characters split across chunk boundaries are handled by an incremental decoder.
+    Invalid bytes raise UnicodeDecodeError (the upload is rejected rather than stored with
+    replacement characters).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+    for raw_chunk in uploaded_file.chunks():
+        text = decoder.decode(raw_chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Re-split a stream of text chunks into lines (line endings kept)."""
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.splitlines(keepends=True)
+        # The last piece may be an incomplete line
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    if pending:
+        yield pending
+
+
+class _ChapterSplitter:
+    """
+    Splits a line stream into chapters at heading lines.
+
+    Each chapter is exposed as a lazy line iterator over the shared stream, so
+    it must be fully consumed before asking for the next chapter.
+    """
+
+    def __init__(self, lines: Iterable[str], split: bool = True):
+        self.lines = iter(lines)
+        self.split = split
+        self.next_heading = None
+        self.exhausted = False
+        # Heading of the chapter being read (known once its first line was consumed)
+        self.current_heading = None
+
+    def __iter__(self):
+        while not self.exhausted:
+            heading = self.next_heading
+            self.next_heading = None
+            self.current_heading = heading.strip() if heading else None
+            yield self._chapter_lines(heading)
+
+    def _chapter_lines(self, heading: Optional[str]) -> Iterator[str]:
+        has_content = False
+        if heading:
+            has_content = True
+            yield heading
+        for line in self.lines:
+            is_heading = self.split and _is_chapter_heading(line)
+            if is_heading and has_content:
+                self.next_heading = line
+                return
+            if is_heading:
+                # Heading at the very start of the text
+                self.current_heading = line.strip()
+            has_content = has_content or bool(line.strip())
+            yield line
+        self.exhausted = True
+
+
+def _is_chapter_heading(line: str) -> bool:
+    return len(line.strip()) <= MAX_HEADING_LENGTH and bool(CHAPTER_HEADING_PATTERN.match(line))
+
+
+def ingest_text_stream(
+    user,
+    chunks: Iterable[str],
+    title: str,
+    language: str = 'de',
+    split_chapters: bool = False,
+    source_type: str = 'file',
+    batch_size: int = TOKEN_BATCH_SIZE,
+) -> List[Lesson]:
+    """
+    Create lessons from a stream of text chunks with bounded memory.
+
+    Tokens are produced by a generator and inserted in batches while the text
+    is read. With split_chapters, every chapter heading starts a new lesson;
+    chapters after the first point at the first one through parent_lesson and
+    are numbered in order. The whole upload is one transaction, so a failure
+    part-way leaves no lessons behind.
+
+    Returns:
+        Created lessons in chapter order, each with token_count set to the
+        number of tokens inserted
+    """
+    with transaction.atomic():
+        return _ingest_chapters(user, chunks, title, language, split_chapters, source_type, batch_size)
+
+
+def _ingest_chapters(user, chunks, title, language, split_chapters, source_type, batch_size) -> List[Lesson]:
+    lessons = []
+    splitter = _ChapterSplitter(iter_lines(chunks), split=split_chapters)
+    for chapter_lines in splitter:
+        chapter_number = len(lessons) + 1
+        lesson = Lesson.objects.create(
+            user=user,
+            title=title,
+            text='',
+            language=language,
+            source_type=source_type,
+            parent_lesson=lessons[0] if lessons else None,
+            chapter_number=chapter_number if split_chapters else None,
+        )
+
+        pieces = []
+
+        def tracked(lines):
+            for line in lines:
+                pieces.append(line)
+                yield line
+
+        token_count = bulk_insert_tokens(lesson, iter_tokenize_chunks(tracked(chapter_lines), language), batch_size)
+        lesson.title = _chapter_title(title, splitter.current_heading, chapter_number, split_chapters)
+        lesson.text = ''.join(pieces)
+        lesson.rebuild_sentence_index()
+        lesson.save(update_fields=['title', 'text', 'sentence_spans'])
+        lesson.token_count = token_count
+        print(f"[ingestion] Created lesson {lesson.lesson_id} ({lesson.title}) with {token_count} tokens")
+        lessons.append(lesson)
+    return lessons
+
+
+def _chapter_title(title: str, heading: Optional[str], chapter_number: int, split_chapters: bool) -> str:
+    """Title for a chapter lesson."""
+    if not split_chapters:
+        return title
+    if heading:
+        return f"{title} - {heading}"[:500]
+    return f"{title} - {chapter_number}"[:500]
@@ -0,0 +1,178 @@
+"""
+In-memory vocabulary status sets for highlight rendering.
+
+Rendering a lesson needs the status of every token's word. Instead of looking
+each one up in the database, a user's vocabulary for a language is loaded once
+into two sorted arrays of 64-bit word ids (known and marked unknown) and
+membership is checked with a binary search.
+
+Word ids are interned with a stable hash of the vocabulary key, so the same
+word has the same id in every process. Each (user, language) set carries a
+version number kept in the database (cache_versions.py); status changes bump
+the version in the same transaction (invalidate_known_words) and stale sets
+are rebuilt on the next read in every worker. The packed arrays are also
+written to the cache under their version, so with a shared cache backend
+(Redis/Memcached) other workers reuse a set instead of querying for it.
+
+Blob layout:
+    header      struct '<I': number of known ids
+    ids         array('Q'): sorted known ids, then sorted unknown ids
+"""
+
+import hashlib
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import cache_versions
+
+_HEADER = struct.Struct('<I')
+
+# Seconds a packed set stays in the shared cache
+SHARED_CACHE_TIMEOUT = 60 * 60 * 24
+
+_local_sets = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def word_id(key: str) -> int:
+    """Stable 64-bit id of a vocabulary key (same value in every process)."""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _sorted_ids(keys: Iterable[str]) -> array:
+    return array('Q', sorted({word_id(key) for key in keys}))
+
+
+def _contains(ids: array, value: int) -> bool:
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+class KnownWordSet:
+    """Known and marked-unknown word ids of one user and language."""
+
+    def __init__(self, known: array, unknown: array, version: Optional[int] = None):
+        self.known = known
+        self.unknown = unknown
+        self.version = version
+
+    @classmethod
+    def from_keys(cls, known_keys: Iterable[str], unknown_keys: Iterable[str] = (), version: Optional[int] = None):
+        return cls(_sorted_ids(known_keys), _sorted_ids(unknown_keys), version)
+
+    def __len__(self):
+        return len(self.known)
+
+    def __contains__(self, key: str) -> bool:
+        return _contains(self.known, word_id(key))
+
+    def status_of(self, key: Optional[str]) -> Optional[str]:
+        """'known', 'unknown' or None for a vocabulary key."""
+        if not key:
+            return None
+        value = word_id(key)
+        if _contains(self.known, value):
+            return 'known'
+        if _contains(self.unknown, value):
+            return 'unknown'
+        return None
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(len(self.known)) + self.known.tobytes() + self.unknown.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, version: Optional[int] = None) -> 'KnownWordSet':
+        (known_count,) = _HEADER.unpack_from(data)
+        ids = array('Q')
+        ids.frombytes(data[_HEADER.size:])
+        return cls(ids[:known_count], ids[known_count:], version)
+
+
+def _version_key(user_id: int, language: str) -> str:
+    return f"known_words:version:{user_id}:{language}"
+
+
+def _set_key(user_id: int, language: str, version: int) -> str:
+    return f"known_words:set:{user_id}:{language}:{version}"
+
+
+def _local_max_entries() -> int:
+    return getattr(settings, 'KNOWN_WORDS_LOCAL_CACHE_SIZE', 256)
+
+
+def get_version(user_id: int, language: str) -> int:
+    """Current version of a user's set."""
+    return cache_versions.get_version(_version_key(user_id, language))
+
+
+def invalidate_known_words(user_id: int, language: str) -> None:
+    """
+    Mark a user's sets stale after vocabulary statuses changed.
+    Call it inside the transaction that writes the statuses.
+    """
+    cache_versions.bump_version(_version_key(user_id, language))
+
+
+def build_known_word_set(user_id: int, language: str, version: Optional[int] = None) -> KnownWordSet:
+    """Load a user's vocabulary statuses from the database (one query)."""
+    from .models import UserVocabulary
+
+    known, unknown = [], []
+    rows = UserVocabulary.objects.filter(user_id=user_id, language=language).values_list('key', 'status')
+    for key, status in rows.iterator():
+        (known if status == 'known' else unknown).append(key)
+    return KnownWordSet.from_keys(known, unknown, version)
+
+
+def _remember(cache_key, word_set: KnownWordSet) -> None:
+    with _local_lock:
+        _local_sets[cache_key] = word_set
+        _local_sets.move_to_end(cache_key)
+        while len(_local_sets) > _local_max_entries():
+            _local_sets.popitem(last=False)
+
+
+def get_known_word_set(user, language: str) -> KnownWordSet:
+    """
+    The user's status set for a language.
+
+    Served from the process, then from the shared cache, then built from the
+    database. A fresh in-process set costs a single primary-key read (the version).
+    """
+    user_id = getattr(user, 'pk', user)
+    version = get_version(user_id, language)
+    local_key = (user_id, language)
+
+    word_set = _local_sets.get(local_key)
+    if word_set is not None and word_set.version == version:
+        return word_set
+
+    data = cache.get(_set_key(user_id, language, version))
+    if data is not None:
+        try:
+            word_set = KnownWordSet.from_bytes(data, version)
+        except (struct.error, ValueError) as e:
+            print(f"[known_words] Warning: discarding corrupt cached set: {e}")
+            word_set = None
+    else:
+        word_set = None
+
+    if word_set is None:
+        word_set = build_known_word_set(user_id, language, version)
+        cache.set(_set_key(user_id, language, version), word_set.to_bytes(), SHARED_CACHE_TIMEOUT)
+
+    _remember(local_key, word_set)
+    return word_set
+
+
+def clear_local_sets() -> None:
+    """Drop all in-process sets (tests, memory pressure)."""
+    with _local_lock:
+        _local_sets.clear()
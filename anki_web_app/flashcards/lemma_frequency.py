@@ -0,0 +1,101 @@
+"""
+Corpus-wide word frequency per user.
+
+LemmaFrequency rows count, for every (user, language, vocabulary key), how
+often the word occurs across the user's lessons and in how many lessons.
+Counts are applied as deltas: new tokens are counted from the tokenizer output
+while they are inserted (bulk_insert_tokens), and a lesson's own counts are
+subtracted before its tokens are deleted. Nothing here recounts the corpus.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .coverage import WORD_REGEX
+from .models import LemmaFrequency, Lesson, LessonKeyCount, Token, UserVocabulary
+
+# Keys per query when reading/writing rows (keeps IN lists small)
+KEY_BATCH_SIZE = 500
+
+
+def lesson_key_counts(lesson: Lesson) -> Counter:
+    """Vocabulary key counts of a stored lesson (one grouped query over its tokens)."""
+    if lesson.packed_token_count is not None:
+        return Counter(dict(LessonKeyCount.objects.filter(lesson=lesson).values_list('key', 'occurrences')))
+    rows = (
+        Token.objects.filter(lesson=lesson, lexeme__normalized__regex=WORD_REGEX)
+        .values(vocab_key=F('lexeme__key'))
+        .annotate(occurrences=Count('token_id'))
+        .order_by()
+    )
+    return Counter({row['vocab_key']: row['occurrences'] for row in rows if row['vocab_key']})
+
+
+def apply_frequency_delta(user_id: int, language: str, counts: Counter, sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) one lesson's key counts.
+
+    Every key in counts belongs to one lesson, so its lesson_count moves by one.
+    Counts are changed with F() expressions in the UPDATE itself; missing rows
+    are first inserted empty with ignore_conflicts, so concurrent lessons
+    adding the same new key both land on one row. Rows that drop to zero
+    occurrences are deleted.
+    """
+    if not counts:
+        return
+    keys = sorted(counts)
+    now = timezone.now()
+    with transaction.atomic():
+        for start in range(0, len(keys), KEY_BATCH_SIZE):
+            batch = keys[start:start + KEY_BATCH_SIZE]
+            rows = LemmaFrequency.objects.filter(user_id=user_id, language=language, lemma__in=batch)
+            if sign > 0:
+                LemmaFrequency.objects.bulk_create(
+                    [LemmaFrequency(user_id=user_id, language=language, lemma=key) for key in batch],
+                    ignore_conflicts=True,
+                )
+            occurrences = Case(
+                *[When(lemma=key, then=Value(sign * counts[key])) for key in batch],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            rows.update(
+                occurrence_count=F('occurrence_count') + occurrences,
+                lesson_count=F('lesson_count') + sign,
+                updated_at=now,
+            )
+            if sign < 0:
+                rows.filter(Q(occurrence_count__lte=0) | Q(lesson_count__lte=0)).delete()
+
+
+def add_lesson_frequencies(lesson: Lesson, counts: Counter) -> None:
+    """Record the key counts of newly inserted lesson tokens."""
+    apply_frequency_delta(lesson.user_id, lesson.language, counts, sign=1)
+
+
+def remove_lesson_frequencies(lesson: Lesson) -> None:
+    """Subtract a lesson's counts; call before its tokens are deleted."""
+    apply_frequency_delta(lesson.user_id, lesson.language, lesson_key_counts(lesson), sign=-1)
+
+
+def top_unknown_lemmas(user, language: Optional[str] = None, limit: int = 50) -> List[Dict]:
+    """
+    Most frequent words in the user's library that aren't marked known.
+
+    Reads only LemmaFrequency (ordered by the (user, language, -occurrence_count)
+    index) with an anti-join against the user's known vocabulary.
+    """
+    vocabulary = UserVocabulary.objects.filter(user=user, language=OuterRef('language'), key=OuterRef('lemma'))
+    queryset = (
+        LemmaFrequency.objects.filter(user=user)
+        .exclude(Exists(vocabulary.filter(status='known')))
+        .annotate(status=Subquery(vocabulary.values('status')[:1]))
+        .order_by('-occurrence_count', '-lesson_count', 'lemma')
+    )
+    if language:
+        queryset = queryset.filter(language=language)
+    return list(queryset.values('language', 'lemma', 'occurrence_count', 'lesson_count', 'status')[:limit])
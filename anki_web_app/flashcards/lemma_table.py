@@ -0,0 +1,182 @@
+"""
+Lookup-table lemmatizer backed by a local SQLite file.
+
+Maps (language, surface form) to a lemma without loading a spaCy pipeline.
+Forms seen with more than one lemma are flagged as ambiguous so callers can
+fall back to spaCy for them. Build the table with:
+
+    python manage.py build_lemma_table --languages de es
+"""
+
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+SCHEMA = '''
+CREATE TABLE lemmas (
+    language TEXT NOT NULL,
+    form TEXT NOT NULL,
+    lemma TEXT NOT NULL,
+    ambiguous INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (language, form)
+) WITHOUT ROWID
+'''
+
+
+class LemmaTable:
+    """Read-only access to a lemma table file. One SQLite connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, language: str, form: str) -> Optional[Tuple[str, bool]]:
+        """
+        Look up a normalized surface form.
+
+        Returns:
+            (lemma, ambiguous) or None if the form is not in the table
+        """
+        row = self._connection().execute(
+            'SELECT lemma, ambiguous FROM lemmas WHERE language = ? AND form = ?',
+            (language.lower(), form),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], bool(row[1])
+
+    def count(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM lemmas').fetchone()[0]
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_lemma_table() -> Optional[LemmaTable]:
+    """Return the configured lemma table, or None if the file doesn't exist."""
+    global _table
+    path = str(getattr(settings, 'LEMMA_TABLE_PATH', '') or '')
+    if not path or not os.path.exists(path):
+        return None
+    with _table_lock:
+        if _table is None or _table.path != path:
+            _table = LemmaTable(path)
+        return _table
+
+
+def merge_lemma_sources(corpus_counts: Dict[Tuple[str, str], Counter],
+                        lookup_entries: Iterable[Tuple[str, str, str]]) -> Iterable[Tuple[str, str, str, int]]:
+    """
+    Combine corpus observations and spaCy lookup data into table rows.
+
+    Args:
+        corpus_counts: {(language, form): Counter({lemma: occurrences})} from our tokens
+        lookup_entries: (language, form, lemma) tuples from spaCy's lookup tables
+
+    Yields:
+        (language, form, lemma, ambiguous) rows. A form is ambiguous when the corpus
+        saw several lemmas for it, or the corpus and the lookup data disagree.
+    """
+    lookup = {}
+    for language, form, lemma in lookup_entries:
+        lookup.setdefault((language, form), lemma)
+
+    for key, lemma_counts in corpus_counts.items():
+        lemma, _ = lemma_counts.most_common(1)[0]
+        ambiguous = len(lemma_counts) > 1
+        lookup_lemma = lookup.pop(key, None)
+        if lookup_lemma is not None and lookup_lemma != lemma:
+            ambiguous = True
+        yield key[0], key[1], lemma, int(ambiguous)
+
+    for (language, form), lemma in lookup.items():
+        yield language, form, lemma, 0
+
+
+def write_lemma_table(path: str, rows: Iterable[Tuple[str, str, str, int]]) -> int:
+    """
+    Write rows to a new table file, replacing any existing file atomically.
+
+    Returns:
+        Number of rows written
+    """
+    tmp_path = f'{path}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(SCHEMA)
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= 10000:
+                conn.executemany('INSERT OR REPLACE INTO lemmas VALUES (?, ?, ?, ?)', batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany('INSERT OR REPLACE INTO lemmas VALUES (?, ?, ?, ?)', batch)
+            count += len(batch)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+def collect_corpus_counts(languages: Iterable[str]) -> Dict[Tuple[str, str], Counter]:
+    """Count (normalized form -> lemma) observations in the Token table."""
+    from django.db.models import Count
+    from .models import Token
+
+    counts = defaultdict(Counter)
+    rows = (
+        Token.objects.filter(lesson__language__in=list(languages))
+        .exclude(lexeme__lemma='')
+        .values_list('lesson__language', 'lexeme__normalized', 'lexeme__lemma')
+        .annotate(occurrences=Count('token_id'))
+        .order_by()
+    )
+    for language, form, lemma, occurrences in rows.iterator():
+        if form:
+            counts[(language.lower(), form)][lemma] += occurrences
+    return counts
+
+
+def iter_spacy_lookup_entries(language: str) -> Iterable[Tuple[str, str, str]]:
+    """
+    Yield (language, form, lemma) from spaCy's lemma_lookup data.
+    Reads the raw JSON shipped with spacy-lookups-data (spaCy's Table only keeps
+    hashed keys); yields nothing if the package or the language file is missing.
+    """
+    from pathlib import Path
+    from .tokenization import normalize_token
+    try:
+        import spacy_lookups_data
+        from spacy.util import load_language_data
+        data_dir = Path(spacy_lookups_data.__file__).parent / 'data'
+        data = load_language_data(data_dir / f'{language}_lemma_lookup.json')
+    except (ImportError, ValueError, OSError) as e:
+        print(f"[lemma_table] Warning: spaCy lookup data for '{language}' unavailable: {e}")
+        return
+    for form, lemma in data.items():
+        form = normalize_token(str(form))
+        lemma = normalize_token(str(lemma))
+        if form and lemma:
+            yield language, form, lemma
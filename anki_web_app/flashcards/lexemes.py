@@ -0,0 +1,80 @@
+"""
+Lexeme interning.
+
+Every distinct (language, normalized form, lemma) is stored once in the Lexeme
+table and tokens point at it by integer id (Token has no word-form columns of
+its own). Interning runs per insert batch: one query finds the lexemes that
+already exist, one INSERT adds the rest.
+"""
+
+from typing import Dict, Iterable, Sequence, Tuple
+
+from .models import Lexeme, UserVocabulary
+
+# Forms per query when looking up existing lexemes (keeps IN lists small)
+LOOKUP_BATCH_SIZE = 500
+
+LexemeForm = Tuple[str, str]
+
+
+def lexeme_form(token: Dict) -> LexemeForm:
+    """(normalized, lemma) of a tokenizer token dict, with '' for no lemma."""
+    return token['normalized'], token['lemma'] or ''
+
+
+def _lookup(language: str, forms) -> Dict[LexemeForm, int]:
+    found = {}
+    forms = list(forms)
+    for start in range(0, len(forms), LOOKUP_BATCH_SIZE):
+        batch = forms[start:start + LOOKUP_BATCH_SIZE]
+        rows = Lexeme.objects.filter(
+            language=language, normalized__in={normalized for normalized, _ in batch}
+        ).values_list('normalized', 'lemma', 'lexeme_id')
+        wanted = set(batch)
+        for normalized, lemma, lexeme_id in rows:
+            if (normalized, lemma) in wanted:
+                found[(normalized, lemma)] = lexeme_id
+    return found
+
+
+def intern_lexemes(language: str, forms: Iterable[LexemeForm]) -> Dict[LexemeForm, int]:
+    """
+    Ids for (normalized, lemma) pairs of a language, creating missing lexemes.
+
+    Args:
+        language: Lesson language
+        forms: (normalized, lemma) pairs; use '' for tokens without a lemma
+
+    Returns:
+        Mapping of every given pair to its lexeme id
+    """
+    forms = set(forms)
+    ids = _lookup(language, forms)
+    missing = forms - set(ids)
+    if missing:
+        # Concurrent inserts of the same form are skipped and picked up by the re-read
+        Lexeme.objects.bulk_create(
+            [
+                Lexeme(language=language, normalized=normalized, lemma=lemma,
+                       key=UserVocabulary.key_for(lemma, normalized))
+                for normalized, lemma in missing
+            ],
+            batch_size=LOOKUP_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        ids.update(_lookup(language, missing))
+    return ids
+
+
+def assign_lexemes(language: str, tokens: Sequence, forms: Sequence[LexemeForm]) -> None:
+    """
+    Set lexeme_id on unsaved Token objects of one language (one interning pass).
+
+    Args:
+        language: Lesson language
+        tokens: Token objects
+        forms: (normalized, lemma) of each token, in the same order
+    """
+    ids = intern_lexemes(language, forms)
+    for token, form in zip(tokens, forms):
+        token.lexeme_id = ids[form]
@@ -0,0 +1,89 @@
+"""
+Shared thread pool for independent outbound lookups.
+
+A view that needs several provider lookups (e.g. a token click: word
+translation, dictionary entry, sentence translation) submits them here and
+gathers the results, so it waits for the slowest lookup instead of their sum.
+
+Tasks run in a copy of the caller's context, so the caller's deadline budget
+(deadline.py) clamps their outbound requests too. gather() waits at most
+until the budget is spent; lookups still running then are reported as
+degraded and left to finish in the background (their results still land in
+the caches for the next request). Pool threads keep their database
+connections between tasks like request threads do: stale or expired ones
+(CONN_MAX_AGE) are closed before and after each task, the rest are reused.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import deadline
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _max_workers() -> int:
+    return getattr(settings, 'LOOKUP_POOL_WORKERS', 8)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=_max_workers(), thread_name_prefix='lookup')
+    return _executor
+
+
+def _call(fn: Callable, args, kwargs):
+    # What request_started/request_finished do for request threads
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """Run fn(*args, **kwargs) on the pool in a copy of the current context."""
+    context = contextvars.copy_context()
+    return _get_executor().submit(context.run, _call, fn, args, kwargs)
+
+
+def gather(
+    futures: Dict[str, Future],
+    timeout: Optional[float] = None,
+    services: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Wait for submitted lookups and collect what finished in time.
+
+    Args:
+        futures: {name: future} from submit()
+        timeout: Seconds to wait (None waits for all)
+        services: {name: provider} reported as degraded when a lookup fails or
+            is still running (defaults to the name)
+
+    Returns:
+        {name: result}, with None for lookups that failed or did not finish
+    """
+    services = services or {}
+    done, _ = wait(futures.values(), timeout=timeout)
+    results = {}
+    for name, future in futures.items():
+        results[name] = None
+        if future not in done:
+            print(f"[lookup_pool] {name} lookup did not finish in time")
+        elif future.exception() is not None:
+            print(f"[lookup_pool] {name} lookup failed: {future.exception()}")
+        else:
+            results[name] = future.result()
+            continue
+        deadline.note_degraded(services.get(name, name))
+    return results
@@ -0,0 +1,63 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from flashcards.lemma_table import get_lemma_table
+from flashcards.models import Token
+from flashcards.tokenization import get_spacy_model, lookup_lemma, lemmatize_token, spacy_lemmatize
+
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+
+
+class Command(BaseCommand):
+    help = 'Compares accuracy and throughput of the lookup-table and spaCy lemmatizers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', type=str, default='de', help='Language code')
+        parser.add_argument('--file', type=str, default=None, help='Text file to take words from (defaults to existing tokens)')
+        parser.add_argument('--limit', type=int, default=5000, help='Maximum number of words to lemmatize')
+
+    def handle(self, *args, **options):
+        language = options['language']
+        if get_spacy_model(language) is None:
+            raise CommandError(f'spaCy model for "{language}" is not available; it is needed as the reference')
+        if get_lemma_table() is None:
+            raise CommandError('Lemma table not found. Run "python manage.py build_lemma_table" first.')
+
+        words = self._load_words(options['file'], language, options['limit'])
+        if not words:
+            raise CommandError('No words to benchmark')
+        self.stdout.write(f'Benchmarking {len(words)} words ({language})')
+
+        spacy_lemmas, spacy_seconds = self._timed(lambda word: spacy_lemmatize(word, language), words)
+        lookup_lemmas, lookup_seconds = self._timed(lambda word: lookup_lemma(word, language), words)
+        hybrid_lemmas, hybrid_seconds = self._timed(lambda word: lemmatize_token(word, language, backend='lookup'), words)
+
+        table_hits = [lemma for lemma in lookup_lemmas if lemma is not None]
+        agreeing_hits = sum(1 for lookup, reference in zip(lookup_lemmas, spacy_lemmas) if lookup is not None and lookup == reference)
+        hybrid_agreeing = sum(1 for hybrid, reference in zip(hybrid_lemmas, spacy_lemmas) if hybrid == reference)
+
+        self.stdout.write(f'{"backend":<18}{"words/s":>12}{"seconds":>10}')
+        for name, seconds in (('spacy', spacy_seconds), ('lookup only', lookup_seconds), ('lookup + spacy', hybrid_seconds)):
+            self.stdout.write(f'{name:<18}{len(words) / max(seconds, 1e-9):>12.0f}{seconds:>10.3f}')
+
+        self.stdout.write(f'Table coverage: {len(table_hits) / len(words):.1%} of words answered without spaCy')
+        if table_hits:
+            self.stdout.write(f'Lookup accuracy on covered words (vs spaCy): {agreeing_hits / len(table_hits):.1%}')
+        self.stdout.write(f'Hybrid accuracy overall (vs spaCy): {hybrid_agreeing / len(words):.1%}')
+
+    def _load_words(self, path, language, limit):
+        if path:
+            with open(path, encoding='utf-8') as file:
+                return WORD_PATTERN.findall(file.read())[:limit]
+        return list(
+            Token.objects.filter(lesson__language=language)
+            .exclude(lexeme__normalized='')
+            .values_list('text', flat=True)[:limit]
+        )
+
+    def _timed(self, lemmatize, words):
+        started = time.perf_counter()
+        lemmas = [lemmatize(word) for word in words]
+        return lemmas, time.perf_counter() - started
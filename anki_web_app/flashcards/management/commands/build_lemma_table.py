@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from flashcards.lemma_table import (
+    collect_corpus_counts,
+    iter_spacy_lookup_entries,
+    merge_lemma_sources,
+    write_lemma_table,
+)
+
+
+class Command(BaseCommand):
+    help = 'Builds the lemma lookup table (form -> lemma) from existing tokens and spaCy lookup data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--languages', nargs='+', default=['de', 'es'], help='Language codes to include')
+        parser.add_argument('--output', type=str, default=None, help='Table path (defaults to settings.LEMMA_TABLE_PATH)')
+        parser.add_argument('--no-spacy-lookups', action='store_true', help='Only use lemmas from the token corpus')
+
+    def handle(self, *args, **options):
+        languages = [language.lower() for language in options['languages']]
+        output = options['output'] or str(settings.LEMMA_TABLE_PATH)
+
+        corpus_counts = collect_corpus_counts(languages)
+        self.stdout.write(f'Collected {len(corpus_counts)} forms from the token corpus')
+
+        def lookup_entries():
+            if options['no_spacy_lookups']:
+                return
+            for language in languages:
+                yield from iter_spacy_lookup_entries(language)
+
+        count = write_lemma_table(output, merge_lemma_sources(corpus_counts, lookup_entries()))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} forms to "{output}"'))
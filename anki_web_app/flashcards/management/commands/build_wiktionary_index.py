@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from flashcards.wiktionary_index import iter_kaikki_records, write_wiktionary_index
+
+
+class Command(BaseCommand):
+    help = 'Builds the offline Wiktionary index from kaikki.org JSONL extracts (.jsonl or .jsonl.gz)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='JSONL extract files')
+        parser.add_argument('--languages', nargs='+', default=['de', 'es'], help='Language codes to include')
+        parser.add_argument('--output', type=str, default=None, help='Index path (defaults to settings.WIKTIONARY_INDEX_PATH)')
+
+    def handle(self, *args, **options):
+        languages = [language.lower() for language in options['languages']]
+        output = options['output'] or str(settings.WIKTIONARY_INDEX_PATH)
+
+        count = write_wiktionary_index(output, iter_kaikki_records(options['paths'], languages))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} words to "{output}"'))
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from flashcards import cache_counters
+from flashcards.models import TokenizationCache
+from flashcards.tokenization_cache import MISS_COUNTER_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'Reports tokenization cache size and hit rate, and optionally prunes entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune-days', type=int, default=None, help='Delete entries not used for this many days')
+        parser.add_argument('--clear', action='store_true', help='Delete all entries and reset the miss counters')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = TokenizationCache.objects.all().delete()
+            cache_counters.reset(MISS_COUNTER_PREFIX)
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} cache entries'))
+        elif options['prune_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['prune_days'])
+            deleted, _ = TokenizationCache.objects.filter(last_used_at__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} entries unused since {cutoff:%Y-%m-%d}'))
+
+        rows = {
+            row['language']: row
+            for row in TokenizationCache.objects.values('language')
+            .annotate(entries=Count('key'), size=Sum('size_bytes'), tokens=Sum('token_count'), hits=Sum('hit_count'))
+        }
+        misses = cache_counters.counts(MISS_COUNTER_PREFIX)
+        total_entries = total_size = total_hits = total_misses = 0
+        self.stdout.write(
+            f'{"language":<10}{"entries":>10}{"tokens":>12}{"size (KB)":>12}{"hits":>10}{"misses":>10}{"hit rate":>10}'
+        )
+        for language in sorted(set(rows) | set(misses)):
+            row = rows.get(language, {'entries': 0, 'size': 0, 'tokens': 0, 'hits': 0})
+            language_misses = misses.get(language, 0)
+            self.stdout.write(
+                f'{language:<10}{row["entries"]:>10}{row["tokens"]:>12}{row["size"] / 1024:>12.1f}'
+                f'{row["hits"]:>10}{language_misses:>10}{_hit_rate(row["hits"], language_misses):>10}'
+            )
+            total_entries += row['entries']
+            total_size += row['size']
+            total_hits += row['hits']
+            total_misses += language_misses
+
+        self.stdout.write(
+            f'Total: {total_entries} entries, {total_size / 1024:.1f} KB, '
+            f'{total_hits} hits / {total_misses} misses, hit rate {_hit_rate(total_hits, total_misses)}'
+        )
+
+
+def _hit_rate(hits, misses):
+    lookups = hits + misses
+    return f'{hits / lookups:.1%}' if lookups else '-'
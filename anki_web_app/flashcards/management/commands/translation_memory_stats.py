@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from flashcards import cache_counters
+from flashcards.models import TranslationMemory
+from flashcards.translation_memory import MISS_COUNTER_PREFIX
+
+
+class Command(BaseCommand):
+    help = 'Reports translation memory size and hit rate, and optionally prunes entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune-days', type=int, default=None, help='Delete entries not used for this many days')
+        parser.add_argument('--clear', action='store_true', help='Delete all entries and reset the miss counters')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = TranslationMemory.objects.all().delete()
+            cache_counters.reset(MISS_COUNTER_PREFIX)
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} translation memory entries'))
+        elif options['prune_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['prune_days'])
+            deleted, _ = TranslationMemory.objects.filter(last_used_at__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} entries unused since {cutoff:%Y-%m-%d}'))
+
+        rows = {
+            f'{row["source_lang"]}->{row["target_lang"]}': row
+            for row in TranslationMemory.objects.values('source_lang', 'target_lang')
+            .annotate(entries=Count('key'), hits=Sum('hit_count'))
+        }
+        misses = cache_counters.counts(MISS_COUNTER_PREFIX)
+        total_entries = total_hits = total_misses = 0
+        self.stdout.write(f'{"pair":<10}{"entries":>10}{"hits":>10}{"misses":>10}{"hit rate":>10}')
+        for pair in sorted(set(rows) | set(misses)):
+            row = rows.get(pair, {'entries': 0, 'hits': 0})
+            pair_misses = misses.get(pair, 0)
+            self.stdout.write(
+                f'{pair:<10}{row["entries"]:>10}{row["hits"]:>10}{pair_misses:>10}{_hit_rate(row["hits"], pair_misses):>10}'
+            )
+            total_entries += row['entries']
+            total_hits += row['hits']
+            total_misses += pair_misses
+
+        self.stdout.write(
+            f'Total: {total_entries} entries, '
+            f'{total_hits} hits / {total_misses} misses, hit rate {_hit_rate(total_hits, total_misses)}'
+        )
+
+
+def _hit_rate(hits, misses):
+    lookups = hits + misses
+    return f'{hits / lookups:.1%}' if lookups else '-'
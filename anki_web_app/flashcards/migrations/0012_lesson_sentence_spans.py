@@ -0,0 +1,65 @@
+# Generated by Django 4.2 on 2026-10-19 07:42
+
+from django.db import migrations, models
+
+
+def build_sentence_index(apps, schema_editor):
+    """
+    Compute sentence spans for existing lessons and re-key cached sentence
+    translations from sentence text to sentence index. Entries whose text no
+    longer matches a sentence exactly are dropped (they are only a cache).
+    """
+    from flashcards.tokenization import split_sentences, pack_sentence_spans
+
+    Lesson = apps.get_model('flashcards', 'Lesson')
+    for lesson in Lesson.objects.all().iterator():
+        spans = split_sentences(lesson.text)
+        index_by_text = {}
+        for index, (start, end) in enumerate(spans):
+            index_by_text.setdefault(lesson.text[start:end], index)
+
+        translations = {}
+        for sentence_text, translation in (lesson.sentence_translations or {}).items():
+            index = index_by_text.get(sentence_text.strip())
+            if index is not None:
+                translations[str(index)] = translation
+
+        lesson.sentence_spans = pack_sentence_spans(spans)
+        lesson.sentence_translations = translations
+        lesson.save(update_fields=['sentence_spans', 'sentence_translations'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0011_add_token_status'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='token',
+            new_name='flashcards__lemma_a92103_idx',
+            old_name='flashcards_t_lemma_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='tokenstatus',
+            new_name='flashcards__user_id_a53e6d_idx',
+            old_name='flashcards__user_id_status_idx',
+        ),
+        migrations.RenameIndex(
+            model_name='tokenstatus',
+            new_name='flashcards__token_i_cd4a69_idx',
+            old_name='flashcards__token_id_status_idx',
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='sentence_spans',
+            field=models.BinaryField(blank=True, help_text='Packed sentence offsets (see tokenization.pack_sentence_spans)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='sentence_translations',
+            field=models.JSONField(blank=True, default=dict, help_text='Cached translations: {sentence_index: translation}'),
+        ),
+        migrations.RunPython(build_sentence_index, migrations.RunPython.noop),
+    ]
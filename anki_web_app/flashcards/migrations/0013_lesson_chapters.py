@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-19 07:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0012_lesson_sentence_spans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='chapter_number',
+            field=models.PositiveIntegerField(blank=True, help_text='Chapter position within the book (1-based)', null=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='parent_lesson',
+            field=models.ForeignKey(blank=True, help_text='First chapter of the book this lesson was split from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chapters', to='flashcards.lesson'),
+        ),
+    ]
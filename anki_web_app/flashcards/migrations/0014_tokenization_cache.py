@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-19 07:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0013_lesson_chapters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenizationCache',
+            fields=[
+                ('key', models.CharField(help_text='SHA-256 of language, tokenizer version and text', max_length=64, primary_key=True, serialize=False)),
+                ('language', models.CharField(max_length=10)),
+                ('tokenizer_version', models.CharField(max_length=100)),
+                ('data', models.BinaryField(help_text='Compressed offsets and lemmas for every token')),
+                ('token_count', models.IntegerField(default=0)),
+                ('size_bytes', models.IntegerField(default=0, help_text='Length of data')),
+                ('hit_count', models.IntegerField(default=0, help_text='Times this entry replaced a tokenizer run')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Tokenization Cache Entry',
+                'verbose_name_plural': 'Tokenization Cache Entries',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 4.2 on 2026-10-19 07:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+BATCH_SIZE = 1000
+MAX_LEVEL = 5
+
+
+def token_status_to_vocabulary(apps, schema_editor):
+    """
+    Collapse per-token statuses into one entry per (user, language, lemma or normalized).
+    When occurrences of the same word disagree, the most recently updated status wins.
+    """
+    TokenStatus = apps.get_model('flashcards', 'TokenStatus')
+    UserVocabulary = apps.get_model('flashcards', 'UserVocabulary')
+
+    entries = {}
+    rows = TokenStatus.objects.order_by('updated_at').values_list(
+        'user_id', 'token__lesson__language', 'token__lemma', 'token__normalized', 'status', 'created_at'
+    )
+    for user_id, language, lemma, normalized, status, created_at in rows.iterator():
+        key = lemma or normalized
+        if not key:
+            continue
+        previous = entries.get((user_id, language, key))
+        entries[(user_id, language, key)] = (
+            status,
+            min(created_at, previous[1]) if previous else created_at,
+        )
+
+    batch = []
+    for (user_id, language, key), (status, created_at) in entries.items():
+        batch.append(UserVocabulary(
+            user_id=user_id,
+            language=language,
+            key=key,
+            status=status,
+            level=MAX_LEVEL if status == 'known' else 0,
+            created_at=created_at,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            UserVocabulary.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        UserVocabulary.objects.bulk_create(batch)
+
+
+def vocabulary_to_token_status(apps, schema_editor):
+    """Expand vocabulary entries back onto the tokens of each user's own lessons."""
+    Token = apps.get_model('flashcards', 'Token')
+    TokenStatus = apps.get_model('flashcards', 'TokenStatus')
+    UserVocabulary = apps.get_model('flashcards', 'UserVocabulary')
+
+    user_ids = UserVocabulary.objects.order_by().values_list('user_id', flat=True).distinct()
+    for user_id in user_ids:
+        statuses = {
+            (language, key): status
+            for language, key, status in UserVocabulary.objects.filter(user_id=user_id).values_list('language', 'key', 'status')
+        }
+        batch = []
+        tokens = Token.objects.filter(lesson__user_id=user_id).values_list('token_id', 'lesson__language', 'lemma', 'normalized')
+        for token_id, language, lemma, normalized in tokens.iterator():
+            status = statuses.get((language, lemma or normalized))
+            if status:
+                batch.append(TokenStatus(user_id=user_id, token_id=token_id, status=status))
+            if len(batch) >= BATCH_SIZE:
+                TokenStatus.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            TokenStatus.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('flashcards', '0014_tokenization_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserVocabulary',
+            fields=[
+                ('vocab_id', models.AutoField(primary_key=True, serialize=False)),
+                ('language', models.CharField(max_length=10)),
+                ('key', models.CharField(help_text='Lemma, or normalized form for tokens without a lemma', max_length=200)),
+                ('status', models.CharField(choices=[('unknown', 'Unknown'), ('known', 'Known')], default='unknown', help_text='Whether the user knows this word', max_length=10)),
+                ('level', models.PositiveSmallIntegerField(default=0, help_text='Familiarity level (0-5)')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vocabulary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Vocabulary Entry',
+                'verbose_name_plural': 'User Vocabulary',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uservocabulary',
+            index=models.Index(fields=['user', 'language', 'status'], name='vocab_user_lang_status_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='uservocabulary',
+            unique_together={('user', 'language', 'key')},
+        ),
+        migrations.RunPython(token_status_to_vocabulary, vocabulary_to_token_status),
+        migrations.DeleteModel(
+            name='TokenStatus',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-19 08:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('flashcards', '0015_user_vocabulary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonCoverage',
+            fields=[
+                ('coverage_id', models.AutoField(primary_key=True, serialize=False)),
+                ('unique_words', models.IntegerField(default=0, help_text='Distinct words (by vocabulary key)')),
+                ('unknown_words', models.IntegerField(default=0, help_text='Distinct words not marked known')),
+                ('total_words', models.IntegerField(default=0, help_text='Word tokens in the running text')),
+                ('known_words', models.IntegerField(default=0, help_text='Word tokens whose word is marked known')),
+                ('known_percentage', models.FloatField(default=0.0, help_text='Percentage of running text known')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coverages', to='flashcards.lesson')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_coverages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lesson Coverage',
+                'verbose_name_plural': 'Lesson Coverage',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lessoncoverage',
+            index=models.Index(fields=['user', 'known_percentage'], name='coverage_user_known_pct_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lessoncoverage',
+            unique_together={('lesson', 'user')},
+        ),
+    ]
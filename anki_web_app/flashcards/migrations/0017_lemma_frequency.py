@@ -0,0 +1,75 @@
+# Generated by Django 4.2 on 2026-10-19 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce, NullIf
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def backfill_lemma_frequency(apps, schema_editor):
+    """Count existing tokens once; later changes are applied as deltas."""
+    Token = apps.get_model('flashcards', 'Token')
+    LemmaFrequency = apps.get_model('flashcards', 'LemmaFrequency')
+
+    rows = (
+        Token.objects.filter(normalized__regex=r'\w')
+        .annotate(vocab_key=Coalesce(NullIf('lemma', Value('')), 'normalized'))
+        .values('lesson__user_id', 'lesson__language', 'vocab_key')
+        .annotate(occurrences=Count('token_id'), lessons=Count('lesson_id', distinct=True))
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator():
+        if not row['vocab_key']:
+            continue
+        batch.append(LemmaFrequency(
+            user_id=row['lesson__user_id'],
+            language=row['lesson__language'],
+            lemma=row['vocab_key'],
+            occurrence_count=row['occurrences'],
+            lesson_count=row['lessons'],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            LemmaFrequency.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        LemmaFrequency.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('flashcards', '0016_lesson_coverage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LemmaFrequency',
+            fields=[
+                ('freq_id', models.AutoField(primary_key=True, serialize=False)),
+                ('language', models.CharField(max_length=10)),
+                ('lemma', models.CharField(help_text='Vocabulary key: lemma, or normalized form for tokens without a lemma', max_length=200)),
+                ('occurrence_count', models.IntegerField(default=0, help_text="Occurrences across all of the user's lessons")),
+                ('lesson_count', models.IntegerField(default=0, help_text='Number of lessons containing the word')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lemma_frequencies', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lemma Frequency',
+                'verbose_name_plural': 'Lemma Frequencies',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lemmafrequency',
+            index=models.Index(fields=['user', 'language', '-occurrence_count'], name='lemmafreq_user_lang_count_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lemmafrequency',
+            unique_together={('user', 'language', 'lemma')},
+        ),
+        migrations.RunPython(backfill_lemma_frequency, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2 on 2026-10-19 08:14
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def intern_token_lexemes(apps, schema_editor):
+    """Create one lexeme per distinct (language, normalized, lemma) and link every token to it."""
+    Token = apps.get_model('flashcards', 'Token')
+    Lexeme = apps.get_model('flashcards', 'Lexeme')
+
+    forms = {
+        (language, normalized, lemma or '')
+        for language, normalized, lemma in Token.objects.order_by()
+        .values_list('lesson__language', 'normalized', 'lemma').distinct().iterator()
+    }
+    batch = []
+    for language, normalized, lemma in forms:
+        batch.append(Lexeme(language=language, normalized=normalized, lemma=lemma, key=lemma or normalized))
+        if len(batch) >= BATCH_SIZE:
+            Lexeme.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Lexeme.objects.bulk_create(batch)
+
+    for language in {language for language, _, _ in forms}:
+        Token.objects.filter(lesson__language=language).update(lexeme=Subquery(
+            Lexeme.objects.filter(
+                language=language,
+                normalized=OuterRef('normalized'),
+                lemma=Coalesce(OuterRef('lemma'), Value('')),
+            ).values('lexeme_id')[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0017_lemma_frequency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lexeme',
+            fields=[
+                ('lexeme_id', models.AutoField(primary_key=True, serialize=False)),
+                ('language', models.CharField(max_length=10)),
+                ('normalized', models.CharField(max_length=200)),
+                ('lemma', models.CharField(blank=True, default='', help_text='Empty when the form has no lemma', max_length=200)),
+                ('key', models.CharField(help_text='Vocabulary key: lemma, or normalized form without a lemma', max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Lexeme',
+                'verbose_name_plural': 'Lexemes',
+            },
+        ),
+        migrations.AlterField(
+            model_name='token',
+            name='lemma',
+            field=models.CharField(blank=True, help_text='Lemmatized form (base form, e.g., sehen for sah/gesehen)', max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='token',
+            name='normalized',
+            field=models.CharField(help_text='Normalized form (lowercase, punctuation stripped)', max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='lexeme',
+            index=models.Index(fields=['language', 'key'], name='lexeme_lang_key_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lexeme',
+            unique_together={('language', 'normalized', 'lemma')},
+        ),
+        migrations.AddField(
+            model_name='token',
+            name='lexeme',
+            field=models.ForeignKey(blank=True, help_text='Interned word form (set on insert)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='tokens', to='flashcards.lexeme'),
+        ),
+        migrations.RunPython(intern_token_lexemes, migrations.RunPython.noop),
+    ]
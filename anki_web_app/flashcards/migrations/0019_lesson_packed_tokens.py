@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0018_lexeme'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='packed_token_count',
+            field=models.IntegerField(blank=True, help_text='Number of packed tokens; null when tokens are stored as rows', null=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='packed_tokens',
+            field=models.BinaryField(blank=True, help_text='Packed token offsets, lexeme ids and flags (see packed_tokens.py)', null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-19 08:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0019_lesson_packed_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlossaryEntry',
+            fields=[
+                ('glossary_id', models.AutoField(primary_key=True, serialize=False)),
+                ('source_lang', models.CharField(max_length=10)),
+                ('target_lang', models.CharField(max_length=10)),
+                ('normalized', models.CharField(help_text='Normalized surface form', max_length=200)),
+                ('lemma', models.CharField(blank=True, default='', help_text='Lemma of the form, if known', max_length=200)),
+                ('translation', models.TextField(blank=True, null=True)),
+                ('dictionary_entry', models.JSONField(blank=True, default=dict)),
+                ('source', models.CharField(choices=[('machine', 'Machine translation'), ('flashcard', 'Flashcard back')], default='machine', max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Glossary Entry',
+                'verbose_name_plural': 'Glossary',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='glossaryentry',
+            index=models.Index(fields=['source_lang', 'target_lang', 'lemma'], name='glossary_lemma_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='glossaryentry',
+            unique_together={('source_lang', 'target_lang', 'normalized')},
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 08:36
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0020_glossary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('key', models.CharField(help_text='SHA-256 of source language, target language and text', max_length=64, primary_key=True, serialize=False)),
+                ('source_lang', models.CharField(max_length=10)),
+                ('target_lang', models.CharField(max_length=10)),
+                ('text', models.TextField()),
+                ('translation', models.TextField()),
+                ('hit_count', models.IntegerField(default=0, help_text='Times this entry replaced a translation request')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Translation Memory Entry',
+                'verbose_name_plural': 'Translation Memory',
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2 on 2026-10-19 08:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def explode_sentence_translations(apps, schema_editor):
+    """Move each lesson's {sentence_index: translation} JSON into SentenceTranslation rows."""
+    Lesson = apps.get_model('flashcards', 'Lesson')
+    SentenceTranslation = apps.get_model('flashcards', 'SentenceTranslation')
+    rows = []
+    for lesson_id, translations in Lesson.objects.values_list('lesson_id', 'sentence_translations').iterator():
+        for key, translation in (translations or {}).items():
+            if not str(key).isdigit() or not translation:
+                continue
+            rows.append(SentenceTranslation(lesson_id=lesson_id, sentence_index=int(key), translation=translation))
+        if len(rows) >= BATCH_SIZE:
+            SentenceTranslation.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    SentenceTranslation.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def collapse_sentence_translations(apps, schema_editor):
+    """Rebuild the per-lesson JSON from SentenceTranslation rows."""
+    Lesson = apps.get_model('flashcards', 'Lesson')
+    SentenceTranslation = apps.get_model('flashcards', 'SentenceTranslation')
+    translations = {}
+    for lesson_id, index, translation in SentenceTranslation.objects.order_by().values_list(
+        'lesson_id', 'sentence_index', 'translation'
+    ).iterator():
+        translations.setdefault(lesson_id, {})[str(index)] = translation
+    for lesson_id, lesson_translations in translations.items():
+        Lesson.objects.filter(lesson_id=lesson_id).update(sentence_translations=lesson_translations)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0021_translation_memory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentenceTranslation',
+            fields=[
+                ('sentence_translation_id', models.AutoField(primary_key=True, serialize=False)),
+                ('sentence_index', models.IntegerField(help_text="Index into the lesson's sentence spans")),
+                ('translation', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translated_sentences', to='flashcards.lesson')),
+            ],
+            options={
+                'verbose_name': 'Sentence Translation',
+                'verbose_name_plural': 'Sentence Translations',
+                'ordering': ['lesson', 'sentence_index'],
+                'unique_together': {('lesson', 'sentence_index')},
+            },
+        ),
+        migrations.RunPython(explode_sentence_translations, collapse_sentence_translations),
+        migrations.RemoveField(
+            model_name='lesson',
+            name='sentence_translations',
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-19 09:24
+
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def count_packed_lesson_keys(apps, schema_editor):
+    """Write key counts for lessons that were packed before the table existed."""
+    from flashcards.packed_tokens import PackedTokens
+
+    Lesson = apps.get_model('flashcards', 'Lesson')
+    Lexeme = apps.get_model('flashcards', 'Lexeme')
+    LessonKeyCount = apps.get_model('flashcards', 'LessonKeyCount')
+
+    lessons = Lesson.objects.filter(packed_token_count__isnull=False).only('lesson_id', 'packed_tokens')
+    for lesson in lessons.iterator(chunk_size=100):
+        packed = PackedTokens(lesson.packed_tokens)
+        lexeme_counts = Counter(packed.lexeme_ids[index] for index in range(packed.count) if packed.is_word(index))
+        keys = dict(Lexeme.objects.filter(lexeme_id__in=list(lexeme_counts)).values_list('lexeme_id', 'key'))
+        counts = Counter()
+        for lexeme_id, occurrences in lexeme_counts.items():
+            if keys.get(lexeme_id):
+                counts[keys[lexeme_id]] += occurrences
+        LessonKeyCount.objects.bulk_create(
+            [LessonKeyCount(lesson_id=lesson.lesson_id, key=key, occurrences=n) for key, n in counts.items()],
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0023_cache_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonKeyCount',
+            fields=[
+                ('count_id', models.AutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(help_text='Vocabulary key: lemma, or normalized form for tokens without a lemma', max_length=200)),
+                ('occurrences', models.IntegerField(default=0, help_text='Word tokens of the lesson with this key')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='key_counts', to='flashcards.lesson')),
+            ],
+            options={
+                'verbose_name': 'Lesson Key Count',
+                'verbose_name_plural': 'Lesson Key Counts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lessonkeycount',
+            index=models.Index(fields=['key', 'lesson'], name='lessonkey_key_lesson_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lessonkeycount',
+            unique_together={('lesson', 'key')},
+        ),
+        migrations.RunPython(count_packed_lesson_keys, migrations.RunPython.noop),
+    ]
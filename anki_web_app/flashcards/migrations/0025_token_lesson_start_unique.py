@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-19 09:27
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_tokens(apps, schema_editor):
+    """
+    Keep the oldest row per (lesson, start_offset); duplicates came from concurrent
+    materialization of packed tokens. Phrases pointing at a duplicate move to the kept row.
+    """
+    Token = apps.get_model('flashcards', 'Token')
+    Phrase = apps.get_model('flashcards', 'Phrase')
+
+    duplicates = list(
+        Token.objects.order_by().values('lesson_id', 'start_offset')
+        .annotate(rows=Count('token_id'), keep=Min('token_id')).filter(rows__gt=1)
+    )
+    for row in duplicates:
+        extra = Token.objects.filter(lesson_id=row['lesson_id'], start_offset=row['start_offset']).exclude(token_id=row['keep'])
+        extra_ids = list(extra.values_list('token_id', flat=True))
+        Phrase.objects.filter(token_start_id__in=extra_ids).update(token_start_id=row['keep'])
+        Phrase.objects.filter(token_end_id__in=extra_ids).update(token_end_id=row['keep'])
+        Token.objects.filter(token_id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0024_lesson_key_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_tokens, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='token',
+            name='flashcards__lesson__b30399_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='token',
+            constraint=models.UniqueConstraint(fields=('lesson', 'start_offset'), name='token_lesson_start_unique'),
+        ),
+    ]
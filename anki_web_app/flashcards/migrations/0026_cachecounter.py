@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0025_token_lesson_start_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheCounter',
+            fields=[
+                ('key', models.CharField(help_text='e.g. tokenization_cache:misses:<language>', max_length=200, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cache Counter',
+                'verbose_name_plural': 'Cache Counters',
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2 on 2026-10-19 10:04
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def link_unlinked_tokens(apps, schema_editor):
+    """Intern the word forms of tokens saved without a lexeme and link them, so lexeme can be NOT NULL."""
+    Token = apps.get_model('flashcards', 'Token')
+    Lexeme = apps.get_model('flashcards', 'Lexeme')
+
+    unlinked = Token.objects.filter(lexeme__isnull=True)
+    forms = {
+        (language, normalized, lemma or '')
+        for language, normalized, lemma in unlinked.order_by()
+        .values_list('lesson__language', 'normalized', 'lemma').distinct().iterator()
+    }
+    batch = []
+    for language, normalized, lemma in forms:
+        batch.append(Lexeme(language=language, normalized=normalized, lemma=lemma, key=lemma or normalized))
+        if len(batch) >= BATCH_SIZE:
+            # Forms already interned by other tokens keep their existing lexeme
+            Lexeme.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Lexeme.objects.bulk_create(batch, ignore_conflicts=True)
+
+    for language in {language for language, _, _ in forms}:
+        unlinked.filter(lesson__language=language).update(lexeme=Subquery(
+            Lexeme.objects.filter(
+                language=language,
+                normalized=OuterRef('normalized'),
+                lemma=Coalesce(OuterRef('lemma'), Value('')),
+            ).values('lexeme_id')[:1]
+        ))
+
+
+def copy_word_forms_to_tokens(apps, schema_editor):
+    """Reverse: fill the restored normalized/lemma columns from each token's lexeme."""
+    Token = apps.get_model('flashcards', 'Token')
+    Lexeme = apps.get_model('flashcards', 'Lexeme')
+
+    lexeme = Lexeme.objects.filter(lexeme_id=OuterRef('lexeme_id'))
+    Token.objects.update(
+        normalized=Subquery(lexeme.values('normalized')[:1]),
+        lemma=Subquery(lexeme.annotate(form_lemma=NullIf('lemma', Value(''))).values('form_lemma')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flashcards', '0026_cachecounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_unlinked_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='token',
+            name='lexeme',
+            field=models.ForeignKey(help_text='Interned word form: normalized form, lemma and vocabulary key', on_delete=django.db.models.deletion.PROTECT, related_name='tokens', to='flashcards.lexeme'),
+        ),
+        # Runs on reverse only, once the columns below are back
+        migrations.RunPython(migrations.RunPython.noop, copy_word_forms_to_tokens),
+        migrations.RemoveIndex(
+            model_name='token',
+            name='flashcards__normali_47753f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='token',
+            name='flashcards__lemma_a92103_idx',
+        ),
+        # A default lets the reverse migration restore the column on existing rows
+        migrations.AlterField(
+            model_name='token',
+            name='normalized',
+            field=models.CharField(default='', help_text='Normalized form (lowercase, punctuation stripped)', max_length=200),
+        ),
+        migrations.RemoveField(
+            model_name='token',
+            name='lemma',
+        ),
+        migrations.RemoveField(
+            model_name='token',
+            name='normalized',
+        ),
+    ]
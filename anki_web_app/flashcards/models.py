@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 from datetime import timedelta # Ensure timedelta is imported
 from django.contrib.auth import get_user_model
@@ -428,15 +429,40 @@ class Lesson(models.Model):
     )
     source_url = models.URLField(blank=True, null=True, help_text="Original source URL")
     
+    # Book chapters (lessons split from one uploaded text)
+    parent_lesson = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='chapters',
+        help_text="First chapter of the book this lesson was split from"
+    )
+    chapter_number = models.PositiveIntegerField(blank=True, null=True, help_text="Chapter position within the book (1-based)")
+    
     # Metadata
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
-    # Translation cache (sentence-level)
-    sentence_translations = models.JSONField(
-        default=dict,
+    # Sentence boundary index: packed uint32 start offsets followed by end offsets
+    sentence_spans = models.BinaryField(
         blank=True,
-        help_text="Cached translations: {sentence_text: translation}"
+        null=True,
+        editable=False,
+        help_text="Packed sentence offsets (see tokenization.pack_sentence_spans)"
+    )
+    
+    # Packed token stream (PACKED_TOKEN_STORAGE); Token rows then exist only for tokens a user interacted with
+    packed_tokens = models.BinaryField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Packed token offsets, lexeme ids and flags (see packed_tokens.py)"
+    )
+    packed_token_count = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text="Number of packed tokens; null when tokens are stored as rows"
     )
     
     # Listening time tracking
@@ -459,13 +485,135 @@ class Lesson(models.Model):
     last_read_at = models.DateTimeField(blank=True, null=True, help_text="Last time lesson was read")
     completed_at = models.DateTimeField(blank=True, null=True, help_text="When lesson was marked as completed")
     
+    def count_tokens(self):
+        """Number of tokens, whether stored as rows or packed."""
+        if self.packed_token_count is not None:
+            return self.packed_token_count
+        return self.tokens.count()
+    
     def get_progress_percentage(self):
         """Calculate reading progress as a percentage based on words read."""
-        total_words = self.tokens.count()
+        total_words = self.count_tokens()
         if total_words == 0:
             return 0
         return min(100, int((self.words_read / total_words) * 100))
     
+    def rebuild_sentence_index(self, text=None):
+        """Recompute sentence spans from the lesson text (does not save)."""
+        from .tokenization import split_sentences, pack_sentence_spans
+        if text is None:
+            text = self.text
+        self.sentence_spans = pack_sentence_spans(split_sentences(text))
+    
+    def get_text_slice(self, start, end):
+        """
+        Return lesson.text[start:end].
+        Reads only the slice from the database if the text field was deferred.
+        """
+        if 'text' not in self.get_deferred_fields():
+            return self.text[start:end]
+        if end <= start:
+            return ''
+        from django.db.models.functions import Substr
+        return Lesson.objects.filter(pk=self.pk).annotate(
+            text_slice=Substr('text', start + 1, end - start)
+        ).values_list('text_slice', flat=True).first() or ''
+    
+    def get_sentence_at(self, offset):
+        """
+        Find the sentence containing a character offset.
+        Builds and saves the sentence index on first use for lessons created before it existed.
+        
+        Returns:
+            (sentence_index, sentence_text), or (None, '') if the lesson has no sentences
+        """
+        from .tokenization import unpack_sentence_spans, find_sentence_span
+        if self.sentence_spans is None:
+            text = self.text if 'text' not in self.get_deferred_fields() else \
+                Lesson.objects.filter(pk=self.pk).values_list('text', flat=True).first()
+            self.rebuild_sentence_index(text or '')
+            self.save(update_fields=['sentence_spans'])
+        
+        span = find_sentence_span(unpack_sentence_spans(self.sentence_spans), offset)
+        if span is None:
+            return None, ''
+        index, start, end = span
+        return index, self.get_text_slice(start, end)
+    
+    def get_sentence_translation(self, sentence_index):
+        """Return the cached translation for a sentence index, or None."""
+        if sentence_index is None:
+            return None
+        return (
+            SentenceTranslation.objects.filter(lesson=self, sentence_index=sentence_index)
+            .values_list('translation', flat=True)
+            .first()
+        )
+    
+    def get_sentence_translations(self):
+        """Return all cached sentence translations as {sentence_index: translation}."""
+        return dict(
+            SentenceTranslation.objects.filter(lesson=self)
+            .order_by('sentence_index')
+            .values_list('sentence_index', 'translation')
+        )
+    
+    def set_sentence_translation(self, sentence_index, translation):
+        """Cache a sentence translation under its sentence index."""
+        self.set_sentence_translations({sentence_index: translation})
+    
+    def set_sentence_translations(self, translations):
+        """Cache {sentence_index: translation} with one upsert (concurrent writers don't lose entries)."""
+        SentenceTranslation.objects.bulk_create(
+            [
+                SentenceTranslation(lesson=self, sentence_index=index, translation=translation)
+                for index, translation in translations.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['lesson', 'sentence_index'],
+            update_fields=['translation'],
+        )
+    
+    def clear_sentence_translations(self):
+        """Drop cached sentence translations (sentence indexes shift when the text changes)."""
+        SentenceTranslation.objects.filter(lesson=self).delete()
+    
+    def translate_sentences(self, limit=None):
+        """
+        Translate every sentence that has no cached translation yet, in batched DeepL requests.
+        
+        Args:
+            limit: Only consider the first `limit` sentences (None for all)
+        
+        Returns:
+            Number of sentences newly translated
+        """
+        from .tokenization import unpack_sentence_spans
+        from .translation_service import translate_many
+        if 'text' in self.get_deferred_fields():
+            self.refresh_from_db(fields=['text'])
+        if self.sentence_spans is None:
+            self.rebuild_sentence_index()
+            self.save(update_fields=['sentence_spans'])
+        
+        packed = unpack_sentence_spans(self.sentence_spans)
+        count = len(packed) // 2
+        considered = count if limit is None else min(count, limit)
+        cached = set(
+            SentenceTranslation.objects.filter(lesson=self, sentence_index__lt=considered)
+            .values_list('sentence_index', flat=True)
+        )
+        pending = [index for index in range(considered) if index not in cached]
+        translations = translate_many(
+            [self.text[packed[index]:packed[count + index]] for index in pending], self.language, 'en'
+        )
+        new_translations = {
+            index: translation for index, translation in zip(pending, translations) if translation
+        }
+        if new_translations:
+            self.set_sentence_translations(new_translations)
+        return len(new_translations)
+    
     def mark_completed(self):
         """Mark lesson as completed and set completed_at timestamp."""
         if self.status != 'completed':
@@ -479,18 +627,47 @@ class Lesson(models.Model):
         verbose_name_plural = "Lessons"
 
 
+class Lexeme(models.Model):
+    """
+    Interned (language, normalized form, lemma) triple shared by all tokens with
+    the same word form. Tokens reference it by integer id; `key` is the
+    vocabulary key (lemma, or normalized form) used by UserVocabulary.
+    """
+    lexeme_id = models.AutoField(primary_key=True)
+    language = models.CharField(max_length=10)
+    normalized = models.CharField(max_length=200)
+    lemma = models.CharField(max_length=200, blank=True, default='', help_text="Empty when the form has no lemma")
+    key = models.CharField(max_length=200, help_text="Vocabulary key: lemma, or normalized form without a lemma")
+    
+    class Meta:
+        unique_together = [['language', 'normalized', 'lemma']]
+        indexes = [
+            models.Index(fields=['language', 'key'], name='lexeme_lang_key_idx'),
+        ]
+        verbose_name = "Lexeme"
+        verbose_name_plural = "Lexemes"
+    
+    def __str__(self):
+        return f"{self.normalized} ({self.language})"
+
+
 class Token(models.Model):
     """
     Represents a word/phrase token within a lesson.
-    Used for highlighting and click-to-translate.
+    Used for highlighting and click-to-translate. The word form (normalized
+    form, lemma, vocabulary key) lives on the interned Lexeme.
     """
     token_id = models.AutoField(primary_key=True)
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='tokens')
     
     # Token text and position
     text = models.CharField(max_length=200, help_text="Surface form of the token")
-    normalized = models.CharField(max_length=200, db_index=True, help_text="Normalized form (lowercase, punctuation stripped)")
-    lemma = models.CharField(max_length=200, db_index=True, blank=True, null=True, help_text="Lemmatized form (base form, e.g., sehen for sah/gesehen)")
+    lexeme = models.ForeignKey(
+        Lexeme,
+        on_delete=models.PROTECT,
+        related_name='tokens',
+        help_text="Interned word form: normalized form, lemma and vocabulary key"
+    )
     
     # Position in lesson text
     start_offset = models.IntegerField(help_text="Character offset where token starts")
@@ -513,28 +690,36 @@ class Token(models.Model):
     
     class Meta:
         ordering = ['start_offset']
-        indexes = [
-            models.Index(fields=['lesson', 'start_offset']),
-            models.Index(fields=['normalized']),
-            models.Index(fields=['lemma']),
+        constraints = [
+            # One row per token position (packed lessons create rows on demand, possibly concurrently)
+            models.UniqueConstraint(fields=['lesson', 'start_offset'], name='token_lesson_start_unique'),
         ]
         verbose_name = "Token"
         verbose_name_plural = "Tokens"
+    
+    @property
+    def vocabulary_key(self) -> str:
+        """Key of this token's UserVocabulary entries."""
+        return self.lexeme.key
 
 
-class TokenStatus(models.Model):
+class UserVocabulary(models.Model):
     """
-    Tracks known/unknown status for tokens per user.
-    Allows multiple users to have different vocabulary statuses for the same token.
+    Known/unknown status of a word for a user, shared by every lesson.
+    Keyed by the lemma (or normalized form when a token has no lemma), so
+    marking "sehen" known also applies to "sah" and "gesehen" everywhere.
     """
     STATUS_CHOICES = [
         ('unknown', 'Unknown'),
         ('known', 'Known'),
     ]
+    # SRS-like familiarity level: 0 = new, MAX_LEVEL = known
+    MAX_LEVEL = 5
     
-    status_id = models.AutoField(primary_key=True)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='token_statuses')
-    token = models.ForeignKey(Token, on_delete=models.CASCADE, related_name='statuses')
+    vocab_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='vocabulary')
+    language = models.CharField(max_length=10)
+    key = models.CharField(max_length=200, help_text="Lemma, or normalized form for tokens without a lemma")
     
     status = models.CharField(
         max_length=10,
@@ -542,22 +727,55 @@ class TokenStatus(models.Model):
         default='unknown',
         help_text="Whether the user knows this word"
     )
+    level = models.PositiveSmallIntegerField(default=0, help_text=f"Familiarity level (0-{MAX_LEVEL})")
     
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-updated_at']
-        unique_together = [['user', 'token']]
+        unique_together = [['user', 'language', 'key']]
         indexes = [
-            models.Index(fields=['user', 'status']),
-            models.Index(fields=['token', 'status']),
+            models.Index(fields=['user', 'language', 'status'], name='vocab_user_lang_status_idx'),
         ]
-        verbose_name = "Token Status"
-        verbose_name_plural = "Token Statuses"
+        verbose_name = "User Vocabulary Entry"
+        verbose_name_plural = "User Vocabulary"
     
     def __str__(self):
-        return f"{self.user.username} - {self.token.text} ({self.status})"
+        return f"{self.user.username} - {self.key} ({self.status})"
+    
+    def save(self, *args, **kwargs):
+        # Queryset updates/bulk writes bypass this; their callers invalidate explicitly
+        from .known_words import invalidate_known_words
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            invalidate_known_words(self.user_id, self.language)
+    
+    def delete(self, *args, **kwargs):
+        from .known_words import invalidate_known_words
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            invalidate_known_words(self.user_id, self.language)
+        return result
+    
+    @staticmethod
+    def key_for(lemma: str, normalized: str) -> str:
+        """Vocabulary key for a token: its lemma, falling back to the normalized form."""
+        return lemma or normalized
+    
+    @classmethod
+    def status_subquery(cls, user):
+        """
+        Subquery resolving the user's status for the outer Token row.
+        Each row is a lookup on the (user, language, key) unique index.
+        """
+        return Subquery(
+            cls.objects.filter(
+                user=user,
+                language=OuterRef('lesson__language'),
+                key=OuterRef('lexeme__key'),
+            ).values('status')[:1]
+        )
 
 
 class Phrase(models.Model):
@@ -594,3 +812,245 @@ class Phrase(models.Model):
         ordering = ['created_at']
         verbose_name = "Phrase"
         verbose_name_plural = "Phrases"
+    
+    def save(self, *args, **kwargs):
+        from .phrase_matcher import phrase_added
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                phrase_added(self.lesson.user_id, self.lesson.language, self.phrase_id, self.text)
+    
+    def delete(self, *args, **kwargs):
+        from .phrase_matcher import phrase_removed
+        user_id, language, phrase_id = self.lesson.user_id, self.lesson.language, self.phrase_id
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            phrase_removed(user_id, language, phrase_id)
+        return result
+
+
+class GlossaryEntry(models.Model):
+    """
+    Word translation shared by every lesson and user of a language pair.
+    Filled from token clicks and flashcards, read by clicks and used to
+    pre-annotate new lessons (see glossary.py).
+    """
+    SOURCE_CHOICES = [
+        ('machine', 'Machine translation'),
+        ('flashcard', 'Flashcard back'),
+    ]
+    
+    glossary_id = models.AutoField(primary_key=True)
+    source_lang = models.CharField(max_length=10)
+    target_lang = models.CharField(max_length=10)
+    normalized = models.CharField(max_length=200, help_text="Normalized surface form")
+    lemma = models.CharField(max_length=200, blank=True, default='', help_text="Lemma of the form, if known")
+    
+    translation = models.TextField(blank=True, null=True)
+    dictionary_entry = models.JSONField(default=dict, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='machine')
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['source_lang', 'target_lang', 'normalized']]
+        indexes = [
+            models.Index(fields=['source_lang', 'target_lang', 'lemma'], name='glossary_lemma_idx'),
+        ]
+        verbose_name = "Glossary Entry"
+        verbose_name_plural = "Glossary"
+    
+    def __str__(self):
+        return f"{self.normalized} ({self.source_lang}->{self.target_lang}): {self.translation}"
+
+
+class TokenizationCache(models.Model):
+    """
+    Cached tokenizer output for a text, shared across users and lessons.
+    Keyed by a hash of (language, tokenizer version, text); see tokenization_cache.py.
+    """
+    key = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of language, tokenizer version and text")
+    language = models.CharField(max_length=10)
+    tokenizer_version = models.CharField(max_length=100)
+    data = models.BinaryField(help_text="Compressed offsets and lemmas for every token")
+    token_count = models.IntegerField(default=0)
+    size_bytes = models.IntegerField(default=0, help_text="Length of data")
+    hit_count = models.IntegerField(default=0, help_text="Times this entry replaced a tokenizer run")
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name = "Tokenization Cache Entry"
+        verbose_name_plural = "Tokenization Cache Entries"
+    
+    def __str__(self):
+        return f"{self.language} {self.key[:12]} ({self.token_count} tokens)"
+
+
+class TranslationMemory(models.Model):
+    """
+    Machine translation of a text, stored once and shared by all workers.
+    Keyed by a hash of (source language, target language, text); see translation_memory.py.
+    """
+    key = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of source language, target language and text")
+    source_lang = models.CharField(max_length=10)
+    target_lang = models.CharField(max_length=10)
+    text = models.TextField()
+    translation = models.TextField()
+    hit_count = models.IntegerField(default=0, help_text="Times this entry replaced a translation request")
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-last_used_at']
+        verbose_name = "Translation Memory Entry"
+        verbose_name_plural = "Translation Memory"
+    
+    def __str__(self):
+        return f"{self.source_lang}->{self.target_lang} {self.key[:12]}: {self.text[:40]}"
+
+
+class SentenceTranslation(models.Model):
+    """
+    Cached machine translation of one sentence of a lesson, keyed by sentence index
+    (see Lesson.sentence_spans). Written with upserts so concurrent clicks don't race.
+    """
+    sentence_translation_id = models.AutoField(primary_key=True)
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='translated_sentences')
+    sentence_index = models.IntegerField(help_text="Index into the lesson's sentence spans")
+    translation = models.TextField()
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = [['lesson', 'sentence_index']]
+        ordering = ['lesson', 'sentence_index']
+        verbose_name = "Sentence Translation"
+        verbose_name_plural = "Sentence Translations"
+    
+    def __str__(self):
+        return f"{self.lesson_id}#{self.sentence_index}: {self.translation[:40]}"
+
+
+class LessonCoverage(models.Model):
+    """
+    Known-word coverage of a lesson for a user (difficulty signal for the lesson list).
+    Computed once per lesson by flashcards.coverage and then kept current with
+    deltas whenever the user's vocabulary statuses change.
+    """
+    coverage_id = models.AutoField(primary_key=True)
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='coverages')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='lesson_coverages')
+    
+    unique_words = models.IntegerField(default=0, help_text="Distinct words (by vocabulary key)")
+    unknown_words = models.IntegerField(default=0, help_text="Distinct words not marked known")
+    total_words = models.IntegerField(default=0, help_text="Word tokens in the running text")
+    known_words = models.IntegerField(default=0, help_text="Word tokens whose word is marked known")
+    known_percentage = models.FloatField(default=0.0, help_text="Percentage of running text known")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['lesson', 'user']]
+        indexes = [
+            models.Index(fields=['user', 'known_percentage'], name='coverage_user_known_pct_idx'),
+        ]
+        verbose_name = "Lesson Coverage"
+        verbose_name_plural = "Lesson Coverage"
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.lesson.title} ({self.known_percentage:.0f}% known)"
+    
+    def update_percentage(self):
+        self.known_percentage = round(100.0 * self.known_words / self.total_words, 1) if self.total_words else 0.0
+
+
+class LessonKeyCount(models.Model):
+    """
+    Occurrences of a vocabulary key in a packed lesson.
+    Packed lessons have no Token rows to aggregate over; these rows are written
+    with the packed blob (see flashcards.packed_tokens) so coverage and
+    frequency updates can use grouped queries instead of unpacking blobs.
+    """
+    count_id = models.AutoField(primary_key=True)
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='key_counts')
+    key = models.CharField(max_length=200, help_text="Vocabulary key: lemma, or normalized form for tokens without a lemma")
+    occurrences = models.IntegerField(default=0, help_text="Word tokens of the lesson with this key")
+    
+    class Meta:
+        unique_together = [['lesson', 'key']]
+        indexes = [
+            models.Index(fields=['key', 'lesson'], name='lessonkey_key_lesson_idx'),
+        ]
+        verbose_name = "Lesson Key Count"
+        verbose_name_plural = "Lesson Key Counts"
+    
+    def __str__(self):
+        return f"{self.lesson_id} - {self.key} ({self.occurrences})"
+
+
+class LemmaFrequency(models.Model):
+    """
+    How often a word occurs across a user's lessons.
+    Maintained incrementally from tokenizer output (see flashcards.lemma_frequency)
+    so frequency-ranked study lists never have to scan the Token table.
+    """
+    freq_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='lemma_frequencies')
+    language = models.CharField(max_length=10)
+    lemma = models.CharField(max_length=200, help_text="Vocabulary key: lemma, or normalized form for tokens without a lemma")
+    
+    occurrence_count = models.IntegerField(default=0, help_text="Occurrences across all of the user's lessons")
+    lesson_count = models.IntegerField(default=0, help_text="Number of lessons containing the word")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['user', 'language', 'lemma']]
+        indexes = [
+            models.Index(fields=['user', 'language', '-occurrence_count'], name='lemmafreq_user_lang_count_idx'),
+        ]
+        verbose_name = "Lemma Frequency"
+        verbose_name_plural = "Lemma Frequencies"
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.lemma} ({self.occurrence_count})"
+
+
+class CacheVersion(models.Model):
+    """
+    Version counter of a per-process cache (see flashcards.cache_versions).
+    Writers bump the row in the transaction that changes the cached data, so
+    every worker process reads the same version from the database.
+    """
+    key = models.CharField(max_length=200, primary_key=True, help_text="e.g. known_words:<user>:<language>")
+    version = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Cache Version"
+        verbose_name_plural = "Cache Versions"
+    
+    def __str__(self):
+        return f"{self.key} (v{self.version})"
+
+
+class CacheCounter(models.Model):
+    """
+    Persistent event counter of a shared cache (see flashcards.cache_counters),
+    e.g. tokenization cache misses per language. Incremented with F() so
+    concurrent workers don't lose counts.
+    """
+    key = models.CharField(max_length=200, primary_key=True, help_text="e.g. tokenization_cache:misses:<language>")
+    count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Cache Counter"
+        verbose_name_plural = "Cache Counters"
+    
+    def __str__(self):
+        return f"{self.key} = {self.count}"
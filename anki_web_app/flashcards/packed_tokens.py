@@ -0,0 +1,230 @@
+"""
+Packed per-lesson token storage.
+
+With PACKED_TOKEN_STORAGE enabled, a lesson's token stream is stored as one
+BinaryField on the Lesson instead of one Token row per token. Token rows are
+only created when a user interacts with a token (click, status, phrase, card),
+so loading a long lesson reads a single row plus the lexemes it references.
+The lesson's vocabulary key counts are stored next to the blob as
+LessonKeyCount rows for coverage and frequency queries.
+
+Blob layout (native byte order, little-endian on every supported platform):
+    header      struct '<4sI': magic, token count
+    starts      int32[count]: start offsets
+    ends        int32[count]: end offsets
+    lexemes     int32[count]: Lexeme ids
+    flags       uint8[count]: FLAG_WORD for word tokens
+
+The arrays are read zero-copy through memoryview casts; numpy.frombuffer on
+the same slices works too.
+"""
+
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .lexemes import LOOKUP_BATCH_SIZE, intern_lexemes, lexeme_form
+
+_HEADER = struct.Struct('<4sI')
+MAGIC = b'PTK1'
+
+FLAG_WORD = 1
+
+# Tokens interned per lexeme lookup while packing
+PACK_BATCH_SIZE = 1000
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'PACKED_TOKEN_STORAGE', False)
+
+
+class PackedTokens:
+    """Read-only view over a packed token blob."""
+
+    def __init__(self, data):
+        view = memoryview(data)
+        magic, count = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError('Not a packed token blob')
+        self.count = count
+        position = _HEADER.size
+        int_size = 4 * count
+        self.starts = view[position:position + int_size].cast('i')
+        position += int_size
+        self.ends = view[position:position + int_size].cast('i')
+        position += int_size
+        self.lexeme_ids = view[position:position + int_size].cast('i')
+        position += int_size
+        self.flags = view[position:position + count]
+
+    def __len__(self):
+        return self.count
+
+    def is_word(self, index: int) -> bool:
+        return bool(self.flags[index] & FLAG_WORD)
+
+    def indexes_in_range(self, start_offset: int, end_offset: int) -> range:
+        """Indexes of tokens inside [start_offset, end_offset), or overlapping it when none fit inside."""
+        first = bisect_left(self.starts, start_offset)
+        last = first
+        while last < self.count and self.ends[last] <= end_offset:
+            last += 1
+        if last > first:
+            return range(first, last)
+        first = bisect_right(self.ends, start_offset)
+        last = bisect_left(self.starts, end_offset)
+        return range(first, max(first, last))
+
+
+def pack_tokens(language: str, tokens: Iterable[Dict]) -> Tuple[bytes, int, Counter]:
+    """
+    Pack tokenizer output, interning lexemes batch by batch.
+
+    Returns:
+        (blob, token count, vocabulary key counts of the word tokens)
+    """
+    starts, ends, lexeme_ids, flags = array('i'), array('i'), array('i'), array('B')
+    key_counts = Counter()
+    batch = []
+
+    def flush():
+        ids = intern_lexemes(language, (lexeme_form(token) for token in batch))
+        for token in batch:
+            starts.append(token['start_offset'])
+            ends.append(token['end_offset'])
+            lexeme_ids.append(ids[lexeme_form(token)])
+            is_word = token.get('type') == 'word'
+            flags.append(FLAG_WORD if is_word else 0)
+            key = token['lemma'] or token['normalized']
+            if is_word and key:
+                key_counts[key] += 1
+        batch.clear()
+
+    for token in tokens:
+        batch.append(token)
+        if len(batch) >= PACK_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    count = len(starts)
+    data = _HEADER.pack(MAGIC, count) + starts.tobytes() + ends.tobytes() + lexeme_ids.tobytes() + flags.tobytes()
+    return data, count, key_counts
+
+
+def load_lexemes(lexeme_ids: Iterable[int]) -> Dict[int, Tuple[str, str, str]]:
+    """Map lexeme ids to (normalized, lemma, key), batched."""
+    from .models import Lexeme
+
+    ids = sorted(set(lexeme_ids))
+    lexemes = {}
+    for start in range(0, len(ids), LOOKUP_BATCH_SIZE):
+        rows = Lexeme.objects.filter(lexeme_id__in=ids[start:start + LOOKUP_BATCH_SIZE])
+        for lexeme_id, normalized, lemma, key in rows.values_list('lexeme_id', 'normalized', 'lemma', 'key'):
+            lexemes[lexeme_id] = (normalized, lemma, key)
+    return lexemes
+
+
+def get_packed_tokens(lesson) -> Optional[PackedTokens]:
+    """The lesson's packed tokens, or None for lessons stored as rows."""
+    if lesson.packed_token_count is None:
+        return None
+    return PackedTokens(lesson.packed_tokens)
+
+
+def iter_packed_tokens(lesson, packed: Optional[PackedTokens] = None) -> Iterator[Dict]:
+    """Token dicts (index, text, normalized, lemma, offsets, vocabulary key, is_word) in text order."""
+    if packed is None:
+        packed = get_packed_tokens(lesson)
+    lexemes = load_lexemes(packed.lexeme_ids)
+    text = lesson.text
+    for index in range(packed.count):
+        start, end = packed.starts[index], packed.ends[index]
+        normalized, lemma, key = lexemes[packed.lexeme_ids[index]]
+        yield {
+            'index': index,
+            'text': text[start:end],
+            'normalized': normalized,
+            'lemma': lemma or None,
+            'start_offset': start,
+            'end_offset': end,
+            'vocabulary_key': key,
+            'is_word': packed.is_word(index),
+        }
+
+
+def store_packed_tokens(lesson, tokens: Iterable[Dict]) -> Tuple[int, Counter]:
+    """
+    Pack tokens into the lesson row (saves the packed fields only) and replace
+    the lesson's LessonKeyCount rows.
+
+    Returns:
+        (token count, vocabulary key counts)
+    """
+    from .models import LessonKeyCount
+
+    data, count, key_counts = pack_tokens(lesson.language, tokens)
+    lesson.packed_tokens = data
+    lesson.packed_token_count = count
+    lesson.save(update_fields=['packed_tokens', 'packed_token_count'])
+    LessonKeyCount.objects.filter(lesson=lesson).delete()
+    LessonKeyCount.objects.bulk_create(
+        [LessonKeyCount(lesson=lesson, key=key, occurrences=occurrences) for key, occurrences in key_counts.items()],
+        batch_size=LOOKUP_BATCH_SIZE,
+    )
+    return count, key_counts
+
+
+def materialize_token(lesson, index: int, packed: Optional[PackedTokens] = None):
+    """
+    Token row for a packed token, created on first use. Concurrent calls for
+    the same token get the same row (unique lesson/start_offset).
+
+    Raises:
+        IndexError: index is outside the lesson's tokens
+    """
+    from .models import Lexeme, Token
+
+    if packed is None:
+        packed = get_packed_tokens(lesson)
+    if not 0 <= index < packed.count:
+        raise IndexError(index)
+    start, end = packed.starts[index], packed.ends[index]
+    existing = Token.objects.filter(lesson=lesson, start_offset=start).select_related('lexeme').first()
+    if existing is not None:
+        return existing
+    lexeme = Lexeme.objects.get(lexeme_id=packed.lexeme_ids[index])
+    with transaction.atomic():
+        token, _ = Token.objects.get_or_create(
+            lesson=lesson,
+            start_offset=start,
+            defaults={
+                'text': lesson.get_text_slice(start, end),
+                'end_offset': end,
+                'lexeme': lexeme,
+            },
+        )
+    return token
+
+
+def materialize_range(lesson, start_offset: int, end_offset: int) -> List:
+    """Create Token rows for the packed tokens covering a text range (phrase selection)."""
+    packed = get_packed_tokens(lesson)
+    indexes = packed.indexes_in_range(start_offset, end_offset)
+    if not indexes:
+        return []
+    # Phrases only reference their first and last token
+    return [materialize_token(lesson, index, packed) for index in {indexes[0], indexes[-1]}]
+
+
+def packed_word_forms(lesson, packed: Optional[PackedTokens] = None) -> Dict[str, str]:
+    """Normalized form -> vocabulary key for the distinct word forms of a packed lesson."""
+    if packed is None:
+        packed = get_packed_tokens(lesson)
+    lexeme_ids = {packed.lexeme_ids[index] for index in range(packed.count) if packed.is_word(index)}
+    return {normalized: key for normalized, _, key in load_lexemes(lexeme_ids).values()}
@@ -0,0 +1,247 @@
+"""
+Cross-lesson saved-phrase matching.
+
+Every phrase a user saved becomes a pattern of normalized words, and all of a
+user's patterns for a language go into one Aho-Corasick automaton. Running it
+over a lesson's word tokens finds every occurrence of every saved phrase in a
+single pass, so the cost grows with the lesson length, not the number of
+phrases. Punctuation is skipped, so a phrase saved as "ja, genau" also matches
+"ja genau".
+
+Automata are cached per process (the PHRASE_MATCHER_LOCAL_CACHE_SIZE most
+recently used) with a version counter kept in the database (cache_versions.py).
+Saving or deleting a phrase bumps the version in the same transaction and
+patches this process's automaton in place (insert into the trie, relink
+lazily). Other workers see the new version and rebuild from the user's
+phrases on their next read, as does every worker after bulk deletions
+(lesson removed or re-tokenized).
+"""
+
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from . import cache_versions
+from .tokenization import normalize_token
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+_local_matchers = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def phrase_words(text: str) -> List[str]:
+    """Normalized word sequence of a phrase (the pattern it is matched by)."""
+    return [normalize_token(word) for word in _WORD_PATTERN.findall(text)]
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over word sequences; outputs phrase ids."""
+
+    def __init__(self, version: Optional[int] = None):
+        self.version = version
+        self._symbols: Dict[str, int] = {}
+        self._goto: List[Dict[int, int]] = [{}]
+        self._depth = [0]
+        self._phrase_ids: List[set] = [set()]
+        self._fail = [0]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        self._pattern_nodes: Dict[int, int] = {}
+        self._linked = True
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pattern_nodes)
+
+    def add(self, phrase_id: int, words: Sequence[str]) -> None:
+        """Insert a phrase pattern; failure links are recomputed on the next search."""
+        if not words:
+            return
+        with self._lock:
+            node = 0
+            for word in words:
+                symbol = self._symbols.setdefault(word, len(self._symbols))
+                child = self._goto[node].get(symbol)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto.append({})
+                    self._depth.append(self._depth[node] + 1)
+                    self._phrase_ids.append(set())
+                    self._fail.append(0)
+                    self._outputs.append(())
+                    self._goto[node][symbol] = child
+                node = child
+            self._phrase_ids[node].add(phrase_id)
+            self._pattern_nodes[phrase_id] = node
+            self._linked = False
+
+    def remove(self, phrase_id: int) -> None:
+        """Drop a phrase; its trie nodes stay (they no longer produce output)."""
+        with self._lock:
+            node = self._pattern_nodes.pop(phrase_id, None)
+            if node is not None:
+                self._phrase_ids[node].discard(phrase_id)
+
+    def _link(self) -> None:
+        """Breadth-first failure links; outputs list every pattern node on the suffix chain."""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._outputs[child] = (child,) if self._phrase_ids[child] else ()
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(symbol, 0)
+                inherited = self._outputs[self._fail[child]]
+                self._outputs[child] = ((child,) + inherited) if self._phrase_ids[child] else inherited
+                queue.append(child)
+        self._linked = True
+
+    def find(self, words: Iterable[Optional[str]]) -> Iterator[Tuple[int, int, frozenset]]:
+        """
+        Scan a word sequence once.
+
+        Args:
+            words: Normalized words; None for positions that can't be part of a phrase
+
+        Yields:
+            (first word index, last word index, phrase ids) per occurrence
+        """
+        with self._lock:
+            if not self._linked:
+                self._link()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for index, word in enumerate(words):
+            symbol = self._symbols.get(word) if word is not None else None
+            if symbol is None:
+                node = 0
+                continue
+            while node and symbol not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(symbol, 0)
+            for match in outputs[node]:
+                phrase_ids = self._phrase_ids[match]
+                if phrase_ids:
+                    yield index - self._depth[match] + 1, index, frozenset(phrase_ids)
+
+
+def _version_key(user_id: int, language: str) -> str:
+    return f"phrase_matcher:version:{user_id}:{language}"
+
+
+def _local_max_entries() -> int:
+    return getattr(settings, 'PHRASE_MATCHER_LOCAL_CACHE_SIZE', 256)
+
+
+def _remember(local_key, matcher: PhraseMatcher) -> None:
+    with _local_lock:
+        _local_matchers[local_key] = matcher
+        _local_matchers.move_to_end(local_key)
+        while len(_local_matchers) > _local_max_entries():
+            _local_matchers.popitem(last=False)
+
+
+def build_phrase_matcher(user_id: int, language: str, version: Optional[int] = None) -> PhraseMatcher:
+    """Build a user's automaton from all their saved phrases in a language (one query)."""
+    from .models import Phrase
+
+    matcher = PhraseMatcher(version)
+    rows = Phrase.objects.filter(lesson__user_id=user_id, lesson__language=language).values_list('phrase_id', 'text')
+    for phrase_id, text in rows.iterator():
+        matcher.add(phrase_id, phrase_words(text))
+    return matcher
+
+
+def get_phrase_matcher(user, language: str) -> PhraseMatcher:
+    """The user's cached automaton for a language, rebuilt when stale."""
+    user_id = getattr(user, 'pk', user)
+    version = cache_versions.get_version(_version_key(user_id, language))
+    matcher = _local_matchers.get((user_id, language))
+    if matcher is not None and matcher.version == version:
+        return matcher
+    matcher = build_phrase_matcher(user_id, language, version)
+    _remember((user_id, language), matcher)
+    return matcher
+
+
+def _apply_change(user_id: int, language: str, change) -> None:
+    """
+    Bump the version; once the transaction commits, patch this process's
+    automaton if it was current.
+    """
+    version = cache_versions.bump_version(_version_key(user_id, language))
+
+    def patch():
+        matcher = _local_matchers.get((user_id, language))
+        if matcher is not None and matcher.version == version - 1:
+            change(matcher)
+            matcher.version = version
+
+    transaction.on_commit(patch)
+
+
+def phrase_added(user_id: int, language: str, phrase_id: int, text: str) -> None:
+    _apply_change(user_id, language, lambda matcher: matcher.add(phrase_id, phrase_words(text)))
+
+
+def phrase_removed(user_id: int, language: str, phrase_id: int) -> None:
+    _apply_change(user_id, language, lambda matcher: matcher.remove(phrase_id))
+
+
+def invalidate_phrase_matcher(user_id: int, language: str) -> None:
+    """
+    Force a rebuild after phrases were removed in bulk (lesson deleted or re-tokenized).
+    Call it inside the transaction that removes them.
+    """
+    cache_versions.bump_version(_version_key(user_id, language))
+
+
+def match_saved_phrases(user, language: str, tokens: Iterable[Dict]) -> List[Dict]:
+    """
+    Occurrences of the user's saved phrases in a token stream.
+
+    Args:
+        tokens: Dicts with normalized, start_offset, end_offset, in text order
+            and an optional is_word flag, or Token objects
+
+    Returns:
+        [{start_offset, end_offset, phrase_ids}] in text order
+    """
+    matcher = get_phrase_matcher(user, language)
+    if not len(matcher):
+        return []
+    spans = []
+    words = []
+    for token in tokens:
+        if isinstance(token, dict):
+            normalized, start, end = token['normalized'], token['start_offset'], token['end_offset']
+            is_word = token.get('is_word', True)
+        else:
+            normalized, start, end = token.lexeme.normalized, token.start_offset, token.end_offset
+            is_word = True
+        if not is_word or not normalized or not _WORD_PATTERN.search(normalized):
+            # Punctuation is skipped rather than breaking a match
+            continue
+        spans.append((start, end))
+        words.append(normalized)
+    matches = [
+        {'start_offset': spans[first][0], 'end_offset': spans[last][1], 'phrase_ids': sorted(phrase_ids)}
+        for first, last, phrase_ids in matcher.find(words)
+    ]
+    matches.sort(key=lambda match: (match['start_offset'], match['end_offset']))
+    return matches
+
+
+def clear_local_matchers() -> None:
+    """Drop all in-process automata (tests)."""
+    with _local_lock:
+        _local_matchers.clear()
@@ -0,0 +1,81 @@
+"""
+Background sentence translation prefetch.
+
+With SENTENCE_TRANSLATION_PREFETCH enabled, creating a lesson (or changing
+its text) schedules a job that translates its first sentences with batched
+DeepL requests (Lesson.translate_sentences) and stores them in the lesson's
+sentence translations. The first click in a sentence then finds its
+translation already stored instead of waiting on DeepL.
+
+Jobs run after the creating transaction commits, on a small thread pool in
+the web process, so there is no extra infrastructure to deploy. A job that
+fails only logs; clicks still translate lazily. Only the first
+SENTENCE_TRANSLATION_PREFETCH_LIMIT sentences are prefetched so uploading a
+whole book doesn't spend the DeepL quota on chapters nobody has opened.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+# Concurrent prefetch jobs per process
+MAX_WORKERS = 2
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'SENTENCE_TRANSLATION_PREFETCH', False)
+
+
+def _prefetch_limit() -> int:
+    return getattr(settings, 'SENTENCE_TRANSLATION_PREFETCH_LIMIT', 200)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='sentence-prefetch')
+    return _executor
+
+
+def prefetch_lesson_sentences(lesson_id: int) -> int:
+    """
+    Translate a lesson's first untranslated sentences.
+
+    Returns:
+        Number of sentences translated (0 if the lesson is gone or nothing was translated)
+    """
+    from .models import Lesson
+
+    lesson = Lesson.objects.defer('packed_tokens').filter(lesson_id=lesson_id).first()
+    if lesson is None:
+        return 0
+    translated = lesson.translate_sentences(limit=_prefetch_limit())
+    print(f"[sentence_prefetch] Translated {translated} sentences for lesson {lesson_id}")
+    return translated
+
+
+def _run(lesson_id: int) -> None:
+    close_old_connections()
+    try:
+        prefetch_lesson_sentences(lesson_id)
+    except Exception as e:
+        print(f"[sentence_prefetch] Warning: prefetch failed for lesson {lesson_id}: {e}")
+    finally:
+        # Worker threads own their connection; don't leave it open between jobs
+        connection.close()
+
+
+def schedule_sentence_prefetch(lesson) -> None:
+    """Queue a prefetch for a lesson once the current transaction commits (no-op when disabled)."""
+    if not is_enabled():
+        return
+    lesson_id = lesson.lesson_id
+    transaction.on_commit(lambda: _get_executor().submit(_run, lesson_id))
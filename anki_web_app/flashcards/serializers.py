@@ -1,7 +1,8 @@
 from rest_framework import serializers
-from django.db import connection
+from django.db import connection, transaction
 from django.db.utils import OperationalError, ProgrammingError
-from .models import Sentence, Review, Card, CardReview, Lesson, Token, Phrase, TokenStatus
+from .models import Sentence, Review, Card, CardReview, Lesson, Token, Phrase, UserVocabulary
+from .known_words import get_known_word_set
 
 
 class SentenceSerializer(serializers.ModelSerializer):
@@ -334,6 +335,7 @@ class LessonSerializer(serializers.ModelSerializer):
     listening_time_formatted = serializers.SerializerMethodField()
     progress_percentage = serializers.SerializerMethodField()
     reading_time_formatted = serializers.SerializerMethodField()
+    coverage = serializers.SerializerMethodField()
     
     class Meta:
         model = Lesson
@@ -342,15 +344,17 @@ class LessonSerializer(serializers.ModelSerializer):
             'source_type', 'source_url', 'created_at', 'token_count',
             'total_listening_time_seconds', 'last_listened_at', 'listening_time_formatted',
             'status', 'words_read', 'reading_time_seconds', 'last_read_at', 'completed_at',
-            'progress_percentage', 'reading_time_formatted'
+            'progress_percentage', 'reading_time_formatted', 'parent_lesson', 'chapter_number',
+            'coverage'
         ]
         read_only_fields = [
             'lesson_id', 'created_at', 'total_listening_time_seconds', 'last_listened_at',
-            'progress_percentage', 'reading_time_formatted'
+            'progress_percentage', 'reading_time_formatted', 'parent_lesson', 'chapter_number',
+            'coverage'
         ]
     
     def get_token_count(self, obj):
-        return obj.tokens.count()
+        return obj.count_tokens()
     
     def get_listening_time_formatted(self, obj):
         """Format listening time as MM:SS or HH:MM:SS."""
@@ -362,6 +366,17 @@ class LessonSerializer(serializers.ModelSerializer):
             return f"{hours}:{minutes:02d}:{secs:02d}"
         return f"{minutes}:{secs:02d}"
     
+    def get_coverage(self, obj):
+        """Known-word coverage, when annotated by the lesson list (see LessonListCreateAPIView)."""
+        if getattr(obj, 'coverage_unique_words', None) is None:
+            return None
+        return {
+            'unique_words': obj.coverage_unique_words,
+            'unknown_words': obj.coverage_unknown_words,
+            'total_words': obj.coverage_total_words,
+            'known_percentage': obj.coverage_known_percentage,
+        }
+    
     def get_progress_percentage(self, obj):
         """Calculate reading progress as a percentage."""
         return obj.get_progress_percentage()
@@ -378,6 +393,8 @@ class LessonSerializer(serializers.ModelSerializer):
 
 
 class TokenSerializer(serializers.ModelSerializer):
+    normalized = serializers.CharField(source='lexeme.normalized', read_only=True)
+    lemma = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
     dictionary_entry = serializers.SerializerMethodField()
     
@@ -385,9 +402,13 @@ class TokenSerializer(serializers.ModelSerializer):
         model = Token
         fields = [
             'token_id', 'text', 'normalized', 'lemma', 'start_offset', 'end_offset',
-            'translation', 'dictionary_entry', 'clicked_count', 'added_to_flashcards', 'card_id', 'status'
+            'translation', 'dictionary_entry', 'clicked_count', 'added_to_flashcards', 'card_id', 'status',
+            'vocabulary_key'
         ]
-        read_only_fields = ['token_id', 'clicked_count', 'added_to_flashcards', 'card_id', 'status']
+        read_only_fields = ['token_id', 'clicked_count', 'added_to_flashcards', 'card_id', 'status', 'vocabulary_key']
+    
+    def get_lemma(self, obj):
+        return obj.lexeme.lemma or None
     
     def get_dictionary_entry(self, obj):
         """Only return dictionary_entry if it has meaningful data."""
@@ -396,16 +417,23 @@ class TokenSerializer(serializers.ModelSerializer):
         return None
     
     def get_status(self, obj):
-        """Get the known/unknown status for the current user."""
+        """Get the known/unknown status of the token's word for the current user."""
+        if hasattr(obj, 'vocabulary_status'):
+            # Resolved in bulk by the lesson query (see LessonDetailSerializer.get_tokens)
+            return obj.vocabulary_status
         request = self.context.get('request')
         if request and request.user and request.user.is_authenticated:
             try:
-                token_status = TokenStatus.objects.get(user=request.user, token=obj)
-                return token_status.status
-            except TokenStatus.DoesNotExist:
+                entry = UserVocabulary.objects.get(
+                    user=request.user,
+                    language=obj.lesson.language,
+                    key=obj.vocabulary_key,
+                )
+                return entry.status
+            except UserVocabulary.DoesNotExist:
                 return None
             except (OperationalError, ProgrammingError):
-                # Handle case where TokenStatus table doesn't exist yet (migration not run)
+                # Handle case where UserVocabulary table doesn't exist yet (migration not run)
                 # OperationalError: table doesn't exist
                 # ProgrammingError: column doesn't exist
                 return None
@@ -440,11 +468,71 @@ class PhraseSerializer(serializers.ModelSerializer):
 
 
 class LessonDetailSerializer(LessonSerializer):
-    tokens = TokenSerializer(many=True, read_only=True)
+    tokens = serializers.SerializerMethodField()
     phrases = PhraseSerializer(many=True, read_only=True)
     
     class Meta(LessonSerializer.Meta):
         fields = LessonSerializer.Meta.fields + ['tokens', 'phrases']
+    
+    def to_representation(self, instance):
+        """Adds saved_phrase_matches: occurrences of the user's saved phrases from any lesson."""
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        data['saved_phrase_matches'] = []
+        if request and request.user and request.user.is_authenticated:
+            from .phrase_matcher import match_saved_phrases
+            data['saved_phrase_matches'] = match_saved_phrases(request.user, instance.language, data['tokens'])
+        return data
+    
+    def get_tokens(self, obj):
+        """Tokens with the user's vocabulary status resolved from the in-memory status set."""
+        status_of = None
+        request = self.context.get('request')
+        if request and request.user and request.user.is_authenticated:
+            status_of = get_known_word_set(request.user, obj.language).status_of
+        if obj.packed_token_count is not None:
+            return self._get_packed_tokens(obj, status_of)
+        
+        tokens = list(obj.tokens.select_related('lexeme'))
+        if status_of:
+            for token in tokens:
+                token.vocabulary_status = status_of(token.vocabulary_key)
+        return TokenSerializer(tokens, many=True, context=self.context).data
+    
+    def _get_packed_tokens(self, obj, status_of):
+        """
+        Tokens of a packed lesson in TokenSerializer's shape, plus their index.
+        Tokens without a row yet have token_id None; the reader materializes them on click.
+        """
+        from .packed_tokens import iter_packed_tokens
+        
+        materialized = {token.start_offset: token for token in obj.tokens.select_related('lexeme')}
+        data = []
+        for token in iter_packed_tokens(obj):
+            status = status_of(token['vocabulary_key']) if status_of else None
+            row = materialized.get(token['start_offset'])
+            if row is not None:
+                row.vocabulary_status = status
+                item = dict(TokenSerializer(row, context=self.context).data)
+            else:
+                item = {
+                    'token_id': None,
+                    'text': token['text'],
+                    'normalized': token['normalized'],
+                    'lemma': token['lemma'],
+                    'start_offset': token['start_offset'],
+                    'end_offset': token['end_offset'],
+                    'translation': None,
+                    'dictionary_entry': None,
+                    'clicked_count': 0,
+                    'added_to_flashcards': False,
+                    'card_id': None,
+                    'status': status,
+                    'vocabulary_key': token['vocabulary_key'],
+                }
+            item['index'] = token['index']
+            data.append(item)
+        return data
 
 
 class LessonCreateSerializer(serializers.ModelSerializer):
@@ -455,41 +543,29 @@ class LessonCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        lesson = Lesson.objects.create(**validated_data)
+        lesson = Lesson(**validated_data)
+        lesson.rebuild_sentence_index()
+        lesson.save()
         
-        # Tokenize the text
-        token_count = 0
+        # Tokenize the text and insert tokens in batches
         try:
-            from .tokenization import tokenize_text
-            tokens_data = tokenize_text(lesson.text, language=lesson.language)
+            from .tokenization_cache import tokenize_text_cached
+            from .ingestion import bulk_insert_tokens
+            token_count = bulk_insert_tokens(lesson, tokenize_text_cached(lesson.text, lesson.language))
             
-            if not tokens_data:
+            if not token_count:
                 print(f"[LessonCreateSerializer] Warning: No tokens generated for lesson {lesson.lesson_id}")
             else:
-                print(f"[LessonCreateSerializer] Generated {len(tokens_data)} tokens for lesson {lesson.lesson_id}")
-            
-            for token_data in tokens_data:
-                try:
-                    # Remove 'type' field as Token model doesn't have it
-                    token_data_clean = {k: v for k, v in token_data.items() if k != 'type'}
-                    Token.objects.create(
-                        lesson=lesson,
-                        **token_data_clean
-                    )
-                    token_count += 1
-                except Exception as e:
-                    print(f"[LessonCreateSerializer] Error creating token: {e}")
-                    print(f"[LessonCreateSerializer] Token data: {token_data}")
-                    import traceback
-                    traceback.print_exc()
-                    # Continue with other tokens even if one fails
-                    continue
+                print(f"[LessonCreateSerializer] Generated {token_count} tokens for lesson {lesson.lesson_id}")
         except Exception as e:
             print(f"[LessonCreateSerializer] Error during tokenization: {e}")
             import traceback
             traceback.print_exc()
             # Still return the lesson even if tokenization fails
         
+        from .sentence_prefetch import schedule_sentence_prefetch
+        schedule_sentence_prefetch(lesson)
+        
         # Refresh lesson to get updated token count
         lesson.refresh_from_db()
         return lesson
@@ -497,7 +573,7 @@ class LessonCreateSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """Add token_count to the response"""
         data = super().to_representation(instance)
-        data['token_count'] = instance.tokens.count()
+        data['token_count'] = instance.count_tokens()
         return data
 
 
@@ -513,45 +589,44 @@ class LessonUpdateSerializer(serializers.ModelSerializer):
         # Update lesson fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        if text_changed:
+            instance.rebuild_sentence_index()
         instance.save()
         
         # If text changed, re-tokenize
         if text_changed:
-            # Delete existing tokens
-            instance.tokens.all().delete()
+            # Sentence indexes shift with the text, so cached sentence translations are stale
+            instance.clear_sentence_translations()
+            
+            # Delete existing tokens (and the coverage/frequencies computed from them)
+            from .coverage import invalidate_lesson_coverage
+            from .lemma_frequency import remove_lesson_frequencies
+            from .phrase_matcher import invalidate_phrase_matcher
+            with transaction.atomic():
+                remove_lesson_frequencies(instance)
+                instance.tokens.all().delete()
+                invalidate_lesson_coverage(instance)
+                # Phrases go with their tokens
+                invalidate_phrase_matcher(instance.user_id, instance.language)
             
-            # Tokenize the new text
-            token_count = 0
+            # Tokenize the new text and insert tokens in batches
             try:
-                from .tokenization import tokenize_text
-                tokens_data = tokenize_text(instance.text, language=instance.language)
+                from .tokenization_cache import tokenize_text_cached
+                from .ingestion import bulk_insert_tokens
+                token_count = bulk_insert_tokens(instance, tokenize_text_cached(instance.text, instance.language))
                 
-                if not tokens_data:
+                if not token_count:
                     print(f"[LessonUpdateSerializer] Warning: No tokens generated for lesson {instance.lesson_id}")
                 else:
-                    print(f"[LessonUpdateSerializer] Generated {len(tokens_data)} tokens for lesson {instance.lesson_id}")
-                
-                for token_data in tokens_data:
-                    try:
-                        # Remove 'type' field as Token model doesn't have it
-                        token_data_clean = {k: v for k, v in token_data.items() if k != 'type'}
-                        Token.objects.create(
-                            lesson=instance,
-                            **token_data_clean
-                        )
-                        token_count += 1
-                    except Exception as e:
-                        print(f"[LessonUpdateSerializer] Error creating token: {e}")
-                        print(f"[LessonUpdateSerializer] Token data: {token_data}")
-                        import traceback
-                        traceback.print_exc()
-                        # Continue with other tokens even if one fails
-                        continue
+                    print(f"[LessonUpdateSerializer] Generated {token_count} tokens for lesson {instance.lesson_id}")
             except Exception as e:
                 print(f"[LessonUpdateSerializer] Error during tokenization: {e}")
                 import traceback
                 traceback.print_exc()
                 # Still return the lesson even if tokenization fails
+            
+            from .sentence_prefetch import schedule_sentence_prefetch
+            schedule_sentence_prefetch(instance)
         
         # Refresh lesson to get updated token count
         instance.refresh_from_db()
@@ -560,14 +635,50 @@ class LessonUpdateSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """Add token_count to the response"""
         data = super().to_representation(instance)
-        data['token_count'] = instance.tokens.count()
+        data['token_count'] = instance.count_tokens()
         return data
 
 
+class LessonUploadSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="Plain text file (UTF-8)")
+    title = serializers.CharField(max_length=400)
+    language = serializers.CharField(max_length=10, default='de')
+    split_chapters = serializers.BooleanField(default=False, help_text="Create one lesson per chapter heading")
+
+
+class BulkTokenStatusSerializer(serializers.Serializer):
+    MAX_ITEMS = 5000
+    
+    token_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    words = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    lesson_id = serializers.IntegerField(required=False, allow_null=True, default=None)
+    only_unmarked = serializers.BooleanField(default=False, help_text="Skip words that already have a status")
+    
+    def validate(self, attrs):
+        if len(attrs['token_ids']) + len(attrs['words']) > self.MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {self.MAX_ITEMS} items per request")
+        if not (attrs['token_ids'] or attrs['words'] or attrs['lesson_id']):
+            raise serializers.ValidationError("token_ids, words or lesson_id is required")
+        if attrs['words'] and not attrs['lesson_id']:
+            raise serializers.ValidationError("lesson_id is required with words")
+        return attrs
+
+
 class TranslateRequestSerializer(serializers.Serializer):
-    text = serializers.CharField()
+    MAX_TEXTS = 500
+    
+    text = serializers.CharField(required=False)
+    texts = serializers.ListField(
+        child=serializers.CharField(), required=False, allow_empty=False, max_length=MAX_TEXTS,
+        help_text="Several texts translated in batched requests"
+    )
     source_lang = serializers.CharField(default='es')
     target_lang = serializers.CharField(default='en')
+    
+    def validate(self, attrs):
+        if ('text' in attrs) == ('texts' in attrs):
+            raise serializers.ValidationError("Provide either text or texts")
+        return attrs
 
 
 class CreatePhraseSerializer(serializers.Serializer):
@@ -585,7 +696,7 @@ class AddToFlashcardsSerializer(serializers.Serializer):
     token_id = serializers.IntegerField(required=False)
     phrase_id = serializers.IntegerField(required=False)
     front = serializers.CharField()  # Word/phrase in source language
-    back = serializers.CharField()  # Translation
+    back = serializers.CharField(required=False, allow_blank=True, default='')  # Translation (glossary used when blank)
     sentence_context = serializers.CharField(required=False, allow_blank=True)
     lesson_id = serializers.IntegerField()
     
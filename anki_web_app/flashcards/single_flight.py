@@ -0,0 +1,135 @@
+"""
+Single-flight coalescing of identical outbound lookups.
+
+Double clicks, several tabs and prefetches racing a click can all miss the
+cache for the same word at the same moment. run() makes sure only one of them
+calls the external service:
+
+- Within a process, the first caller for a key becomes the leader and the
+  others wait on its Future (the in-flight map).
+- Across workers, the leader also takes a short lock with cache.add. A leader
+  that finds the lock held polls the caller's lookup (the translation memory
+  or dictionary cache) until the other worker's result lands, and only calls
+  the service itself if the wait times out or the lock is released without a
+  result.
+
+With a per-process cache backend (LocMemCache) only the in-process part
+applies; a shared backend (Redis/Memcached) coalesces across workers too.
+Waits never outlast the caller's deadline budget (deadline.py).
+"""
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional, TypeVar
+
+from django.core.cache import cache
+
+from . import deadline
+
+T = TypeVar('T')
+
+# Seconds a cross-worker lock lives if its holder dies
+LOCK_TIMEOUT = 30
+# Seconds a caller waits for another caller's result before calling the service itself
+WAIT_TIMEOUT = 5.0
+POLL_INTERVAL = 0.05
+
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+_stats = {'leaders': 0, 'followers': 0, 'remote_waits': 0}
+
+
+def _count(name: str) -> None:
+    with _in_flight_lock:
+        _stats[name] += 1
+
+
+def _run_locked(key: str, compute: Callable[[], T], lookup: Optional[Callable[[], Optional[T]]], wait_timeout: float) -> T:
+    """Call compute under the cross-worker lock, or pick up another worker's result."""
+    lock_key = f"single_flight:{key}"
+    deadline = time.monotonic() + wait_timeout
+    waited = False
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        if not waited:
+            _count('remote_waits')
+            waited = True
+        if lookup is not None:
+            value = lookup()
+            if value is not None:
+                return value
+        if time.monotonic() >= deadline:
+            # The other worker is slow or gone; don't hold this request hostage
+            return compute()
+        time.sleep(POLL_INTERVAL)
+    try:
+        if waited and lookup is not None:
+            value = lookup()
+            if value is not None:
+                return value
+        return compute()
+    finally:
+        cache.delete(lock_key)
+
+
+def run(
+    key: str,
+    compute: Callable[[], T],
+    lookup: Optional[Callable[[], Optional[T]]] = None,
+    wait_timeout: float = WAIT_TIMEOUT,
+) -> T:
+    """
+    Call compute once for all concurrent callers with the same key.
+
+    Args:
+        key: Identity of the lookup (keep it short; it becomes a cache key)
+        compute: Calls the external service (and stores its result)
+        lookup: Reads the stored result; used while another worker holds the lock
+        wait_timeout: Seconds to wait for another caller before calling compute anyway
+            (capped by the current deadline budget)
+
+    Returns:
+        compute's result, or the leader's when this caller waited on it
+        (exceptions raised by the leader are re-raised to its followers)
+    """
+    remaining = deadline.remaining()
+    if remaining is not None:
+        wait_timeout = min(wait_timeout, remaining)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+            _stats['leaders'] += 1
+        else:
+            _stats['followers'] += 1
+
+    if not leader:
+        try:
+            return future.result(timeout=wait_timeout)
+        except FutureTimeoutError:
+            return compute()
+
+    try:
+        result = _run_locked(key, compute, lookup, wait_timeout)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+
+def stats() -> Dict[str, int]:
+    """This process's counters: leaders (service calls started), followers (coalesced), remote_waits."""
+    with _in_flight_lock:
+        return dict(_stats, in_flight=len(_in_flight))
+
+
+def reset_stats() -> None:
+    with _in_flight_lock:
+        for name in _stats:
+            _stats[name] = 0
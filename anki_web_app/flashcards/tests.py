@@ -1535,6 +1535,30 @@ class CardAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Card.objects.count(), 2)  # Only forward cards
 
+    def test_import_cards_translate_missing_backs(self):
+        """Test empty backs are filled from one batched translation of their fronts."""
+        from unittest.mock import patch
+        csv_content = "front,back\nhola,\nadiós,goodbye\ngracias,\nhola,"
+        csv_file = BytesIO(csv_content.encode('utf-8'))
+        csv_file.name = 'test.csv'
+
+        form_data = {
+            'file': csv_file,
+            'front_column': 'front',
+            'back_column': 'back',
+            'language': 'es',
+            'create_reverse': 'false',
+            'translate_missing': 'true',
+        }
+
+        with patch('flashcards.translation_service.translate_many', return_value=['hello', 'thanks']) as mock_translate:
+            response = self.client.post(self.card_import_url, form_data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_translate.assert_called_once_with(['hola', 'gracias'], 'es', 'en')
+        self.assertEqual(Card.objects.filter(front='hola', back='hello').count(), 2)
+        self.assertTrue(Card.objects.filter(front='gracias', back='thanks').exists())
+        self.assertTrue(Card.objects.filter(front='adiós', back='goodbye').exists())
+
     def test_import_cards_missing_columns(self):
         """Test import fails when required columns are missing."""
         csv_content = "front,back\nhola,hello"
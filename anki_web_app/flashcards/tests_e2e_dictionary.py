@@ -9,6 +9,7 @@ from rest_framework.test import APIClient
 import json
 
 from flashcards.models import Lesson, Token
+from flashcards.tests_reader import _lexeme
 from flashcards.dictionary_service import get_dictionary_entry
 
 User = get_user_model()
@@ -39,7 +40,7 @@ class DictionaryE2ETests(TestCase):
         self.token1 = Token.objects.create(
             lesson=self.lesson,
             text='vorgeschlagen',
-            normalized='vorgeschlagen',
+            lexeme=_lexeme(self.lesson, 'vorgeschlagen'),
             start_offset=35,
             end_offset=48
         )
@@ -117,7 +118,7 @@ class DictionaryE2ETests(TestCase):
         token2 = Token.objects.create(
             lesson=self.lesson,
             text='nonexistentword12345',
-            normalized='nonexistentword12345',
+            lexeme=_lexeme(self.lesson, 'nonexistentword12345'),
             start_offset=0,
             end_offset=20
         )
@@ -10,13 +10,16 @@ Tests cover:
 - Add to flashcards integration
 """
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from unittest.mock import patch, MagicMock
-from flashcards.models import Lesson, Token, Phrase, Card, TokenStatus
+from flashcards.models import Lesson, Lexeme, Token, Phrase, Card, UserVocabulary
+from flashcards import known_words, phrase_matcher
+from flashcards.lexemes import assign_lexemes, intern_lexemes
 from flashcards.tokenization import normalize_token
 from flashcards.tokenization import tokenize_text, normalize_token
 from flashcards.translation_service import translate_text, get_word_translation
@@ -36,6 +39,12 @@ except ImportError:
 User = get_user_model()
 
 
+def _lexeme(lesson, normalized, lemma=None):
+    """Interned lexeme of a word form in the lesson's language (every token needs one)."""
+    form = (normalized, lemma or '')
+    return Lexeme.objects.get(lexeme_id=intern_lexemes(lesson.language, [form])[form])
+
+
 class TokenizationTests(TestCase):
     """Test tokenization utility functions."""
 
@@ -175,6 +184,154 @@ class TokenizationTests(TestCase):
             # If not, they'll be None (which is fine)
 
 
+    def test_split_sentences_handles_terminators_and_quotes(self):
+        """Test sentence splitting on ?, !, … and closing quotes."""
+        from flashcards.tokenization import split_sentences
+        text = 'Wie geht es? „Gut!“ Er wartet… Das ist z.B. ein Test.'
+        sentences = [text[start:end] for start, end in split_sentences(text)]
+        self.assertEqual(sentences, ['Wie geht es?', '„Gut!“', 'Er wartet…', 'Das ist z.B. ein Test.'])
+
+    def test_find_sentence_span(self):
+        """Test binary search over packed sentence spans."""
+        from flashcards.tokenization import split_sentences, pack_sentence_spans, unpack_sentence_spans, find_sentence_span
+        text = 'Hallo Welt. Das ist ein Test.'
+        packed = unpack_sentence_spans(pack_sentence_spans(split_sentences(text)))
+        self.assertEqual(find_sentence_span(packed, 0), (0, 0, 11))
+        self.assertEqual(find_sentence_span(packed, 16), (1, 12, 29))
+        self.assertIsNone(find_sentence_span(unpack_sentence_spans(b''), 0))
+
+
+    def test_iter_tokenize_chunks_matches_tokenize_text(self):
+        """Test streaming tokenization carries offsets and split words across chunk boundaries."""
+        from flashcards.tokenization import iter_tokenize_chunks
+        text = "Über die Brücke, „gesehen“... Árbol ñandú!"
+        expected = tokenize_text(text)
+        for size in (1, 3, 7):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            self.assertEqual(list(iter_tokenize_chunks(chunks)), expected)
+
+
+class SpacyPreloadTests(APITestCase):
+    """Test spaCy model preloading and the health endpoint."""
+
+    @patch('flashcards.tokenization.get_spacy_model')
+    def test_preload_spacy_models_warms_up(self, mock_get_model):
+        """Test preloading loads each language and runs the warm-up sample."""
+        mock_nlp = MagicMock()
+        mock_get_model.side_effect = lambda language: mock_nlp if language == 'de' else None
+
+        from flashcards.tokenization import preload_spacy_models
+        ready = preload_spacy_models(['de', 'xx'], warm_up=True)
+
+        self.assertEqual(ready, {'de': True, 'xx': False})
+        mock_nlp.assert_called_once()
+
+    @patch('flashcards.tokenization.get_spacy_model')
+    def test_preload_spacy_models_without_warm_up(self, mock_get_model):
+        """Test preloading without warm-up does not run the pipeline."""
+        mock_nlp = MagicMock()
+        mock_get_model.return_value = mock_nlp
+
+        from flashcards.tokenization import preload_spacy_models
+        preload_spacy_models(['de'])
+
+        mock_nlp.assert_not_called()
+
+    def test_get_spacy_model_status_reports_load_time(self):
+        """Test model status reports loaded models and their load time."""
+        from flashcards.tokenization import get_spacy_model_status, _spacy_models, _spacy_model_load_times
+        with patch.dict(_spacy_models, {'de_core_news_sm': MagicMock()}), \
+                patch.dict(_spacy_model_load_times, {'de_core_news_sm': 1.23456}):
+            report = get_spacy_model_status(['de'])
+
+        self.assertTrue(report['de']['loaded'])
+        self.assertEqual(report['de']['model'], 'de_core_news_sm')
+        self.assertEqual(report['de']['load_time_seconds'], 1.235)
+
+    def test_health_endpoint_is_public(self):
+        """Test the health endpoint works without authentication."""
+        from flashcards.tokenization import _spacy_models
+        with self.settings(SPACY_PRELOAD_LANGUAGES=['de']), \
+                patch.dict(_spacy_models, {'de_core_news_sm': MagicMock()}):
+            response = self.client.get('/api/flashcards/health/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'ok')
+        self.assertTrue(response.data['models_ready'])
+        self.assertIn('de', response.data['models'])
+
+
+class LemmaTableTests(TestCase):
+    """Test the lookup-table lemmatizer backend and its spaCy fallback."""
+
+    def setUp(self):
+        import os
+        import tempfile
+        from flashcards.lemma_table import write_lemma_table
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'lemmas.sqlite3')
+        write_lemma_table(self.path, [
+            ('de', 'häuser', 'haus', 0),
+            ('de', 'sein', 'sein', 1),
+        ])
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_merge_lemma_sources_flags_ambiguous_forms(self):
+        """Test forms with conflicting lemmas are marked ambiguous."""
+        from collections import Counter
+        from flashcards.lemma_table import merge_lemma_sources
+        corpus = {
+            ('de', 'sein'): Counter({'sein': 5, 'sei': 1}),
+            ('de', 'ging'): Counter({'gehen': 3}),
+            ('de', 'hunde'): Counter({'hund': 2}),
+        }
+        lookup = [('de', 'ging', 'gehen'), ('de', 'hunde', 'hunden'), ('de', 'katzen', 'katze')]
+
+        rows = {(row[0], row[1]): (row[2], row[3]) for row in merge_lemma_sources(corpus, lookup)}
+
+        self.assertEqual(rows[('de', 'sein')], ('sein', 1))
+        self.assertEqual(rows[('de', 'ging')], ('gehen', 0))
+        self.assertEqual(rows[('de', 'hunde')], ('hund', 1))
+        self.assertEqual(rows[('de', 'katzen')], ('katze', 0))
+
+    @patch('flashcards.tokenization.spacy_lemmatize')
+    def test_lookup_backend_skips_spacy_on_hit(self, mock_spacy):
+        """Test a table hit is returned without calling spaCy."""
+        from flashcards.tokenization import lemmatize_token
+        with self.settings(LEMMATIZER_BACKEND='lookup', LEMMA_TABLE_PATH=self.path):
+            lemma = lemmatize_token('Häuser', 'de')
+
+        self.assertEqual(lemma, 'haus')
+        mock_spacy.assert_not_called()
+
+    @patch('flashcards.tokenization.spacy_lemmatize', return_value='spacy-lemma')
+    def test_lookup_backend_falls_back_for_unknown_and_ambiguous(self, mock_spacy):
+        """Test unknown or ambiguous forms fall back to spaCy."""
+        from flashcards.tokenization import lemmatize_token
+        with self.settings(LEMMATIZER_BACKEND='lookup', LEMMA_TABLE_PATH=self.path):
+            self.assertEqual(lemmatize_token('Sein', 'de'), 'spacy-lemma')
+            self.assertEqual(lemmatize_token('Baum', 'de'), 'spacy-lemma')
+            self.assertEqual(lemmatize_token('Häuser', 'es'), 'spacy-lemma')
+
+        self.assertEqual(mock_spacy.call_count, 3)
+
+    @patch('flashcards.tokenization.spacy_lemmatize', return_value='spacy-lemma')
+    def test_spacy_backend_ignores_table(self, mock_spacy):
+        """Test the default backend always uses spaCy."""
+        from flashcards.tokenization import lemmatize_token
+        with self.settings(LEMMATIZER_BACKEND='spacy', LEMMA_TABLE_PATH=self.path):
+            self.assertEqual(lemmatize_token('Häuser', 'de'), 'spacy-lemma')
+
+    def test_missing_table_falls_back_to_spacy(self):
+        """Test a missing table file disables lookups."""
+        from flashcards.tokenization import lookup_lemma
+        with self.settings(LEMMA_TABLE_PATH=self.path + '.missing'):
+            self.assertIsNone(lookup_lemma('Häuser', 'de'))
+
+
 class LessonModelTests(TestCase):
     """Test Lesson model."""
 
@@ -241,13 +398,13 @@ class TokenModelTests(TestCase):
         token = Token.objects.create(
             lesson=self.lesson,
             text="Hallo",
-            normalized="hallo",
+            lexeme=_lexeme(self.lesson, "hallo"),
             start_offset=0,
             end_offset=5
         )
         
         self.assertEqual(token.text, "Hallo")
-        self.assertEqual(token.normalized, "hallo")
+        self.assertEqual(token.lexeme.normalized, "hallo")
         self.assertEqual(token.lesson, self.lesson)
         self.assertEqual(token.clicked_count, 0)
         self.assertFalse(token.added_to_flashcards)
@@ -257,36 +414,35 @@ class TokenModelTests(TestCase):
         token = Token.objects.create(
             lesson=self.lesson,
             text="sah",
-            normalized="sah",
-            lemma="sehen",
+            lexeme=_lexeme(self.lesson, "sah", "sehen"),
             start_offset=0,
             end_offset=3
         )
         
         self.assertEqual(token.text, "sah")
-        self.assertEqual(token.normalized, "sah")
-        self.assertEqual(token.lemma, "sehen")
-        self.assertIsNotNone(token.lemma)
+        self.assertEqual(token.lexeme.normalized, "sah")
+        self.assertEqual(token.lexeme.lemma, "sehen")
+        self.assertEqual(token.vocabulary_key, "sehen")
 
     def test_token_lemma_can_be_none(self):
-        """Test that token lemma can be None."""
+        """Test that a token's word form can have no lemma."""
         token = Token.objects.create(
             lesson=self.lesson,
             text="Hallo",
-            normalized="hallo",
-            lemma=None,
+            lexeme=_lexeme(self.lesson, "hallo"),
             start_offset=0,
             end_offset=5
         )
         
-        self.assertIsNone(token.lemma)
+        self.assertEqual(token.lexeme.lemma, '')
+        self.assertEqual(token.vocabulary_key, 'hallo')
 
     def test_token_clicked_count(self):
         """Test incrementing clicked count."""
         token = Token.objects.create(
             lesson=self.lesson,
             text="Hallo",
-            normalized="hallo",
+            lexeme=_lexeme(self.lesson, "hallo"),
             start_offset=0,
             end_offset=5
         )
@@ -363,15 +519,11 @@ class LessonAPITests(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         lesson = Lesson.objects.first()
-        tokens = lesson.tokens.all()
+        tokens = lesson.tokens.select_related('lexeme')
         
-        # All tokens should have lemma field (may be None if spaCy not available)
+        # All tokens should have a lemma on their lexeme (empty if spaCy not available)
         for token in tokens:
-            # Check that lemma field exists in database
-            self.assertTrue(hasattr(token, 'lemma'))
-            # Lemma can be None or a string
-            if token.lemma is not None:
-                self.assertIsInstance(token.lemma, str)
+            self.assertIsInstance(token.lexeme.lemma, str)
 
     def test_list_lessons(self):
         """Test listing lessons."""
@@ -411,7 +563,7 @@ class LessonAPITests(APITestCase):
         Token.objects.create(
             lesson=lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
@@ -458,6 +610,208 @@ class LessonAPITests(APITestCase):
         self.assertEqual(lessons[0]['title'], 'My Lesson')
 
 
+class StreamingIngestionTests(APITestCase):
+    """Test chunked lesson ingestion for book-length texts."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.book = (
+            "Kapitel 1\nDer Hund sah die Katze. Sie lief weg.\n\n"
+            "Kapitel 2\nAm nächsten Tag kam sie zurück.\n"
+        )
+
+    def test_ingest_text_stream_offsets_match_text(self):
+        """Test token offsets point into the stored lesson text."""
+        from flashcards.ingestion import ingest_text_stream
+        chunks = [self.book[i:i + 5] for i in range(0, len(self.book), 5)]
+        lessons = ingest_text_stream(self.user, chunks, title='Buch', language='de')
+
+        self.assertEqual(len(lessons), 1)
+        lesson = lessons[0]
+        self.assertEqual(lesson.text, self.book)
+        self.assertIsNotNone(lesson.sentence_spans)
+        for token in lesson.tokens.all():
+            self.assertEqual(lesson.text[token.start_offset:token.end_offset], token.text)
+
+    def test_ingest_text_stream_splits_linked_chapters(self):
+        """Test splitting a book into chapter lessons linked to the first chapter."""
+        from flashcards.ingestion import ingest_text_stream
+        lessons = ingest_text_stream(self.user, [self.book], title='Buch', language='de', split_chapters=True)
+
+        self.assertEqual(len(lessons), 2)
+        first, second = lessons
+        self.assertEqual(first.title, 'Buch - Kapitel 1')
+        self.assertEqual(first.chapter_number, 1)
+        self.assertIsNone(first.parent_lesson)
+        self.assertEqual(second.chapter_number, 2)
+        self.assertEqual(second.parent_lesson, first)
+        self.assertTrue(second.text.startswith('Kapitel 2'))
+        self.assertEqual(''.join(lesson.text for lesson in lessons), self.book)
+
+    def test_bulk_insert_tokens_uses_fixed_size_batches(self):
+        """Test tokens are inserted in batches of the requested size."""
+        from flashcards.ingestion import ingest_text_stream
+        with patch('flashcards.ingestion.Token.objects.bulk_create', wraps=Token.objects.bulk_create) as mock_bulk_create:
+            ingest_text_stream(self.user, [self.book], title='Buch', language='de', batch_size=4)
+
+        batch_sizes = [len(call.args[0]) for call in mock_bulk_create.call_args_list]
+        self.assertTrue(all(size == 4 for size in batch_sizes[:-1]))
+        self.assertLessEqual(batch_sizes[-1], 4)
+
+    def test_upload_lesson_file(self):
+        """Test uploading a text file through the API."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile('buch.txt', self.book.encode('utf-8'), content_type='text/plain')
+
+        response = self.client.post('/api/flashcards/reader/lessons/upload/', {
+            'file': upload,
+            'title': 'Buch',
+            'language': 'de',
+            'split_chapters': 'true',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['lessons']), 2)
+        self.assertGreater(response.data['lessons'][0]['token_count'], 0)
+        self.assertEqual(Lesson.objects.filter(user=self.user).count(), 2)
+
+    def test_failed_upload_leaves_no_lessons(self):
+        """Test a failure in a later chapter rolls back the chapters before it."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from flashcards.ingestion import bulk_insert_tokens
+        upload = SimpleUploadedFile('buch.txt', self.book.encode('utf-8'), content_type='text/plain')
+        calls = []
+
+        def fail_second_chapter(lesson, tokens, *args, **kwargs):
+            calls.append(lesson)
+            if len(calls) == 2:
+                raise RuntimeError('tokenizer crashed')
+            return bulk_insert_tokens(lesson, tokens, *args, **kwargs)
+
+        with patch('flashcards.ingestion.bulk_insert_tokens', side_effect=fail_second_chapter):
+            response = self.client.post('/api/flashcards/reader/lessons/upload/', {
+                'file': upload,
+                'title': 'Buch',
+                'language': 'de',
+                'split_chapters': 'true',
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertIn('error', response.data)
+        self.assertFalse(Lesson.objects.filter(user=self.user).exists())
+        self.assertFalse(Token.objects.exists())
+
+    def test_upload_rejects_invalid_encoding(self):
+        """Test a file that is not UTF-8 is rejected, including chapters decoded before the bad bytes."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile('buch.txt', self.book.encode('latin-1'), content_type='text/plain')
+
+        response = self.client.post('/api/flashcards/reader/lessons/upload/', {
+            'file': upload,
+            'title': 'Buch',
+            'language': 'de',
+            'split_chapters': 'true',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('UTF-8', response.data['error'])
+        self.assertFalse(Lesson.objects.filter(user=self.user).exists())
+        self.assertFalse(Token.objects.exists())
+
+
+class TokenizationCacheTests(APITestCase):
+    """Test the content-addressed tokenization cache."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.text = "Die Häuser stehen am Fluss. Ich sah_es!"
+
+    def _fake_lemma(self, text, language='de', backend=None):
+        return f"{text.lower()}-lemma" if text != 'Fluss' else None
+
+    def test_encode_decode_round_trip(self):
+        """Test decoded tokens are identical to the tokenizer output."""
+        from flashcards.tokenization_cache import encode_tokens, decode_tokens
+        with patch('flashcards.tokenization.lemmatize_token', side_effect=self._fake_lemma):
+            tokens = tokenize_text(self.text, 'de')
+
+        self.assertEqual(list(decode_tokens(encode_tokens(tokens), self.text)), tokens)
+
+    def test_identical_text_skips_tokenizer(self):
+        """Test creating a second lesson with the same text reuses cached tokens."""
+        from flashcards.models import TokenizationCache
+        data = {'title': 'Lesson', 'text': self.text, 'language': 'de'}
+        with patch('flashcards.tokenization.lemmatize_token', side_effect=self._fake_lemma) as mock_lemmatize:
+            first = self.client.post('/api/flashcards/reader/lessons/', data, format='json')
+            calls_after_first = mock_lemmatize.call_count
+            second = self.client.post('/api/flashcards/reader/lessons/', data, format='json')
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(calls_after_first, 0)
+        self.assertEqual(mock_lemmatize.call_count, calls_after_first)
+
+        fields = ('text', 'lexeme__normalized', 'lexeme__lemma', 'start_offset', 'end_offset')
+        first_tokens = list(Token.objects.filter(lesson_id=first.data['lesson_id']).values_list(*fields))
+        second_tokens = list(Token.objects.filter(lesson_id=second.data['lesson_id']).values_list(*fields))
+        self.assertEqual(first_tokens, second_tokens)
+
+        entry = TokenizationCache.objects.get()
+        self.assertEqual(entry.hit_count, 1)
+        self.assertEqual(entry.token_count, len(first_tokens))
+
+    def test_stats_command_reports_counted_misses(self):
+        """Test misses are counted when they happen, not inferred from the entry count."""
+        from io import StringIO
+        from django.core.management import call_command
+        from flashcards import cache_counters
+        from flashcards.tokenization_cache import MISS_COUNTER_PREFIX, tokenize_text_cached
+        with patch('flashcards.tokenization.lemmatize_token', side_effect=self._fake_lemma):
+            list(tokenize_text_cached(self.text, 'de'))
+            list(tokenize_text_cached(self.text, 'de'))
+            # A miss whose result was never stored still counts
+            with patch('flashcards.tokenization_cache.store_tokens', side_effect=RuntimeError('disk full')):
+                list(tokenize_text_cached('Ein anderer Text.', 'de'))
+
+        self.assertEqual(cache_counters.counts(MISS_COUNTER_PREFIX), {'de': 2})
+        out = StringIO()
+        call_command('tokenization_cache_stats', stdout=out)
+        self.assertIn('Total: 1 entries', out.getvalue())
+        self.assertIn('1 hits / 2 misses, hit rate 33.3%', out.getvalue())
+
+        call_command('tokenization_cache_stats', '--clear', stdout=StringIO())
+        self.assertEqual(cache_counters.counts(MISS_COUNTER_PREFIX), {})
+
+    def test_tokenizer_version_change_misses(self):
+        """Test a different tokenizer version does not reuse old output."""
+        from flashcards.tokenization_cache import tokenize_text_cached
+        with patch('flashcards.tokenization.lemmatize_token', side_effect=self._fake_lemma) as mock_lemmatize:
+            list(tokenize_text_cached(self.text, 'de'))
+            with patch('flashcards.tokenization_cache.get_tokenizer_version', return_value='other'):
+                list(tokenize_text_cached(self.text, 'de'))
+            list(tokenize_text_cached(self.text, 'es'))
+
+        self.assertEqual(mock_lemmatize.call_count, 3 * len([t for t in tokenize_text(self.text) if t['type'] == 'word']))
+
+    def test_cache_disabled(self):
+        """Test nothing is stored when the cache is disabled."""
+        from flashcards.models import TokenizationCache
+        from flashcards.tokenization_cache import tokenize_text_cached
+        with self.settings(TOKENIZATION_CACHE_ENABLED=False):
+            list(tokenize_text_cached(self.text, 'de'))
+
+        self.assertFalse(TokenizationCache.objects.exists())
+
+
 class TranslationAPITests(APITestCase):
     """Test Translation API endpoint."""
 
@@ -525,7 +879,7 @@ class TokenClickAPITests(APITestCase):
         self.token = Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
@@ -549,6 +903,31 @@ class TokenClickAPITests(APITestCase):
         self.token.refresh_from_db()
         self.assertEqual(self.token.clicked_count, 1)
 
+    @patch('flashcards.translation_service.get_word_translation')
+    @patch('flashcards.translation_service.translate_text')
+    def test_click_token_sentence_context_uses_sentence_index(self, mock_sentence_translate, mock_word_translate):
+        """Test clicking a token returns its sentence and caches the translation by sentence index."""
+        mock_word_translate.return_value = None
+        mock_sentence_translate.return_value = 'That is a test.'
+        token = Token.objects.create(
+            lesson=self.lesson,
+            text='Test',
+            lexeme=_lexeme(self.lesson, 'test'),
+            start_offset=24,
+            end_offset=28
+        )
+        
+        url = f'/api/flashcards/reader/tokens/{token.token_id}/click/'
+        response = self.client.get(url)
+        
+        self.assertEqual(response.data['sentence'], 'Das ist ein Test.')
+        self.assertEqual(response.data['sentence_index'], 1)
+        self.assertEqual(self.lesson.get_sentence_translations(), {1: 'That is a test.'})
+        
+        # Second click is served from the lesson cache
+        self.client.get(url)
+        self.assertEqual(mock_sentence_translate.call_count, 1)
+
     def test_click_token_not_found(self):
         """Test clicking non-existent token."""
         url = '/api/flashcards/reader/tokens/99999/click/'
@@ -572,7 +951,7 @@ class TokenClickAPITests(APITestCase):
         other_token = Token.objects.create(
             lesson=other_lesson,
             text='Text',
-            normalized='text',
+            lexeme=_lexeme(other_lesson, 'text'),
             start_offset=0,
             end_offset=4
         )
@@ -602,7 +981,7 @@ class AddToFlashcardsAPITests(APITestCase):
         self.token = Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5,
             translation='Hello'
@@ -781,13 +1160,17 @@ class ListeningTimeAPITests(APITestCase):
 class TranslationServiceTests(TestCase):
     """Test translation service functions."""
 
+    def setUp(self):
+        from flashcards import translation_memory
+        translation_memory.clear_local()
+
     @patch('flashcards.translation_service.DEEPL_API_KEY', 'test-deepl-key')
-    @patch('flashcards.translation_service.requests.post')
-    @patch('flashcards.translation_service.cache')
-    def test_translate_text_success(self, mock_cache, mock_post):
+    @patch('flashcards.translation_service.http_client.post')
+    @patch('flashcards.translation_service.translation_memory')
+    def test_translate_text_success(self, mock_memory, mock_post):
         """Test successful translation."""
-        # Mock cache miss
-        mock_cache.get.return_value = None
+        # Mock translation memory miss
+        mock_memory.lookup.return_value = None
         
         # Mock API response
         mock_response = MagicMock()
@@ -800,18 +1183,67 @@ class TranslationServiceTests(TestCase):
         result = translate_text('Hallo', 'de', 'en')
         
         self.assertEqual(result, 'Hello')
-        mock_cache.set.assert_called_once()
+        mock_memory.store.assert_called_once_with('Hallo', 'de', 'en', 'Hello')
 
-    @patch('flashcards.translation_service.cache')
-    def test_translate_text_cache_hit(self, mock_cache):
-        """Test translation cache hit."""
-        mock_cache.get.return_value = 'Hello'
+    @patch('flashcards.translation_service.translation_memory')
+    def test_translate_text_cache_hit(self, mock_memory):
+        """Test translation memory hit."""
+        mock_memory.lookup.return_value = 'Hello'
         
         result = translate_text('Hallo', 'de', 'en')
         
         self.assertEqual(result, 'Hello')
         # Should not call API
-        mock_cache.set.assert_not_called()
+        mock_memory.store.assert_not_called()
+
+    @patch('flashcards.translation_service.DEEPL_API_KEY', 'test-deepl-key')
+    @patch('flashcards.translation_service.http_client.post')
+    def test_translation_memory_survives_process_cache(self, mock_post):
+        """Test a stored translation is served from the database once the local LRU is gone."""
+        from flashcards import translation_memory
+        from flashcards.models import TranslationMemory
+        mock_response = MagicMock()
+        mock_response.json.return_value = {'translations': [{'text': 'Hello'}]}
+        mock_post.return_value = mock_response
+        translate_text('Hallo', 'de', 'en')
+        
+        # A new worker (or a deploy) starts with an empty LRU
+        translation_memory.clear_local()
+        self.assertEqual(translate_text('Hallo', 'de', 'en'), 'Hello')
+        self.assertEqual(translate_text('Hallo', 'de', 'en'), 'Hello')
+        
+        self.assertEqual(mock_post.call_count, 1)
+        entry = TranslationMemory.objects.get()
+        self.assertEqual(entry.key, translation_memory.make_memory_key('Hallo', 'de', 'en'))
+        self.assertEqual((entry.text, entry.translation, entry.hit_count), ('Hallo', 'Hello', 1))
+        self.assertEqual(translation_memory.stats(), {'local_hits': 1, 'db_hits': 1, 'misses': 0, 'local_entries': 1})
+
+    def test_translation_memory_local_cache_is_bounded(self):
+        """Test the local LRU drops the least recently used entries."""
+        from flashcards import translation_memory
+        with self.settings(TRANSLATION_MEMORY_LOCAL_CACHE_SIZE=2):
+            translation_memory.store_many({'eins': 'one', 'zwei': 'two', 'drei': 'three'}, 'de', 'en')
+            self.assertEqual(translation_memory.stats()['local_entries'], 2)
+            self.assertEqual(
+                translation_memory.lookup_many(['eins', 'zwei', 'drei'], 'de', 'en'),
+                {'eins': 'one', 'zwei': 'two', 'drei': 'three'}
+            )
+        self.assertEqual(translation_memory.stats()['db_hits'], 1)
+
+    def test_translation_memory_stats_reports_counted_misses(self):
+        """Test the stats command reports the persisted miss counter."""
+        from io import StringIO
+        from django.core.management import call_command
+        from flashcards import cache_counters, translation_memory
+        self.assertEqual(translation_memory.lookup_many(['eins', 'zwei'], 'de', 'en'), {})
+        translation_memory.store('eins', 'de', 'en', 'one')
+        translation_memory.clear_local()
+        self.assertEqual(translation_memory.lookup('eins', 'de', 'en'), 'one')
+
+        self.assertEqual(cache_counters.counts(translation_memory.MISS_COUNTER_PREFIX), {'de->en': 2})
+        out = StringIO()
+        call_command('translation_memory_stats', stdout=out)
+        self.assertIn('Total: 1 entries, 1 hits / 2 misses, hit rate 33.3%', out.getvalue())
 
 
 class TTSServiceTests(TestCase):
@@ -835,7 +1267,7 @@ class TTSServiceTests(TestCase):
         
         self.assertIsNone(result)
 
-    @patch('flashcards.tts_service.requests.post')
+    @patch('flashcards.tts_service.http_client.post')
     @patch('flashcards.tts_service.default_storage')
     def test_generate_elevenlabs_tts_success(self, mock_storage, mock_post):
         """Test successful ElevenLabs TTS generation."""
@@ -1102,7 +1534,7 @@ class LessonImportFlowTests(APITestCase):
         # Check that tokens have proper structure
         for token in tokens:
             self.assertIsNotNone(token.text)
-            self.assertIsNotNone(token.normalized)
+            self.assertIsNotNone(token.lexeme.normalized)
             self.assertIsNotNone(token.start_offset)
             self.assertIsNotNone(token.end_offset)
     
@@ -1197,21 +1629,21 @@ class ReadingProgressTests(TestCase):
         Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
         Token.objects.create(
             lesson=self.lesson,
             text='Welt',
-            normalized='welt',
+            lexeme=_lexeme(self.lesson, 'welt'),
             start_offset=6,
             end_offset=10
         )
         Token.objects.create(
             lesson=self.lesson,
             text='Das',
-            normalized='das',
+            lexeme=_lexeme(self.lesson, 'das'),
             start_offset=12,
             end_offset=15
         )
@@ -1297,7 +1729,7 @@ class ReadingProgressAPITests(APITestCase):
             Token.objects.create(
                 lesson=self.lesson,
                 text=word,
-                normalized=word.lower(),
+                lexeme=_lexeme(self.lesson, word.lower()),
                 start_offset=i * 6,
                 end_offset=i * 6 + len(word)
             )
@@ -1536,8 +1968,8 @@ class ReadingProgressAPITests(APITestCase):
         self.assertIn('reading_time_formatted', lesson)
 
 
-class TokenStatusModelTests(TestCase):
-    """Test TokenStatus model functionality."""
+class UserVocabularyModelTests(TestCase):
+    """Test UserVocabulary model functionality."""
     
     def setUp(self):
         self.user = User.objects.create_user(
@@ -1554,78 +1986,69 @@ class TokenStatusModelTests(TestCase):
         self.token = Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
     
-    def test_create_token_status_known(self):
-        """Test creating a known token status."""
-        status = TokenStatus.objects.create(
-            user=self.user,
-            token=self.token,
-            status='known'
+    def test_vocabulary_key_prefers_lemma(self):
+        """Test the vocabulary key is the lemma, falling back to the normalized form."""
+        self.assertEqual(self.token.vocabulary_key, 'hallo')
+        token = Token.objects.create(
+            lesson=self.lesson, text='sah', lexeme=_lexeme(self.lesson, 'sah', 'sehen'), start_offset=6, end_offset=9
         )
-        self.assertEqual(status.status, 'known')
-        self.assertEqual(status.user, self.user)
-        self.assertEqual(status.token, self.token)
+        self.assertEqual(token.vocabulary_key, 'sehen')
     
-    def test_create_token_status_unknown(self):
-        """Test creating an unknown token status."""
-        status = TokenStatus.objects.create(
+    def test_create_vocabulary_entry(self):
+        """Test creating a known vocabulary entry."""
+        entry = UserVocabulary.objects.create(
             user=self.user,
-            token=self.token,
-            status='unknown'
+            language='de',
+            key='hallo',
+            status='known',
+            level=UserVocabulary.MAX_LEVEL
         )
-        self.assertEqual(status.status, 'unknown')
+        self.assertEqual(entry.status, 'known')
+        self.assertEqual(entry.level, UserVocabulary.MAX_LEVEL)
+        self.assertEqual(entry.user, self.user)
     
-    def test_token_status_unique_per_user(self):
-        """Test that each user can only have one status per token."""
-        TokenStatus.objects.create(
-            user=self.user,
-            token=self.token,
-            status='known'
-        )
+    def test_vocabulary_unique_per_user_language_key(self):
+        """Test that each user has one entry per word and language."""
+        UserVocabulary.objects.create(user=self.user, language='de', key='hallo', status='known')
         
-        # Try to create another status for the same user/token
-        status2, created = TokenStatus.objects.get_or_create(
+        entry, created = UserVocabulary.objects.get_or_create(
             user=self.user,
-            token=self.token,
+            language='de',
+            key='hallo',
             defaults={'status': 'unknown'}
         )
-        
-        # Should get existing status, not create new one
         self.assertFalse(created)
-        self.assertEqual(status2.status, 'known')  # Original status
-    
-    def test_multiple_users_different_statuses(self):
-        """Test that different users can have different statuses for same token."""
-        user2 = User.objects.create_user(
-            username='testuser2',
-            email='test2@example.com',
-            password='testpass123'
-        )
-        
-        status1 = TokenStatus.objects.create(
-            user=self.user,
-            token=self.token,
-            status='known'
-        )
-        status2 = TokenStatus.objects.create(
-            user=user2,
-            token=self.token,
-            status='unknown'
-        )
+        self.assertEqual(entry.status, 'known')
         
-        self.assertEqual(status1.status, 'known')
-        self.assertEqual(status2.status, 'unknown')
-        self.assertEqual(TokenStatus.objects.filter(token=self.token).count(), 2)
+        # Same word in another language is a separate entry
+        _, created = UserVocabulary.objects.get_or_create(user=self.user, language='es', key='hallo')
+        self.assertTrue(created)
+    
+    def test_status_subquery_resolves_all_tokens_in_one_query(self):
+        """Test lesson tokens get the user's statuses from a single query."""
+        Token.objects.create(lesson=self.lesson, text='Welt', lexeme=_lexeme(self.lesson, 'welt'), start_offset=6, end_offset=10)
+        UserVocabulary.objects.create(user=self.user, language='de', key='welt', status='known')
+        
+        with self.assertNumQueries(1):
+            statuses = dict(
+                self.lesson.tokens.annotate(vocabulary_status=UserVocabulary.status_subquery(self.user))
+                .values_list('lexeme__normalized', 'vocabulary_status')
+            )
+        self.assertEqual(statuses, {'hallo': None, 'welt': 'known'})
 
 
 class TokenStatusAPITests(APITestCase):
-    """Test TokenStatus API endpoints."""
+    """Test token status API endpoints (backed by UserVocabulary)."""
     
     def setUp(self):
+        # Status sets are cached per user id, and ids and versions are reused between tests
+        cache.clear()
+        known_words.clear_local_sets()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
@@ -1648,7 +2071,7 @@ class TokenStatusAPITests(APITestCase):
         self.token = Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
@@ -1663,9 +2086,10 @@ class TokenStatusAPITests(APITestCase):
         self.assertEqual(response.data['token_id'], self.token.token_id)
         self.assertTrue(response.data['created'])
         
-        # Verify status was saved
-        token_status = TokenStatus.objects.get(user=self.user, token=self.token)
-        self.assertEqual(token_status.status, 'known')
+        # Verify status was saved for the word
+        entry = UserVocabulary.objects.get(user=self.user, language='de', key='hallo')
+        self.assertEqual(entry.status, 'known')
+        self.assertEqual(entry.level, UserVocabulary.MAX_LEVEL)
     
     def test_mark_token_as_unknown(self):
         """Test marking a token as unknown."""
@@ -1676,15 +2100,17 @@ class TokenStatusAPITests(APITestCase):
         self.assertEqual(response.data['status'], 'unknown')
         
         # Verify status was saved
-        token_status = TokenStatus.objects.get(user=self.user, token=self.token)
-        self.assertEqual(token_status.status, 'unknown')
+        entry = UserVocabulary.objects.get(user=self.user, language='de', key='hallo')
+        self.assertEqual(entry.status, 'unknown')
+        self.assertEqual(entry.level, 0)
     
     def test_update_token_status(self):
         """Test updating an existing token status."""
         # First mark as unknown
-        TokenStatus.objects.create(
+        UserVocabulary.objects.create(
             user=self.user,
-            token=self.token,
+            language='de',
+            key='hallo',
             status='unknown'
         )
         
@@ -1697,8 +2123,8 @@ class TokenStatusAPITests(APITestCase):
         self.assertFalse(response.data['created'])  # Not created, updated
         
         # Verify status was updated
-        token_status = TokenStatus.objects.get(user=self.user, token=self.token)
-        self.assertEqual(token_status.status, 'known')
+        entry = UserVocabulary.objects.get(user=self.user, language='de', key='hallo')
+        self.assertEqual(entry.status, 'known')
     
     def test_mark_token_status_missing_status(self):
         """Test marking status without providing status value."""
@@ -1734,7 +2160,7 @@ class TokenStatusAPITests(APITestCase):
         token2 = Token.objects.create(
             lesson=lesson2,
             text='Bonjour',
-            normalized='bonjour',
+            lexeme=_lexeme(lesson2, 'bonjour'),
             start_offset=0,
             end_offset=7
         )
@@ -1747,9 +2173,10 @@ class TokenStatusAPITests(APITestCase):
     def test_remove_token_status(self):
         """Test removing a token status."""
         # First create a status
-        TokenStatus.objects.create(
+        UserVocabulary.objects.create(
             user=self.user,
-            token=self.token,
+            language='de',
+            key='hallo',
             status='known'
         )
         
@@ -1761,7 +2188,7 @@ class TokenStatusAPITests(APITestCase):
         self.assertIn('message', response.data)
         
         # Verify status was removed
-        self.assertFalse(TokenStatus.objects.filter(user=self.user, token=self.token).exists())
+        self.assertFalse(UserVocabulary.objects.filter(user=self.user, key='hallo').exists())
     
     def test_remove_nonexistent_token_status(self):
         """Test removing a status that doesn't exist."""
@@ -1775,9 +2202,10 @@ class TokenStatusAPITests(APITestCase):
     def test_token_serializer_includes_status(self):
         """Test that TokenSerializer includes status field."""
         # Create a status
-        TokenStatus.objects.create(
+        UserVocabulary.objects.create(
             user=self.user,
-            token=self.token,
+            language='de',
+            key='hallo',
             status='known'
         )
         
@@ -1814,16 +2242,18 @@ class TokenStatusAPITests(APITestCase):
     def test_token_status_user_scoping(self):
         """Test that users only see their own token statuses."""
         # User1 marks token as known
-        TokenStatus.objects.create(
+        UserVocabulary.objects.create(
             user=self.user,
-            token=self.token,
+            language='de',
+            key='hallo',
             status='known'
         )
         
-        # User2 marks same token as unknown (even though they can't access the lesson)
-        TokenStatus.objects.create(
+        # User2 marks the same word as unknown
+        UserVocabulary.objects.create(
             user=self.user2,
-            token=self.token,
+            language='de',
+            key='hallo',
             status='unknown'
         )
         
@@ -1855,7 +2285,7 @@ class TokenStatusAPITests(APITestCase):
         token2 = Token.objects.create(
             lesson=lesson2,
             text=self.token.text,
-            normalized=self.token.normalized,
+            lexeme=self.token.lexeme,
             start_offset=self.token.start_offset,
             end_offset=self.token.end_offset
         )
@@ -1868,99 +2298,1775 @@ class TokenStatusAPITests(APITestCase):
         token_data = next((t for t in tokens if t['token_id'] == token2.token_id), None)
         self.assertIsNotNone(token_data, "Token should be found in response")
         self.assertIn('status', token_data)
-        # User2's token should have no status (since TokenStatus was created for self.token, not token2)
-        self.assertIsNone(token_data['status'])
+        # Statuses are per word, so user2 sees their own status for the same word
+        self.assertEqual(token_data['status'], 'unknown')
+    
+    def test_status_applies_to_every_occurrence(self):
+        """Test marking one occurrence updates every lesson with the same lemma."""
+        sah = Token.objects.create(
+            lesson=self.lesson, text='sah', lexeme=_lexeme(self.lesson, 'sah', 'sehen'), start_offset=6, end_offset=9
+        )
+        other_lesson = Lesson.objects.create(user=self.user, title='Other', text='gesehen', language='de')
+        gesehen = Token.objects.create(
+            lesson=other_lesson, text='gesehen', lexeme=_lexeme(other_lesson, 'gesehen', 'sehen'), start_offset=0, end_offset=7
+        )
+        
+        response = self.client.post(f'/api/flashcards/reader/tokens/{sah.token_id}/status/', {'status': 'known'}, format='json')
+        self.assertEqual(response.data['vocabulary_key'], 'sehen')
+        
+        response = self.client.get(f'/api/flashcards/reader/lessons/{other_lesson.lesson_id}/')
+        token_data = next(t for t in response.data['tokens'] if t['token_id'] == gesehen.token_id)
+        self.assertEqual(token_data['status'], 'known')
+        self.assertEqual(UserVocabulary.objects.filter(user=self.user).count(), 1)
+    
+    def test_mark_token_status_with_level(self):
+        """Test an explicit SRS level is stored and validated."""
+        url = f'/api/flashcards/reader/tokens/{self.token.token_id}/status/'
+        response = self.client.post(url, {'status': 'unknown', 'level': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['level'], 2)
+        
+        response = self.client.post(url, {'status': 'unknown', 'level': 9}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
-class DictionaryServiceTests(TestCase):
-    """Test dictionary service functionality."""
+class BulkTokenStatusAPITests(APITestCase):
+    """Test the bulk token status endpoint."""
     
-    def test_get_wiktionary_language_code(self):
-        """Test language code mapping."""
-        self.assertEqual(get_wiktionary_language_code('es'), 'Spanish')
-        self.assertEqual(get_wiktionary_language_code('de'), 'German')
-        self.assertEqual(get_wiktionary_language_code('en'), 'English')
-        self.assertEqual(get_wiktionary_language_code('fr'), 'French')
-        self.assertEqual(get_wiktionary_language_code('it'), 'Italian')
-        self.assertEqual(get_wiktionary_language_code('pt'), 'Portuguese')
-        # Fallback for unknown languages
-        self.assertEqual(get_wiktionary_language_code('xx'), 'Xx')
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/flashcards/reader/tokens/status/bulk/'
+        self.lesson = Lesson.objects.create(user=self.user, title='Test', text='Ich sah, du siehst Hunde.', language='de')
+        words = [
+            ('Ich', 'ich', 'ich'), ('sah', 'sah', 'sehen'), (',', '', None),
+            ('du', 'du', 'du'), ('siehst', 'siehst', 'sehen'), ('Hunde', 'hunde', 'hund'),
+        ]
+        self.tokens = [
+            Token(lesson=self.lesson, text=text, start_offset=i, end_offset=i + 1)
+            for i, (text, _, _) in enumerate(words)
+        ]
+        assign_lexemes('de', self.tokens, [(normalized, lemma or '') for _, normalized, lemma in words])
+        for token in self.tokens:
+            token.save()
     
-    @patch('flashcards.dictionary_service.requests.get')
-    @patch('flashcards.dictionary_service.cache')
-    def test_get_dictionary_entry_success(self, mock_cache, mock_get):
-        """Test successful dictionary entry retrieval."""
-        # Mock cache miss
-        mock_cache.get.return_value = None
-        
-        # Mock Wiktionary API response (actual structure)
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            'de': [
-                {
-                    'partOfSpeech': 'noun',
-                    'definitions': [
-                        {
-                            'definition': '<span>greeting, hello</span>'
-                        }
-                    ],
-                    'examples': [
-                        {'text': 'Hallo, wie geht es dir?'}
-                    ]
-                }
-            ]
-        }
-        mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
+    def test_bulk_mark_token_ids(self):
+        """Test token ids are collapsed to vocabulary keys and upserted."""
+        UserVocabulary.objects.create(user=self.user, language='de', key='sehen', status='unknown')
+        ids = [self.tokens[1].token_id, self.tokens[4].token_id, self.tokens[5].token_id]
         
-        result = get_dictionary_entry('Hallo', 'de', 'en')
+        response = self.client.post(self.url, {'status': 'known', 'token_ids': ids}, format='json')
         
-        self.assertIsNotNone(result)
-        self.assertEqual(result['source'], 'wiktionary')
-        self.assertIn('meanings', result)
-        self.assertEqual(len(result['meanings']), 1)
-        self.assertEqual(result['meanings'][0]['part_of_speech'], 'noun')
-        self.assertIn('definitions', result['meanings'][0])
-        self.assertIn('examples', result['meanings'][0])
-        mock_cache.set.assert_called_once()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['vocabulary_keys'], ['hund', 'sehen'])
+        statuses = dict(UserVocabulary.objects.filter(user=self.user).values_list('key', 'status'))
+        self.assertEqual(statuses, {'sehen': 'known', 'hund': 'known'})
     
-    @patch('flashcards.dictionary_service.requests.get')
-    @patch('flashcards.dictionary_service.cache')
-    def test_get_dictionary_entry_cache_hit(self, mock_cache, mock_get):
-        """Test dictionary entry cache hit."""
-        cached_entry = {
-            'meanings': [{'part_of_speech': 'noun', 'definitions': ['hello'], 'examples': []}],
-            'source': 'wiktionary'
-        }
-        mock_cache.get.return_value = cached_entry
+    def test_bulk_mark_words(self):
+        """Test marking by normalized form within a lesson."""
+        response = self.client.post(
+            self.url, {'status': 'unknown', 'words': ['Hunde', 'du'], 'lesson_id': self.lesson.lesson_id}, format='json'
+        )
         
-        result = get_dictionary_entry('Hallo', 'de', 'en')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(UserVocabulary.objects.values_list('key', flat=True)), ['du', 'hund'])
+    
+    def test_mark_unmarked_words_known(self):
+        """Test marking every unmarked word in a lesson keeps existing statuses."""
+        UserVocabulary.objects.create(user=self.user, language='de', key='hund', status='unknown', level=2)
+        
+        # Lesson, tokens, existing entries, upsert, packed lessons, coverage delta, coverage rows,
+        # version bump and read, and the transaction savepoint
+        with self.assertNumQueries(11):
+            response = self.client.post(
+                self.url, {'status': 'known', 'lesson_id': self.lesson.lesson_id, 'only_unmarked': True}, format='json'
+            )
         
-        self.assertEqual(result, cached_entry)
-        mock_get.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 3)
+        statuses = dict(UserVocabulary.objects.values_list('key', 'status'))
+        self.assertEqual(statuses, {'ich': 'known', 'sehen': 'known', 'du': 'known', 'hund': 'unknown'})
     
-    @patch('flashcards.dictionary_service.requests.get')
-    def test_get_dictionary_entry_not_found(self, mock_get):
-        """Test dictionary entry when word not found."""
-        mock_response = MagicMock()
-        mock_response.status_code = 404
-        mock_get.return_value = mock_response
+    def test_only_unmarked_false_string_is_false(self):
+        """Test only_unmarked is parsed as a boolean, so 'false' overwrites existing statuses."""
+        UserVocabulary.objects.create(user=self.user, language='de', key='hund', status='unknown', level=2)
         
-        result = get_dictionary_entry('NonexistentWord12345', 'de', 'en')
+        response = self.client.post(
+            self.url, {'status': 'known', 'lesson_id': self.lesson.lesson_id, 'only_unmarked': 'false'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 4)
+        self.assertEqual(UserVocabulary.objects.get(key='hund').status, 'known')
         
-        self.assertIsNone(result)
+        response = self.client.post(
+            self.url, {'status': 'known', 'lesson_id': self.lesson.lesson_id, 'only_unmarked': 'maybe'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
-    @patch('flashcards.dictionary_service.requests.get')
-    def test_get_dictionary_entry_api_error(self, mock_get):
-        """Test dictionary entry when API error occurs."""
-        mock_get.side_effect = Exception("API Error")
+    def test_bulk_other_users_tokens_ignored(self):
+        """Test tokens from other users' lessons are not marked."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        other_lesson = Lesson.objects.create(user=other, title='Other', text='Katze', language='de')
+        other_token = Token.objects.create(lesson=other_lesson, text='Katze', lexeme=_lexeme(other_lesson, 'katze'), start_offset=0, end_offset=5)
         
-        result = get_dictionary_entry('Hallo', 'de', 'en')
+        response = self.client.post(self.url, {'status': 'known', 'token_ids': [other_token.token_id]}, format='json')
+        self.assertEqual(response.data['updated'], 0)
         
-        self.assertIsNone(result)
+        response = self.client.post(
+            self.url, {'status': 'known', 'lesson_id': other_lesson.lesson_id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(UserVocabulary.objects.exists())
     
-    def test_parse_wiktionary_response_valid(self):
+    def test_bulk_validation(self):
+        """Test invalid requests are rejected."""
+        self.assertEqual(self.client.post(self.url, {'status': 'maybe', 'token_ids': [1]}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'status': 'known'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'status': 'known', 'words': ['hund']}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'status': 'known', 'token_ids': ['x']}, format='json').status_code, 400)
+
+
+class LessonCoverageTests(APITestCase):
+    """Test per-lesson known-word coverage and difficulty sorting."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.easy = self._lesson('Easy', [('Ich', 'ich', 'ich'), ('sah', 'sah', 'sehen'), ('.', '', None)])
+        self.hard = self._lesson('Hard', [
+            ('Ich', 'ich', 'ich'), ('sah', 'sah', 'sehen'), ('siehst', 'siehst', 'sehen'),
+            ('Hunde', 'hunde', 'hund'), ('Hund', 'hund', 'hund'), ('!', '', None),
+        ])
+        UserVocabulary.objects.create(user=self.user, language='de', key='ich', status='known')
+        UserVocabulary.objects.create(user=self.user, language='de', key='hund', status='unknown')
+    
+    def _lesson(self, title, words):
+        lesson = Lesson.objects.create(user=self.user, title=title, text=title, language='de')
+        tokens = [
+            Token(lesson=lesson, text=text, start_offset=i, end_offset=i + 1)
+            for i, (text, _, _) in enumerate(words)
+        ]
+        assign_lexemes('de', tokens, [(normalized, lemma or '') for _, normalized, lemma in words])
+        for token in tokens:
+            token.save()
+        return lesson
+    
+    def _coverage(self, lesson):
+        from flashcards.models import LessonCoverage
+        return LessonCoverage.objects.get(lesson=lesson, user=self.user)
+    
+    def test_compute_lesson_coverage(self):
+        """Test coverage counts words by vocabulary key and ignores punctuation."""
+        from flashcards.coverage import compute_lesson_coverage
+        with self.assertNumQueries(2):
+            coverage = compute_lesson_coverage(self.hard, self.user)
+        
+        self.assertEqual(coverage.unique_words, 3)   # ich, sehen, hund
+        self.assertEqual(coverage.unknown_words, 2)  # sehen (no status), hund (unknown)
+        self.assertEqual(coverage.total_words, 5)
+        self.assertEqual(coverage.known_words, 1)
+        self.assertEqual(coverage.known_percentage, 20.0)
+    
+    def test_status_changes_update_coverage_incrementally(self):
+        """Test marking words keeps stored coverage equal to a full recomputation."""
+        from flashcards.coverage import compute_lesson_coverage, ensure_lesson_coverage
+        ensure_lesson_coverage(self.user)
+        sah = self.hard.tokens.get(text='sah')
+        hunde = self.hard.tokens.get(text='Hunde')
+        
+        self.client.post(f'/api/flashcards/reader/tokens/{sah.token_id}/status/', {'status': 'known'}, format='json')
+        self.client.post('/api/flashcards/reader/tokens/status/bulk/',
+                         {'status': 'known', 'token_ids': [hunde.token_id]}, format='json')
+        self.client.delete(f'/api/flashcards/reader/tokens/{hunde.token_id}/status/')
+        
+        for lesson in (self.easy, self.hard):
+            stored = self._coverage(lesson)
+            fresh = compute_lesson_coverage(lesson, self.user)
+            self.assertEqual(
+                (stored.unique_words, stored.unknown_words, stored.known_words, stored.known_percentage),
+                (fresh.unique_words, fresh.unknown_words, fresh.known_words, fresh.known_percentage),
+            )
+        self.assertEqual(self._coverage(self.easy).known_percentage, 100.0)
+        self.assertEqual(self._coverage(self.hard).known_words, 3)
+    
+    def test_vocabulary_change_updates_rows_in_place(self):
+        """Test deltas are applied with one UPDATE instead of a read-modify-write."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from flashcards.coverage import apply_vocabulary_change, ensure_lesson_coverage
+        ensure_lesson_coverage(self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            apply_vocabulary_change(self.user, 'de', ['sehen'], now_known=True)
+        sql = [query['sql'] for query in queries]
+        self.assertEqual(len([q for q in sql if q.startswith('UPDATE "flashcards_lessoncoverage"')]), 1)
+        self.assertFalse([q for q in sql if 'FROM "flashcards_lessoncoverage"' in q])
+        
+        hard = self._coverage(self.hard)
+        self.assertEqual((hard.known_words, hard.unknown_words, hard.known_percentage), (3, 1, 60.0))
+        self.assertEqual(self._coverage(self.easy).known_percentage, 100.0)
+    
+    def test_lesson_list_sorts_and_filters_by_difficulty(self):
+        """Test the lesson list exposes coverage and sorts/filters on it."""
+        response = self.client.get('/api/flashcards/reader/lessons/?ordering=difficulty')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lessons = response.data['results'] if 'results' in response.data else response.data
+        self.assertEqual([lesson['title'] for lesson in lessons], ['Easy', 'Hard'])
+        self.assertEqual(lessons[0]['coverage']['known_percentage'], 50.0)
+        self.assertEqual(lessons[1]['coverage']['unknown_words'], 2)
+        
+        response = self.client.get('/api/flashcards/reader/lessons/?ordering=-difficulty&min_known_percentage=30')
+        lessons = response.data['results'] if 'results' in response.data else response.data
+        self.assertEqual([lesson['title'] for lesson in lessons], ['Easy'])
+        
+        response = self.client.get('/api/flashcards/reader/lessons/?ordering=nonsense')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_text_update_invalidates_coverage(self):
+        """Test re-tokenizing a lesson drops its stored coverage."""
+        from flashcards.coverage import ensure_lesson_coverage
+        from flashcards.models import LessonCoverage
+        ensure_lesson_coverage(self.user)
+        
+        with patch('flashcards.tokenization.lemmatize_token', return_value=None):
+            self.client.patch(f'/api/flashcards/reader/lessons/{self.easy.lesson_id}/update/',
+                              {'text': 'Neuer Text'}, format='json')
+        
+        self.assertFalse(LessonCoverage.objects.filter(lesson=self.easy).exists())
+        self.assertTrue(LessonCoverage.objects.filter(lesson=self.hard).exists())
+
+
+class LemmaFrequencyTests(APITestCase):
+    """Test the per-user lemma frequency index and the top unknown words endpoint."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.lemmas = {'sah': 'sehen', 'sieht': 'sehen', 'hunde': 'hund', 'hund': 'hund'}
+    
+    def _fake_lemma(self, text, language='de', backend=None):
+        return self.lemmas.get(text.lower())
+    
+    def _create(self, text):
+        with patch('flashcards.tokenization.lemmatize_token', side_effect=self._fake_lemma):
+            response = self.client.post('/api/flashcards/reader/lessons/',
+                                        {'title': 'Lesson', 'text': text, 'language': 'de'}, format='json')
+        return response.data['lesson_id']
+    
+    def _frequencies(self):
+        from flashcards.models import LemmaFrequency
+        return {
+            lemma: (occurrences, lessons)
+            for lemma, occurrences, lessons in LemmaFrequency.objects.filter(user=self.user)
+            .values_list('lemma', 'occurrence_count', 'lesson_count')
+        }
+    
+    def test_counts_follow_lesson_create_update_delete(self):
+        """Test counts are applied as deltas on create, re-tokenize and delete."""
+        first = self._create('Er sah den Hund. Sie sieht Hunde.')
+        self._create('Der Hund sah ihn.')
+        self.assertEqual(self._frequencies()['sehen'], (3, 2))
+        self.assertEqual(self._frequencies()['hund'], (3, 2))
+        
+        with patch('flashcards.tokenization.lemmatize_token', side_effect=self._fake_lemma):
+            self.client.patch(f'/api/flashcards/reader/lessons/{first}/update/', {'text': 'Er sah Katzen.'}, format='json')
+        frequencies = self._frequencies()
+        self.assertEqual(frequencies['sehen'], (2, 2))
+        self.assertEqual(frequencies['hund'], (1, 1))
+        self.assertEqual(frequencies['katzen'], (1, 1))
+        self.assertNotIn('sie', frequencies)
+        
+        self.client.delete(f'/api/flashcards/reader/lessons/{first}/delete/')
+        frequencies = self._frequencies()
+        self.assertEqual(frequencies['sehen'], (1, 1))
+        self.assertNotIn('katzen', frequencies)
+        self.assertNotIn('er', frequencies)
+    
+    def test_top_unknown_lemmas_excludes_known(self):
+        """Test the study feed ranks by frequency and skips known words."""
+        self._create('Er sah den Hund. Sie sieht Hunde. Er sah den Hund.')
+        UserVocabulary.objects.create(user=self.user, language='de', key='sehen', status='known')
+        UserVocabulary.objects.create(user=self.user, language='de', key='den', status='unknown')
+        
+        with self.assertNumQueries(1):
+            from flashcards.lemma_frequency import top_unknown_lemmas
+            results = top_unknown_lemmas(self.user, 'de', limit=3)
+        self.assertEqual([row['lemma'] for row in results], ['hund', 'den', 'er'])
+        self.assertEqual(results[0]['occurrence_count'], 3)
+        self.assertEqual(results[1]['status'], 'unknown')
+        self.assertIsNone(results[2]['status'])
+        
+        response = self.client.get('/api/flashcards/reader/vocabulary/top-unknown/?language=de&limit=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['lemma'] for row in response.data['results']], ['hund', 'den'])
+    
+    def test_frequencies_are_per_user(self):
+        """Test other users' lessons don't affect the index."""
+        self._create('Hund Hund')
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self._create('Hund')
+        
+        self.assertEqual(self._frequencies()['hund'], (2, 1))
+    
+    def test_delta_merges_into_rows_created_concurrently(self):
+        """Test a new key added by two lessons at once ends up in one row with both counts."""
+        from collections import Counter
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from flashcards.lemma_frequency import apply_frequency_delta
+        from flashcards.models import LemmaFrequency
+        
+        # Another worker inserted the row after this one decided the key was new
+        LemmaFrequency.objects.create(user=self.user, language='de', lemma='hund', occurrence_count=2, lesson_count=1)
+        with CaptureQueriesContext(connection) as queries:
+            apply_frequency_delta(self.user.pk, 'de', Counter({'hund': 1, 'katze': 3}))
+        self.assertFalse([query['sql'] for query in queries if query['sql'].startswith('SELECT')])
+        self.assertEqual(self._frequencies(), {'hund': (3, 2), 'katze': (3, 1)})
+        
+        apply_frequency_delta(self.user.pk, 'de', Counter({'katze': 3}), sign=-1)
+        self.assertEqual(self._frequencies(), {'hund': (3, 2)})
+
+
+class KnownWordSetTests(APITestCase):
+    """Test the in-memory vocabulary status sets used for highlighting."""
+    
+    def setUp(self):
+        cache.clear()
+        known_words.clear_local_sets()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.lesson = Lesson.objects.create(user=self.user, title='Lesson', text='Er sah den Hund', language='de')
+        for index, (text, lemma) in enumerate([('Er', 'er'), ('sah', 'sehen'), ('den', 'der'), ('Hund', 'hund')]):
+            Token.objects.create(
+                lesson=self.lesson, text=text, lexeme=_lexeme(self.lesson, text.lower(), lemma),
+                start_offset=index * 5, end_offset=index * 5 + len(text)
+            )
+    
+    def test_set_membership_and_serialization(self):
+        """Test lookups by key and the packed byte round trip."""
+        from flashcards.known_words import KnownWordSet, word_id
+        
+        word_set = KnownWordSet.from_keys(['sehen', 'hund'], ['der'], version=3)
+        self.assertEqual(word_id('sehen'), word_id('sehen'))
+        self.assertIn('sehen', word_set)
+        self.assertNotIn('der', word_set)
+        self.assertEqual(word_set.status_of('hund'), 'known')
+        self.assertEqual(word_set.status_of('der'), 'unknown')
+        self.assertIsNone(word_set.status_of('katze'))
+        self.assertIsNone(word_set.status_of(''))
+        
+        restored = KnownWordSet.from_bytes(word_set.to_bytes(), version=3)
+        self.assertEqual(list(restored.known), list(word_set.known))
+        self.assertEqual(restored.status_of('der'), 'unknown')
+    
+    def test_set_is_cached_in_process_and_shared(self):
+        """Test the set is built once and reused from the shared cache by other processes."""
+        from flashcards.known_words import clear_local_sets, get_known_word_set
+        
+        UserVocabulary.objects.create(user=self.user, language='de', key='sehen', status='known')
+        first = get_known_word_set(self.user, 'de')
+        # Only the version is read
+        with self.assertNumQueries(1):
+            self.assertIs(get_known_word_set(self.user, 'de'), first)
+        
+        # A fresh process finds the packed set in the shared cache
+        clear_local_sets()
+        with self.assertNumQueries(1):
+            shared = get_known_word_set(self.user, 'de')
+        self.assertIsNot(shared, first)
+        self.assertIn('sehen', shared)
+    
+    def test_change_in_other_process_is_seen(self):
+        """Test a worker with its own cache sees status changes made by another worker."""
+        from flashcards import known_words
+        from flashcards.known_words import clear_local_sets, get_known_word_set
+        
+        self.assertNotIn('sehen', get_known_word_set(self.user, 'de'))
+        this_process = dict(known_words._local_sets)
+        
+        # Another worker: empty in-process sets and its own (LocMem) cache
+        other_cache = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-worker'}}
+        with self.settings(CACHES=other_cache):
+            clear_local_sets()
+            UserVocabulary.objects.create(user=self.user, language='de', key='sehen', status='known')
+            self.assertIn('sehen', get_known_word_set(self.user, 'de'))
+        
+        # Back in this worker, the set held in memory is stale
+        clear_local_sets()
+        known_words._local_sets.update(this_process)
+        self.assertIn('sehen', get_known_word_set(self.user, 'de'))
+    
+    def test_status_changes_invalidate_set(self):
+        """Test status endpoints bump the version so the next render sees the change."""
+        from flashcards.known_words import get_known_word_set
+        
+        token = self.lesson.tokens.get(text='sah')
+        self.assertNotIn('sehen', get_known_word_set(self.user, 'de'))
+        
+        self.client.post(f'/api/flashcards/reader/tokens/{token.token_id}/status/', {'status': 'known'}, format='json')
+        self.assertIn('sehen', get_known_word_set(self.user, 'de'))
+        
+        self.client.post('/api/flashcards/reader/tokens/status/bulk/',
+                         {'status': 'known', 'lesson_id': self.lesson.lesson_id, 'only_unmarked': True}, format='json')
+        self.assertIn('hund', get_known_word_set(self.user, 'de'))
+        
+        self.client.delete(f'/api/flashcards/reader/tokens/{token.token_id}/status/')
+        self.assertNotIn('sehen', get_known_word_set(self.user, 'de'))
+    
+    def test_lesson_detail_uses_set(self):
+        """Test token statuses are resolved without per-token queries."""
+        from flashcards.known_words import get_known_word_set
+        
+        UserVocabulary.objects.create(user=self.user, language='de', key='sehen', status='known')
+        UserVocabulary.objects.create(user=self.user, language='de', key='hund', status='unknown')
+        get_known_word_set(self.user, 'de')
+        
+        response = self.client.get(f'/api/flashcards/reader/lessons/{self.lesson.lesson_id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = {token['text']: token['status'] for token in response.data['tokens']}
+        self.assertEqual(statuses, {'Er': None, 'sah': 'known', 'den': None, 'Hund': 'unknown'})
+
+
+class LexemeTests(APITestCase):
+    """Test lexeme interning for tokens."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def _create(self, text, language='de'):
+        lemmas = {'sah': 'sehen', 'sieht': 'sehen'}
+        with patch('flashcards.tokenization.lemmatize_token', side_effect=lambda text, *args, **kwargs: lemmas.get(text.lower())):
+            response = self.client.post('/api/flashcards/reader/lessons/',
+                                        {'title': 'Lesson', 'text': text, 'language': language}, format='json')
+        return Lesson.objects.get(lesson_id=response.data['lesson_id'])
+    
+    def test_tokens_share_lexemes(self):
+        """Test repeated forms across lessons point at one lexeme per language."""
+        from flashcards.models import Lexeme
+        
+        first = self._create('Er sah den Hund. Er sah ihn.')
+        second = self._create('Sie sah den Hund.')
+        self._create('Hund', language='es')
+        
+        sah_lexemes = set(Token.objects.filter(lexeme__normalized='sah').values_list('lexeme_id', flat=True))
+        self.assertEqual(len(sah_lexemes), 1)
+        lexeme = Lexeme.objects.get(lexeme_id=sah_lexemes.pop())
+        self.assertEqual((lexeme.language, lexeme.lemma, lexeme.key), ('de', 'sehen', 'sehen'))
+        
+        hund = Lexeme.objects.get(language='de', normalized='hund')
+        self.assertEqual((hund.lemma, hund.key), ('', 'hund'))
+        self.assertEqual(hund.tokens.filter(lesson__in=[first, second]).count(), 2)
+        self.assertTrue(Lexeme.objects.filter(language='es', normalized='hund').exists())
+        self.assertFalse(Token.objects.filter(lexeme__isnull=True).exists())
+    
+    def test_assign_lexemes_links_unsaved_tokens(self):
+        """Test tokens built outside ingestion are linked with one interning pass and no per-save query."""
+        lesson = Lesson.objects.create(user=self.user, title='Lesson', text='sah sah', language='de')
+        tokens = [
+            Token(lesson=lesson, text='sah', start_offset=0, end_offset=3),
+            Token(lesson=lesson, text='sah', start_offset=4, end_offset=7),
+        ]
+        assign_lexemes('de', tokens, [('sah', 'sehen'), ('sah', 'sehen')])
+        self.assertEqual(tokens[0].lexeme_id, tokens[1].lexeme_id)
+        with self.assertNumQueries(1):
+            tokens[0].save()
+        self.assertEqual(Token.objects.get(pk=tokens[0].pk).lexeme.key, 'sehen')
+    
+    def test_token_without_lexeme_is_rejected(self):
+        """Test a token row can't be inserted without its lexeme, so lexeme joins see every token."""
+        from django.db import IntegrityError, transaction
+        lesson = Lesson.objects.create(user=self.user, title='Lesson', text='sah', language='de')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Token.objects.create(lesson=lesson, text='sah', start_offset=0, end_offset=3)
+
+
+class PackedTokenStorageTests(APITestCase):
+    """Test lessons stored with packed tokens and lazily materialized Token rows."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.lemmas = {'sah': 'sehen', 'sieht': 'sehen'}
+    
+    def _create(self, text):
+        with self.settings(PACKED_TOKEN_STORAGE=True), \
+                patch('flashcards.tokenization.lemmatize_token',
+                      side_effect=lambda text, *args, **kwargs: self.lemmas.get(text.lower())):
+            response = self.client.post('/api/flashcards/reader/lessons/',
+                                        {'title': 'Lesson', 'text': text, 'language': 'de'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Lesson.objects.get(lesson_id=response.data['lesson_id'])
+    
+    def test_lesson_is_stored_packed(self):
+        """Test no Token rows are written and the packed stream matches the tokenizer."""
+        from flashcards.packed_tokens import PackedTokens, iter_packed_tokens
+        
+        lesson = self._create('Er sah den Hund. Sie sieht ihn.')
+        expected = list(tokenize_text(lesson.text, 'de'))
+        self.assertFalse(lesson.tokens.exists())
+        self.assertEqual(lesson.packed_token_count, len(expected))
+        self.assertEqual(lesson.count_tokens(), len(expected))
+        
+        packed = PackedTokens(lesson.packed_tokens)
+        self.assertEqual(list(packed.starts), [token['start_offset'] for token in expected])
+        tokens = list(iter_packed_tokens(lesson))
+        self.assertEqual([token['text'] for token in tokens], [token['text'] for token in expected])
+        self.assertEqual(tokens[1]['vocabulary_key'], 'sehen')
+        self.assertFalse(tokens[4]['is_word'])
+    
+    def test_detail_and_materialize(self):
+        """Test lesson detail serves packed tokens and a click-time row is created once."""
+        lesson = self._create('Er sah den Hund.')
+        UserVocabulary.objects.create(user=self.user, language='de', key='sehen', status='known')
+        
+        response = self.client.get(f'/api/flashcards/reader/lessons/{lesson.lesson_id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tokens = response.data['tokens']
+        self.assertEqual([token['text'] for token in tokens], ['Er', 'sah', 'den', 'Hund', '.'])
+        self.assertIsNone(tokens[1]['token_id'])
+        self.assertEqual((tokens[1]['index'], tokens[1]['status']), (1, 'known'))
+        
+        url = f'/api/flashcards/reader/lessons/{lesson.lesson_id}/tokens/1/materialize/'
+        first = self.client.post(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual((first.data['text'], first.data['lemma'], first.data['status']), ('sah', 'sehen', 'known'))
+        self.assertEqual(self.client.post(url).data['token_id'], first.data['token_id'])
+        self.assertEqual(lesson.tokens.count(), 1)
+        
+        tokens = self.client.get(f'/api/flashcards/reader/lessons/{lesson.lesson_id}/').data['tokens']
+        self.assertEqual(tokens[1]['token_id'], first.data['token_id'])
+        self.assertIsNone(tokens[2]['token_id'])
+        
+        missing = self.client.post(f'/api/flashcards/reader/lessons/{lesson.lesson_id}/tokens/99/materialize/')
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_coverage_frequencies_and_bulk_status(self):
+        """Test coverage, frequency index and bulk marking read the packed stream."""
+        from flashcards.models import LemmaFrequency, LessonCoverage
+        
+        lesson = self._create('Er sah den Hund. Er sieht ihn.')
+        self.assertEqual(
+            LemmaFrequency.objects.get(user=self.user, lemma='sehen').occurrence_count, 2
+        )
+        self.client.get('/api/flashcards/reader/lessons/')
+        self.assertEqual(LessonCoverage.objects.get(lesson=lesson).unknown_words, 5)
+        
+        self.client.post('/api/flashcards/reader/tokens/status/bulk/',
+                         {'status': 'known', 'lesson_id': lesson.lesson_id, 'words': ['sah']}, format='json')
+        coverage = LessonCoverage.objects.get(lesson=lesson)
+        self.assertEqual((coverage.unknown_words, coverage.known_words), (4, 2))
+        
+        self.client.post('/api/flashcards/reader/tokens/status/bulk/',
+                         {'status': 'known', 'lesson_id': lesson.lesson_id, 'only_unmarked': True}, format='json')
+        self.assertEqual(LessonCoverage.objects.get(lesson=lesson).known_percentage, 100.0)
+        
+        self.client.delete(f'/api/flashcards/reader/lessons/{lesson.lesson_id}/delete/')
+        self.assertFalse(LemmaFrequency.objects.filter(user=self.user).exists())
+    
+    def test_status_change_does_not_unpack_lessons(self):
+        """Test coverage deltas for packed lessons come from their key counts, not their blobs."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from flashcards.coverage import apply_vocabulary_change, ensure_lesson_coverage
+        from flashcards.models import LessonCoverage, LessonKeyCount
+        
+        lesson = self._create('Er sah den Hund. Er sieht ihn.')
+        self._create('Ein anderer Text.')
+        self.assertEqual(dict(lesson.key_counts.values_list('key', 'occurrences'))['sehen'], 2)
+        ensure_lesson_coverage(self.user)
+        
+        with CaptureQueriesContext(connection) as queries:
+            apply_vocabulary_change(self.user, 'de', ['sehen'], now_known=True)
+        self.assertFalse([query['sql'] for query in queries if 'packed_tokens' in query['sql']])
+        coverage = LessonCoverage.objects.get(lesson=lesson)
+        self.assertEqual((coverage.unknown_words, coverage.known_words, coverage.known_percentage), (4, 2, 28.6))
+        
+        lesson.delete()
+        self.assertFalse(LessonKeyCount.objects.filter(lesson_id=lesson.lesson_id).exists())
+    
+    def test_materialize_returns_row_created_concurrently(self):
+        """Test a row inserted by another request after the existence check is reused, not duplicated."""
+        from django.db import IntegrityError, transaction
+        from flashcards.packed_tokens import materialize_token
+        
+        lesson = self._create('Er sah den Hund.')
+        other = materialize_token(lesson, 1)
+        with patch('django.db.models.query.QuerySet.first', return_value=None):
+            self.assertEqual(materialize_token(lesson, 1).token_id, other.token_id)
+        self.assertEqual(lesson.tokens.count(), 1)
+        
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Token.objects.create(lesson=lesson, text='sah', lexeme=_lexeme(lesson, 'sah'), start_offset=3, end_offset=6)
+    
+    @patch('flashcards.translation_service.translate_text', return_value='saw the dog')
+    def test_phrase_materializes_tokens(self, mock_translate):
+        """Test phrase creation on a packed lesson materializes its boundary tokens."""
+        lesson = self._create('Er sah den Hund.')
+        response = self.client.post('/api/flashcards/reader/phrases/create/',
+                                    {'lesson_id': lesson.lesson_id, 'start_offset': 3, 'end_offset': 15}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['phrase']['text'], 'sah den Hund')
+        self.assertEqual(sorted(lesson.tokens.values_list('text', flat=True)), ['Hund', 'sah'])
+
+
+class PhraseMatcherTests(APITestCase):
+    """Test cross-lesson saved-phrase matching."""
+    
+    def setUp(self):
+        cache.clear()
+        phrase_matcher.clear_local_matchers()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.first = self._lesson('Ich habe keine Ahnung.')
+        self.second = self._lesson('Sie hat keine Ahnung, ehrlich. Keine Ahnung!')
+    
+    def _lesson(self, text):
+        lesson = Lesson.objects.create(user=self.user, title='Lesson', text=text, language='de')
+        for token in tokenize_text(text, 'de'):
+            Token.objects.create(lesson=lesson, text=token['text'], lexeme=_lexeme(lesson, token['normalized'], token['lemma']), start_offset=token['start_offset'], end_offset=token['end_offset'])
+        return lesson
+    
+    def _save_phrase(self, lesson, start, end):
+        with patch('flashcards.translation_service.translate_text', return_value='no idea'):
+            response = self.client.post('/api/flashcards/reader/phrases/create/',
+                                        {'lesson_id': lesson.lesson_id, 'start_offset': start, 'end_offset': end},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['phrase']['phrase_id']
+    
+    def test_automaton_finds_overlapping_patterns(self):
+        """Test every occurrence is reported, including patterns that are suffixes of others."""
+        from flashcards.phrase_matcher import PhraseMatcher
+        
+        matcher = PhraseMatcher()
+        for phrase_id, words in enumerate([['he'], ['she'], ['his'], ['she', 'he', 'his'], ['he', 'his']], start=1):
+            matcher.add(phrase_id, words)
+        found = sorted(matcher.find(['she', 'he', 'his', 'x', 'he']))
+        self.assertEqual(found, [
+            (0, 0, frozenset({2})),
+            (0, 2, frozenset({4})),
+            (1, 1, frozenset({1})),
+            (1, 2, frozenset({5})),
+            (2, 2, frozenset({3})),
+            (4, 4, frozenset({1})),
+        ])
+        
+        matcher.remove(4)
+        self.assertNotIn((0, 2, frozenset({4})), list(matcher.find(['she', 'he', 'his'])))
+    
+    def test_saved_phrase_is_highlighted_in_other_lessons(self):
+        """Test a phrase saved in one lesson is matched in another, across punctuation and case."""
+        phrase_id = self._save_phrase(self.first, 9, 21)
+        
+        response = self.client.get(f'/api/flashcards/reader/lessons/{self.second.lesson_id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        matches = response.data['saved_phrase_matches']
+        self.assertEqual([(match['start_offset'], match['end_offset']) for match in matches], [(8, 20), (31, 43)])
+        self.assertEqual(matches[0]['phrase_ids'], [phrase_id])
+    
+    def test_matcher_is_patched_incrementally(self):
+        """Test saving and deleting phrases update the cached automaton without a rebuild."""
+        from flashcards.models import Phrase
+        from flashcards.phrase_matcher import get_phrase_matcher
+        
+        matcher = get_phrase_matcher(self.user, 'de')
+        self.assertEqual(len(matcher), 0)
+        # The local automaton is patched when the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            phrase_id = self._save_phrase(self.first, 9, 21)
+        # Only the version is read
+        with self.assertNumQueries(1):
+            self.assertIs(get_phrase_matcher(self.user, 'de'), matcher)
+        self.assertEqual(len(matcher), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Phrase.objects.get(phrase_id=phrase_id).delete()
+        self.assertIs(get_phrase_matcher(self.user, 'de'), matcher)
+        self.assertEqual(len(matcher), 0)
+    
+    def test_lesson_delete_rebuilds_matcher(self):
+        """Test phrases removed with their lesson stop matching."""
+        from flashcards.phrase_matcher import get_phrase_matcher
+        
+        self._save_phrase(self.first, 9, 21)
+        matcher = get_phrase_matcher(self.user, 'de')
+        self.client.delete(f'/api/flashcards/reader/lessons/{self.first.lesson_id}/delete/')
+        rebuilt = get_phrase_matcher(self.user, 'de')
+        self.assertIsNot(rebuilt, matcher)
+        self.assertEqual(len(rebuilt), 0)
+        response = self.client.get(f'/api/flashcards/reader/lessons/{self.second.lesson_id}/')
+        self.assertEqual(response.data['saved_phrase_matches'], [])
+    
+    def test_phrase_saved_by_other_process_is_matched(self):
+        """Test a worker rebuilds its automaton after another worker saved a phrase."""
+        from flashcards.phrase_matcher import get_phrase_matcher
+        
+        matcher = get_phrase_matcher(self.user, 'de')
+        this_process = dict(phrase_matcher._local_matchers)
+        
+        # Another worker: empty in-process automata and its own (LocMem) cache
+        other_cache = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-worker'}}
+        with self.settings(CACHES=other_cache):
+            phrase_matcher.clear_local_matchers()
+            self._save_phrase(self.first, 9, 21)
+        
+        phrase_matcher.clear_local_matchers()
+        phrase_matcher._local_matchers.update(this_process)
+        rebuilt = get_phrase_matcher(self.user, 'de')
+        self.assertIsNot(rebuilt, matcher)
+        self.assertEqual(len(rebuilt), 1)
+    
+    def test_local_matchers_are_bounded(self):
+        """Test the least recently used automaton is dropped beyond the configured size."""
+        from flashcards.phrase_matcher import get_phrase_matcher
+        
+        with self.settings(PHRASE_MATCHER_LOCAL_CACHE_SIZE=2):
+            for language in ['de', 'es', 'fr']:
+                get_phrase_matcher(self.user, language)
+        self.assertEqual(list(phrase_matcher._local_matchers), [(self.user.pk, 'es'), (self.user.pk, 'fr')])
+
+
+class GlossaryTests(APITestCase):
+    """Test the shared per-language glossary."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='glossaryuser',
+            email='glossary@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.entry = {'word': 'Haus', 'meanings': [{'definition': 'house'}]}
+
+    def _lesson_with_token(self, title, text='Das Haus'):
+        lesson = Lesson.objects.create(user=self.user, title=title, text=text, language='de')
+        token = Token.objects.create(lesson=lesson, text='Haus', lexeme=_lexeme(lesson, 'haus'), start_offset=4, end_offset=8)
+        return lesson, token
+
+    @patch('flashcards.dictionary_service.get_dictionary_entry')
+    @patch('flashcards.translation_service.get_word_translation')
+    @patch('flashcards.translation_service.translate_text', return_value='The house')
+    def test_click_in_second_lesson_uses_glossary(self, mock_translate, mock_word_translate, mock_dictionary):
+        """Test a word looked up in one lesson is answered from the glossary in another."""
+        mock_word_translate.return_value = {'translation': 'house'}
+        mock_dictionary.return_value = self.entry
+        _, first = self._lesson_with_token('Eins')
+        _, second = self._lesson_with_token('Zwei')
+
+        self.client.get(f'/api/flashcards/reader/tokens/{first.token_id}/click/')
+        response = self.client.get(f'/api/flashcards/reader/tokens/{second.token_id}/click/')
+
+        self.assertEqual(response.data['token']['translation'], 'house')
+        self.assertEqual(mock_word_translate.call_count, 1)
+        self.assertEqual(mock_dictionary.call_count, 1)
+        second.refresh_from_db()
+        self.assertEqual(second.dictionary_entry, self.entry)
+
+    def test_new_lesson_tokens_are_pre_annotated(self):
+        """Test tokens inserted for a new lesson get glossary translations in bulk."""
+        from flashcards import glossary
+        from flashcards.ingestion import bulk_insert_tokens
+        glossary.record('de', 'en', 'haus', translation='house', dictionary_entry=self.entry)
+        lesson = Lesson.objects.create(user=self.user, title='Neu', text='Das Haus.', language='de')
+
+        bulk_insert_tokens(lesson, tokenize_text(lesson.text, 'de'), packed=False)
+
+        haus = lesson.tokens.get(lexeme__normalized='haus')
+        self.assertEqual(haus.translation, 'house')
+        self.assertEqual(haus.dictionary_entry, self.entry)
+        self.assertIsNone(lesson.tokens.get(lexeme__normalized='das').translation)
+
+    def test_lookup_falls_back_to_lemma_dictionary_entry(self):
+        """Test an inflected form borrows its lemma's dictionary entry."""
+        from flashcards import glossary
+        glossary.record('de', 'en', 'sehen', translation='to see', dictionary_entry={'meanings': [{'definition': 'see'}]})
+        glossary.record('de', 'en', 'sah', lemma='sehen', translation='saw')
+
+        known = glossary.lookup('de', 'en', 'sah', 'sehen')
+
+        self.assertEqual(known['translation'], 'saw')
+        self.assertEqual(known['dictionary_entry'], {'meanings': [{'definition': 'see'}]})
+        self.assertIsNone(glossary.lookup('fr', 'en', 'sah', 'sehen'))
+
+    def test_add_to_flashcards_records_and_reads_glossary(self):
+        """Test a card's back fills a glossary gap and a blank back is filled from the glossary."""
+        from flashcards.models import GlossaryEntry
+        lesson, token = self._lesson_with_token('Eins')
+        url = '/api/flashcards/reader/add-to-flashcards/'
+
+        self.client.post(url, {
+            'token_id': token.token_id, 'front': 'Haus', 'back': 'house', 'lesson_id': lesson.lesson_id,
+        }, format='json')
+        entry = GlossaryEntry.objects.get(source_lang='de', normalized='haus')
+        self.assertEqual((entry.translation, entry.source), ('house', 'flashcard'))
+
+        other_lesson, other_token = self._lesson_with_token('Zwei')
+        response = self.client.post(url, {
+            'token_id': other_token.token_id, 'front': 'Haus', 'lesson_id': other_lesson.lesson_id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Card.objects.get(card_id=response.data['card_id']).back, 'house')
+
+    def test_add_to_flashcards_without_known_translation(self):
+        """Test a blank back is rejected when nothing is known about the word."""
+        lesson, token = self._lesson_with_token('Eins')
+        response = self.client.post('/api/flashcards/reader/add-to-flashcards/', {
+            'token_id': token.token_id, 'front': 'Haus', 'back': '', 'lesson_id': lesson.lesson_id,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TokenLookupAPITests(APITestCase):
+    """Test the cache-only batch token lookup endpoint."""
+
+    def setUp(self):
+        from flashcards import translation_memory
+        cache.clear()
+        translation_memory.clear_local()
+        self.user = User.objects.create_user(
+            username='lookupuser',
+            email='lookup@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.lesson = Lesson.objects.create(user=self.user, title='Lookup', text='Das Haus sah gut aus', language='de')
+        self.haus = Token.objects.create(lesson=self.lesson, text='Haus', lexeme=_lexeme(self.lesson, 'haus'), start_offset=4, end_offset=8,
+                                         translation='house')
+        self.sah = Token.objects.create(lesson=self.lesson, text='sah', lexeme=_lexeme(self.lesson, 'sah', 'sehen'),
+                                        start_offset=9, end_offset=12)
+        self.gut = Token.objects.create(lesson=self.lesson, text='gut', lexeme=_lexeme(self.lesson, 'gut'), start_offset=13, end_offset=16)
+        self.url = '/api/flashcards/reader/tokens/lookup/'
+
+    @patch('flashcards.dictionary_service.http_client.get')
+    @patch('flashcards.translation_service.http_client.post')
+    def test_lookup_reads_rows_glossary_and_cache_only(self, mock_post, mock_get):
+        """Test translations come from token rows, the glossary and the caches without network calls."""
+        from flashcards import glossary, translation_memory
+        entry = {'meanings': [{'definition': 'see'}]}
+        glossary.record('de', 'en', 'sehen', translation='to see', dictionary_entry=entry)
+        translation_memory.store('sah', 'de', 'en', 'saw')
+
+        response = self.client.post(self.url, {
+            'token_ids': [self.haus.token_id, self.sah.token_id, self.gut.token_id]
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tokens = {item['token_id']: item for item in response.data['tokens']}
+        self.assertEqual(tokens[self.haus.token_id]['translation'], 'house')
+        self.assertEqual(tokens[self.sah.token_id]['translation'], 'saw')
+        self.assertEqual(tokens[self.sah.token_id]['dictionary_entry'], entry)
+        self.assertIsNone(tokens[self.gut.token_id]['translation'])
+        self.assertEqual(response.data['missing'], [{'token_id': self.gut.token_id}])
+        mock_post.assert_not_called()
+        mock_get.assert_not_called()
+
+    def test_lookup_uses_cached_dictionary_entry(self):
+        """Test dictionary entries cached by earlier clicks are returned."""
+        entry = {'meanings': [{'definition': 'good'}]}
+        cache.set('dictionary:de:gut', entry)
+
+        response = self.client.post(self.url, {'token_ids': [self.gut.token_id]}, format='json')
+
+        self.assertEqual(response.data['tokens'][0]['dictionary_entry'], entry)
+
+    def test_lookup_ignores_other_users_tokens(self):
+        """Test tokens of other users' lessons are left out."""
+        other_user = User.objects.create_user(username='lookupother', password='testpass123')
+        other_lesson = Lesson.objects.create(user=other_user, title='Other', text='Haus', language='de')
+        other_token = Token.objects.create(lesson=other_lesson, text='Haus', lexeme=_lexeme(other_lesson, 'haus'), start_offset=0,
+                                           end_offset=4, translation='house')
+
+        response = self.client.post(self.url, {'token_ids': [other_token.token_id]}, format='json')
+
+        self.assertEqual(response.data['tokens'], [])
+
+    def test_lookup_packed_lesson_indexes(self):
+        """Test packed lesson tokens are looked up by index."""
+        from flashcards import glossary
+        from flashcards.ingestion import bulk_insert_tokens
+        glossary.record('de', 'en', 'haus', translation='house')
+        lesson = Lesson.objects.create(user=self.user, title='Packed', text='Das Haus', language='de')
+        bulk_insert_tokens(lesson, tokenize_text(lesson.text, 'de'), packed=True)
+
+        response = self.client.post(self.url, {'lesson_id': lesson.lesson_id, 'indexes': [0, 1]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        tokens = {item['index']: item for item in response.data['tokens']}
+        self.assertEqual(tokens[1]['translation'], 'house')
+        self.assertEqual(response.data['missing'], [{'index': 0}])
+
+    def test_lookup_validation(self):
+        """Test invalid requests are rejected."""
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(self.url, {'token_ids': ['x']}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(self.url, {'indexes': [0]}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        from flashcards.views import TokenLookupAPIView
+        too_many = list(range(TokenLookupAPIView.MAX_TOKENS + 1))
+        self.assertEqual(self.client.post(self.url, {'token_ids': too_many}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class TranslateManyTests(APITestCase):
+    """Test batched multi-text translation."""
+
+    def setUp(self):
+        from flashcards import translation_memory
+        translation_memory.clear_local()
+
+    def _deepl_response(self, texts):
+        response = MagicMock()
+        response.json.return_value = {'translations': [{'text': text.upper()} for text in texts]}
+        return response
+
+    @patch('flashcards.translation_service.DEEPL_API_KEY', 'test-deepl-key')
+    @patch('flashcards.translation_service.http_client.post')
+    def test_translate_many_deduplicates_and_uses_cache(self, mock_post):
+        """Test duplicates are sent once, stored texts are not sent and results are stored."""
+        from flashcards import translation_memory
+        from flashcards.translation_service import translate_many
+        mock_post.side_effect = lambda url, service, data: self._deepl_response(data['text'])
+        translation_memory.store('Hallo', 'de', 'en', 'Hello')
+
+        translations = translate_many(['Hallo', 'Welt', 'Haus', 'Welt', ''], 'de', 'en')
+
+        self.assertEqual(translations, ['Hello', 'WELT', 'HAUS', 'WELT', None])
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(mock_post.call_args.kwargs['data']['text'], ['Welt', 'Haus'])
+        self.assertEqual(translation_memory.lookup('Haus', 'de', 'en'), 'HAUS')
+        # translate_text reads the same entries
+        self.assertEqual(translate_text('Welt', 'de', 'en'), 'WELT')
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch('flashcards.translation_service.DEEPL_API_KEY', 'test-deepl-key')
+    @patch('flashcards.translation_service.DEEPL_MAX_TEXTS_PER_REQUEST', 2)
+    @patch('flashcards.translation_service.DEEPL_MAX_REQUEST_CHARS', 10)
+    @patch('flashcards.translation_service.http_client.post')
+    def test_translate_many_limits_batch_size(self, mock_post):
+        """Test requests are split by text count and total length."""
+        from flashcards.translation_service import translate_many
+        mock_post.side_effect = lambda url, service, data: self._deepl_response(data['text'])
+
+        translate_many(['a', 'b', 'c', 'dddddddd', 'eeee'], 'de', 'en')
+
+        batches = [call.kwargs['data']['text'] for call in mock_post.call_args_list]
+        self.assertEqual(batches, [['a', 'b'], ['c', 'dddddddd'], ['eeee']])
+
+    @patch('flashcards.translation_service.DEEPL_API_KEY', 'test-deepl-key')
+    @patch('flashcards.translation_service.http_client.post')
+    def test_translate_many_failed_batch_returns_none(self, mock_post):
+        """Test a failing request leaves its texts untranslated and unstored."""
+        from flashcards import translation_memory
+        from flashcards.translation_service import translate_many
+        mock_post.side_effect = Exception('boom')
+
+        self.assertEqual(translate_many(['Hallo'], 'de', 'en'), [None])
+        self.assertIsNone(translation_memory.lookup('Hallo', 'de', 'en'))
+
+    @patch('flashcards.translation_service.translate_many')
+    def test_translate_api_accepts_texts(self, mock_translate_many):
+        """Test the translate endpoint translates a list of texts in one call."""
+        mock_translate_many.return_value = ['Hello', 'World']
+        user = User.objects.create_user(username='batchtranslate', password='testpass123')
+        self.client.force_authenticate(user=user)
+
+        response = self.client.post('/api/flashcards/reader/translate/', {
+            'texts': ['Hallo', 'Welt'], 'source_lang': 'de', 'target_lang': 'en'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['translations'], ['Hello', 'World'])
+        mock_translate_many.assert_called_once_with(['Hallo', 'Welt'], 'de', 'en')
+
+    @patch('flashcards.translation_service.translate_many')
+    def test_lesson_translate_sentences(self, mock_translate_many):
+        """Test a lesson's untranslated sentences are translated in one batch."""
+        mock_translate_many.side_effect = lambda texts, source, target: [text.upper() for text in texts]
+        user = User.objects.create_user(username='lessontranslate', password='testpass123')
+        self.client.force_authenticate(user=user)
+        lesson = Lesson.objects.create(user=user, title='Satz', text='Hallo Welt. Das ist gut. Ja!', language='de')
+        lesson.set_sentence_translation(1, 'That is good.')
+
+        response = self.client.post(f'/api/flashcards/reader/lessons/{lesson.lesson_id}/translate-sentences/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['translated'], 2)
+        mock_translate_many.assert_called_once_with(['Hallo Welt.', 'Ja!'], 'de', 'en')
+        self.assertEqual(response.data['sentence_translations'], {0: 'HALLO WELT.', 1: 'That is good.', 2: 'JA!'})
+        self.assertEqual(lesson.get_sentence_translation(2), 'JA!')
+
+
+class SentenceTranslationTests(TestCase):
+    """Test per-sentence translation rows."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sentencerows', password='testpass')
+        self.lesson = Lesson.objects.create(user=self.user, title='Rows', text='Eins. Zwei.', language='de')
+
+    def test_set_sentence_translation_upserts(self):
+        """Test writing a sentence twice keeps one row with the latest translation."""
+        from flashcards.models import SentenceTranslation
+        self.lesson.set_sentence_translation(0, 'One.')
+        self.lesson.set_sentence_translations({0: 'One!', 1: 'Two.'})
+
+        self.assertEqual(SentenceTranslation.objects.filter(lesson=self.lesson).count(), 2)
+        self.assertEqual(self.lesson.get_sentence_translation(0), 'One!')
+        self.assertIsNone(self.lesson.get_sentence_translation(5))
+        self.assertIsNone(self.lesson.get_sentence_translation(None))
+
+    def test_text_change_clears_sentence_translations(self):
+        """Test editing the text drops translations keyed by the old sentence indexes."""
+        self.lesson.set_sentence_translation(0, 'One.')
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.patch(
+            f'/api/flashcards/reader/lessons/{self.lesson.lesson_id}/update/', {'text': 'Drei. Vier.'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.lesson.get_sentence_translations(), {})
+
+
+class HttpClientTests(TestCase):
+    """Test the pooled outbound HTTP client."""
+
+    def setUp(self):
+        from flashcards import http_client
+        http_client.reset()
+        cache.clear()
+
+    def _response(self, status_code, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        return response
+
+    def test_sessions_are_shared_per_host(self):
+        """Test requests to one host reuse a keep-alive session."""
+        from flashcards import http_client
+        first = http_client.get_session('https://api-free.deepl.com/v2/translate')
+        second = http_client.get_session('https://api-free.deepl.com/v2/usage')
+        other = http_client.get_session('https://en.wiktionary.org/api/rest_v1/page/definition/haus')
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    @patch('flashcards.http_client.time.sleep')
+    @patch('requests.Session.request')
+    def test_get_retries_with_backoff(self, mock_request, mock_sleep):
+        """Test GET requests are retried on retryable statuses and errors, honoring Retry-After."""
+        import requests
+        from flashcards import http_client
+        mock_request.side_effect = [
+            self._response(503, {'Retry-After': '2'}),
+            requests.exceptions.ConnectionError('reset'),
+            self._response(200),
+        ]
+
+        response = http_client.get('https://en.wiktionary.org/x', service='wiktionary')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[0].args[0], 2.0)
+        self.assertLessEqual(mock_sleep.call_args_list[1].args[0], http_client.BACKOFF_BASE * 2)
+        self.assertEqual(mock_request.call_args.kwargs['timeout'], http_client.SERVICES['wiktionary']['timeout'])
+        stats = http_client.latency_stats()['https://en.wiktionary.org']
+        self.assertEqual((stats['requests'], stats['errors'], stats['retries']), (3, 2, 2))
+
+    @patch('flashcards.http_client.time.sleep')
+    @patch('requests.Session.request')
+    def test_post_is_not_resent_after_read_timeout(self, mock_request, mock_sleep):
+        """Test a POST that may have reached the server is not retried."""
+        import requests
+        from flashcards import http_client
+        mock_request.side_effect = requests.exceptions.ReadTimeout('slow')
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            http_client.post('https://api-free.deepl.com/v2/translate', service='deepl', data={})
+        self.assertEqual(mock_request.call_count, 1)
+
+        mock_request.reset_mock()
+        mock_request.side_effect = [requests.exceptions.ConnectTimeout('down'), self._response(429), self._response(200)]
+        response = http_client.post('https://api-free.deepl.com/v2/translate', service='deepl', data={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch('flashcards.http_client.time.sleep')
+    @patch('requests.Session.request')
+    def test_retries_are_bounded(self, mock_request, mock_sleep):
+        """Test the last response is returned once the retry budget is spent."""
+        from flashcards import http_client
+        mock_request.return_value = self._response(502)
+
+        response = http_client.get('https://en.wiktionary.org/x', service='wiktionary')
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(mock_request.call_count, 1 + http_client.SERVICES['wiktionary']['retries'])
+
+
+class SingleFlightTests(TestCase):
+    """Test coalescing of concurrent identical lookups."""
+
+    def setUp(self):
+        from flashcards import single_flight
+        cache.clear()
+        single_flight.reset_stats()
+
+    def _wait_for(self, condition):
+        import time
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def _run_concurrently(self, key, compute, followers=4):
+        """Start a leader blocked in compute, then followers; returns (threads, results, release event)."""
+        import threading
+        from flashcards import single_flight
+        release = threading.Event()
+        results = []
+
+        def blocked_compute():
+            release.wait(5)
+            return compute()
+
+        def call():
+            try:
+                results.append(single_flight.run(key, blocked_compute))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=call)]
+        threads[0].start()
+        self._wait_for(lambda: single_flight.stats()['in_flight'] == 1)
+        for _ in range(followers):
+            thread = threading.Thread(target=call)
+            thread.start()
+            threads.append(thread)
+        self._wait_for(lambda: single_flight.stats()['followers'] == followers)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test followers wait for the leader's result instead of computing."""
+        from flashcards import single_flight
+        compute = MagicMock(return_value='house')
+
+        results = self._run_concurrently('translate:haus', compute)
+
+        self.assertEqual(results, ['house'] * 5)
+        compute.assert_called_once()
+        self.assertEqual(single_flight.stats()['in_flight'], 0)
+        self.assertIsNone(cache.get('single_flight:translate:haus'))
+
+    def test_leader_exception_reaches_followers(self):
+        """Test a failing call fails all callers waiting on it."""
+        compute = MagicMock(side_effect=ValueError('quota'))
+
+        results = self._run_concurrently('translate:boom', compute, followers=2)
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        compute.assert_called_once()
+
+    @patch('flashcards.single_flight.POLL_INTERVAL', 0.001)
+    def test_waits_for_other_worker_result(self):
+        """Test a caller finding the cross-worker lock held picks up the stored result."""
+        from flashcards import single_flight
+        cache.add('single_flight:dictionary:de:haus', 1, 30)
+        lookup = MagicMock(side_effect=[None, None, {'meanings': ['house']}])
+        compute = MagicMock()
+
+        result = single_flight.run('dictionary:de:haus', compute, lookup=lookup)
+
+        self.assertEqual(result, {'meanings': ['house']})
+        compute.assert_not_called()
+        self.assertEqual(single_flight.stats()['remote_waits'], 1)
+
+    @patch('flashcards.single_flight.POLL_INTERVAL', 0.001)
+    def test_gives_up_waiting_for_stuck_worker(self):
+        """Test the service is called once the wait for another worker times out."""
+        from flashcards import single_flight
+        cache.add('single_flight:dictionary:de:haus', 1, 30)
+        compute = MagicMock(return_value={'meanings': ['house']})
+
+        result = single_flight.run('dictionary:de:haus', compute, lookup=lambda: None, wait_timeout=0.02)
+
+        self.assertEqual(result, {'meanings': ['house']})
+        compute.assert_called_once()
+
+    @patch('flashcards.translation_service.DEEPL_API_KEY', 'test-deepl-key')
+    @patch('flashcards.translation_service.translation_memory')
+    @patch('flashcards.translation_service.http_client.post')
+    def test_concurrent_translate_text_sends_one_request(self, mock_post, mock_memory):
+        """Test simultaneous translate_text calls for one text make one DeepL request."""
+        import threading
+        from flashcards import single_flight
+        mock_memory.lookup.return_value = None
+        mock_memory.make_memory_key.return_value = 'k'
+        release = threading.Event()
+        response = MagicMock()
+        response.json.return_value = {'translations': [{'text': 'Hello'}]}
+
+        def slow_post(*args, **kwargs):
+            release.wait(5)
+            return response
+        mock_post.side_effect = slow_post
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(translate_text('Hallo', 'de', 'en'))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        self._wait_for(lambda: single_flight.stats()['followers'] == 2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, ['Hello'] * 3)
+        self.assertEqual(mock_post.call_count, 1)
+
+
+class SentencePrefetchTests(TestCase):
+    """Test background sentence translation prefetch."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='prefetchuser', password='testpass')
+        self.lesson = Lesson.objects.create(
+            user=self.user, title='Prefetch', text='Eins. Zwei. Drei.', language='de'
+        )
+
+    @patch('flashcards.translation_service.translate_many')
+    def test_prefetch_respects_limit(self, mock_translate_many):
+        """Test only the first SENTENCE_TRANSLATION_PREFETCH_LIMIT sentences are translated."""
+        from flashcards.sentence_prefetch import prefetch_lesson_sentences
+        mock_translate_many.side_effect = lambda texts, source, target: [text.upper() for text in texts]
+
+        with self.settings(SENTENCE_TRANSLATION_PREFETCH_LIMIT=2):
+            translated = prefetch_lesson_sentences(self.lesson.lesson_id)
+
+        self.assertEqual(translated, 2)
+        mock_translate_many.assert_called_once_with(['Eins.', 'Zwei.'], 'de', 'en')
+        self.assertEqual(self.lesson.get_sentence_translations(), {0: 'EINS.', 1: 'ZWEI.'})
+
+    def test_prefetch_missing_lesson(self):
+        """Test a deleted lesson is skipped."""
+        from flashcards.sentence_prefetch import prefetch_lesson_sentences
+        self.assertEqual(prefetch_lesson_sentences(999999), 0)
+
+    @patch('flashcards.sentence_prefetch._get_executor')
+    def test_schedule_after_commit(self, mock_get_executor):
+        """Test the job is submitted once the transaction commits."""
+        from flashcards.sentence_prefetch import schedule_sentence_prefetch, _run
+
+        with self.settings(SENTENCE_TRANSLATION_PREFETCH=True):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                schedule_sentence_prefetch(self.lesson)
+                mock_get_executor.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        mock_get_executor.return_value.submit.assert_called_once_with(_run, self.lesson.lesson_id)
+
+    @patch('flashcards.sentence_prefetch._get_executor')
+    def test_schedule_disabled(self, mock_get_executor):
+        """Test nothing is scheduled when prefetch is disabled."""
+        from flashcards.sentence_prefetch import schedule_sentence_prefetch
+
+        with self.settings(SENTENCE_TRANSLATION_PREFETCH=False):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                schedule_sentence_prefetch(self.lesson)
+
+        self.assertEqual(callbacks, [])
+        mock_get_executor.assert_not_called()
+
+    @patch('flashcards.sentence_prefetch._get_executor')
+    def test_lesson_create_schedules_prefetch(self, mock_get_executor):
+        """Test creating a lesson through the API schedules a prefetch."""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        with self.settings(SENTENCE_TRANSLATION_PREFETCH=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post('/api/flashcards/reader/lessons/', {
+                    'title': 'Neu', 'text': 'Hallo Welt.', 'language': 'de'
+                }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        submitted_id = mock_get_executor.return_value.submit.call_args[0][1]
+        self.assertEqual(submitted_id, response.data['lesson_id'])
+
+
+class CircuitBreakerTests(TestCase):
+    """Test per-provider circuit breakers and request deadlines."""
+
+    def setUp(self):
+        from flashcards import http_client, translation_memory
+        cache.clear()
+        http_client.reset()
+        translation_memory.clear_local()
+
+    def _response(self, status_code):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = {}
+        return response
+
+    def _open(self, service, seconds=30):
+        import time
+        from flashcards import circuit_breaker
+        cache.set(circuit_breaker._open_key(service), time.time() + seconds, None)
+
+    def test_opens_on_failure_rate(self):
+        """Test the circuit opens once enough calls in the window failed."""
+        from flashcards import circuit_breaker
+        with self.settings(CIRCUIT_BREAKER_MIN_CALLS=4, CIRCUIT_BREAKER_FAILURE_RATE=0.5):
+            circuit_breaker.record_success('deepl')
+            circuit_breaker.record_success('deepl')
+            circuit_breaker.record_failure('deepl')
+            self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.CLOSED)
+            circuit_breaker.record_failure('deepl')
+
+        self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.OPEN)
+        self.assertFalse(circuit_breaker.allow('deepl'))
+        self.assertTrue(circuit_breaker.allow('wiktionary'))
+
+    def test_half_open_allows_one_probe(self):
+        """Test an expired open circuit lets one probe through and closes on its success."""
+        from flashcards import circuit_breaker
+        self._open('deepl', seconds=-1)
+
+        self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.HALF_OPEN)
+        self.assertTrue(circuit_breaker.allow('deepl'))
+        self.assertFalse(circuit_breaker.allow('deepl'))
+        circuit_breaker.record_success('deepl')
+        self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.CLOSED)
+        self.assertTrue(circuit_breaker.allow('deepl'))
+
+    def test_failed_probe_reopens(self):
+        """Test a failed probe opens the circuit again."""
+        from flashcards import circuit_breaker
+        self._open('deepl', seconds=-1)
+
+        self.assertTrue(circuit_breaker.allow('deepl'))
+        circuit_breaker.record_failure('deepl')
+        self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.OPEN)
+
+    def test_in_flight_results_ignored_while_not_closed(self):
+        """Test results of calls that are not the probe don't move an open or half-open circuit."""
+        import contextvars
+        from flashcards import circuit_breaker
+        self._open('deepl')
+
+        circuit_breaker.record_success('deepl')
+        self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.OPEN)
+
+        self._open('deepl', seconds=-1)
+        circuit_breaker.record_failure('deepl')
+        self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.HALF_OPEN)
+
+        # Another call claims the probe; this call's late success must not close the circuit
+        contextvars.copy_context().run(circuit_breaker.allow, 'deepl')
+        circuit_breaker.record_success('deepl')
+        self.assertEqual(circuit_breaker.state('deepl'), circuit_breaker.HALF_OPEN)
+        self.assertFalse(circuit_breaker.allow('deepl'))
+
+    @patch('flashcards.http_client.time.sleep')
+    @patch('requests.Session.request')
+    def test_http_client_trips_and_refuses(self, mock_request, mock_sleep):
+        """Test failing responses open the circuit and later requests are not sent."""
+        from flashcards import http_client
+        mock_request.return_value = self._response(503)
+
+        with self.settings(CIRCUIT_BREAKER_MIN_CALLS=2):
+            http_client.get('https://en.wiktionary.org/x', service='wiktionary', retries=0)
+            http_client.get('https://en.wiktionary.org/x', service='wiktionary', retries=0)
+            with self.assertRaises(http_client.CircuitOpenError):
+                http_client.get('https://en.wiktionary.org/x', service='wiktionary', retries=0)
+
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('requests.Session.request')
+    def test_deadline_clamps_timeouts(self, mock_request):
+        """Test timeouts are limited to the time left in the budget."""
+        from flashcards import deadline, http_client
+        mock_request.return_value = self._response(200)
+
+        with deadline.budget(1.0):
+            http_client.get('https://en.wiktionary.org/x', service='wiktionary')
+
+        connect_timeout, read_timeout = mock_request.call_args.kwargs['timeout']
+        self.assertLessEqual(connect_timeout, 1.0)
+        self.assertLessEqual(read_timeout, 1.0)
+
+    @patch('requests.Session.request')
+    def test_spent_deadline_fails_fast(self, mock_request):
+        """Test no request is sent once the budget is spent and the service is reported degraded."""
+        from flashcards import deadline, http_client
+
+        with deadline.budget(0) as budget:
+            with self.assertRaises(http_client.DeadlineExceeded):
+                http_client.get('https://en.wiktionary.org/x', service='wiktionary')
+
+        mock_request.assert_not_called()
+        self.assertEqual(budget.degraded, ['wiktionary'])
+
+    @patch('flashcards.http_client._backoff', return_value=5.0)
+    @patch('requests.Session.request')
+    def test_deadline_skips_retries_that_do_not_fit(self, mock_request, mock_backoff):
+        """Test a retry whose backoff would outlast the budget is not attempted."""
+        from flashcards import deadline, http_client
+        mock_request.return_value = self._response(503)
+
+        with deadline.budget(1.0):
+            response = http_client.get('https://en.wiktionary.org/x', service='wiktionary')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch('flashcards.translation_service.DEEPL_API_KEY', 'test-deepl-key')
+    @patch('requests.Session.request')
+    def test_token_click_degrades_when_circuits_open(self, mock_request):
+        """Test a click answers immediately with partial data while providers are down."""
+        user = User.objects.create_user(username='circuituser', password='testpass')
+        lesson = Lesson.objects.create(user=user, title='Kreis', text='Das Haus.', language='de')
+        token = Token.objects.create(lesson=lesson, text='Haus', lexeme=_lexeme(lesson, 'haus'), start_offset=4, end_offset=8)
+        self._open('deepl')
+        self._open('wiktionary')
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(f'/api/flashcards/reader/tokens/{token.token_id}/click/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_request.assert_not_called()
+        self.assertEqual(sorted(response.data['degraded']), ['deepl', 'wiktionary'])
+        self.assertIsNone(response.data['sentence_translation'])
+        self.assertEqual(response.data['sentence'], 'Das Haus.')
+
+    @patch('flashcards.tts_service.ELEVENLABS_API_KEY', 'test-elevenlabs-key')
+    @patch('requests.Session.request')
+    def test_tts_returns_503_when_providers_unavailable(self, mock_request):
+        """Test TTS fails fast with 503 while its providers' circuits are open."""
+        user = User.objects.create_user(username='ttscircuit', password='testpass')
+        self._open('elevenlabs')
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post('/api/flashcards/reader/generate-tts/', {'text': 'Hallo'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data['degraded'], ['elevenlabs'])
+        mock_request.assert_not_called()
+
+
+class TokenClickFanOutTests(APITestCase):
+    """Test concurrent lookups in token clicks."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fanoutuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.lesson = Lesson.objects.create(user=self.user, title='Parallel', text='Das Haus.', language='de')
+        self.token = Token.objects.create(
+            lesson=self.lesson, text='Haus', lexeme=_lexeme(self.lesson, 'haus'), start_offset=4, end_offset=8
+        )
+        self.entry = {'meanings': [{'part_of_speech': 'noun', 'definitions': ['house'], 'examples': []}]}
+
+    @patch('flashcards.dictionary_service.get_dictionary_entry')
+    @patch('flashcards.translation_service.get_word_translation')
+    @patch('flashcards.translation_service.translate_text')
+    def test_lookups_run_concurrently(self, mock_sentence_translate, mock_word_translate, mock_dictionary):
+        """Test the three lookups are in flight at the same time."""
+        import threading
+        # Each lookup only returns once all three have started
+        barrier = threading.Barrier(3, timeout=5)
+
+        def arrive(value):
+            barrier.wait()
+            return value
+
+        mock_word_translate.side_effect = lambda *args: arrive({'translation': 'house'})
+        mock_dictionary.side_effect = lambda *args, **kwargs: arrive(self.entry)
+        mock_sentence_translate.side_effect = lambda *args: arrive('The house.')
+
+        response = self.client.get(f'/api/flashcards/reader/tokens/{self.token.token_id}/click/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['degraded'], [])
+        self.assertEqual(response.data['token']['translation'], 'house')
+        self.assertEqual(response.data['token']['dictionary_entry'], self.entry)
+        self.assertEqual(response.data['sentence_translation'], 'The house.')
+        self.assertEqual(self.lesson.get_sentence_translation(0), 'The house.')
+
+    @patch('flashcards.dictionary_service.get_dictionary_entry')
+    @patch('flashcards.translation_service.get_word_translation')
+    @patch('flashcards.translation_service.translate_text')
+    def test_slow_lookup_returns_partial_result(self, mock_sentence_translate, mock_word_translate, mock_dictionary):
+        """Test a lookup still running at the deadline is left out and reported degraded."""
+        import threading
+        release = threading.Event()
+        mock_word_translate.return_value = {'translation': 'house'}
+        mock_sentence_translate.return_value = 'The house.'
+        mock_dictionary.side_effect = lambda *args, **kwargs: release.wait(5) and self.entry
+
+        try:
+            with self.settings(TOKEN_CLICK_DEADLINE_SECONDS=0.2):
+                response = self.client.get(f'/api/flashcards/reader/tokens/{self.token.token_id}/click/')
+        finally:
+            release.set()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['degraded'], ['wiktionary'])
+        self.assertEqual(response.data['token']['translation'], 'house')
+        self.assertEqual(response.data['sentence_translation'], 'The house.')
+        self.token.refresh_from_db()
+        self.assertFalse(self.token.dictionary_entry.get('meanings'))
+
+    @patch('flashcards.dictionary_service.get_dictionary_entry')
+    @patch('flashcards.translation_service.get_word_translation')
+    @patch('flashcards.translation_service.translate_text')
+    def test_failed_lookup_does_not_fail_click(self, mock_sentence_translate, mock_word_translate, mock_dictionary):
+        """Test an exception in one lookup leaves the others' results intact."""
+        mock_word_translate.side_effect = RuntimeError('boom')
+        mock_sentence_translate.return_value = 'The house.'
+        mock_dictionary.return_value = self.entry
+
+        response = self.client.get(f'/api/flashcards/reader/tokens/{self.token.token_id}/click/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['degraded'], ['deepl'])
+        self.assertEqual(response.data['token']['dictionary_entry'], self.entry)
+        self.assertEqual(response.data['sentence_translation'], 'The house.')
+
+    def test_pool_tasks_keep_persistent_connections(self):
+        """Test pool tasks only drop stale connections instead of closing them every time."""
+        from flashcards import lookup_pool
+
+        with patch('flashcards.lookup_pool.close_old_connections') as mock_close_old, \
+                patch('django.db.backends.base.base.BaseDatabaseWrapper.close') as mock_close:
+            self.assertEqual(lookup_pool.submit(lambda: 'done').result(timeout=5), 'done')
+
+        self.assertEqual(mock_close_old.call_count, 2)
+        mock_close.assert_not_called()
+
+
+class WiktionaryIndexTests(TestCase):
+    """Test the offline Wiktionary index and its use by the dictionary service."""
+
+    RECORDS = [
+        {'word': 'Haus', 'lang_code': 'de', 'pos': 'noun', 'senses': [
+            {'glosses': ['house'], 'examples': [{'text': 'Das Haus ist groß.'}]},
+            {'glosses': ['home']},
+        ], 'sounds': [{'ipa': '/haʊ̯s/'}, {'mp3_url': 'https://example.org/haus.mp3'}]},
+        {'word': 'sehen', 'lang_code': 'de', 'pos': 'verb', 'senses': [{'glosses': ['to see']}]},
+        {'word': 'casa', 'lang_code': 'es', 'pos': 'noun', 'senses': [{'glosses': ['house']}]},
+        {'word': 'leer', 'lang_code': 'de', 'pos': 'adj', 'senses': [{'tags': ['no-gloss']}]},
+        # Records of one word need not be adjacent
+        {'word': 'haus', 'lang_code': 'de', 'pos': 'verb', 'senses': [{'glosses': ['to dwell']}]},
+    ]
+
+    def setUp(self):
+        import json
+        import os
+        import tempfile
+        cache.clear()
+        self.tmpdir = tempfile.mkdtemp()
+        self.jsonl_path = os.path.join(self.tmpdir, 'kaikki.jsonl')
+        self.path = os.path.join(self.tmpdir, 'wiktionary.sqlite3')
+        with open(self.jsonl_path, 'w', encoding='utf-8') as f:
+            for record in self.RECORDS:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.write('not json\n')
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _build(self, languages=('de',)):
+        from flashcards.wiktionary_index import iter_kaikki_records, write_wiktionary_index
+        return write_wiktionary_index(self.path, iter_kaikki_records([self.jsonl_path], languages))
+
+    def test_build_index_in_entry_shape(self):
+        """Test records are grouped per word and stored in the dictionary entry shape."""
+        from flashcards.wiktionary_index import WiktionaryIndex
+        self.assertEqual(self._build(), 2)
+        index = WiktionaryIndex(self.path)
+
+        entry = index.lookup('de', 'haus')
+
+        self.assertEqual(entry, {
+            'meanings': [
+                {'part_of_speech': 'noun', 'definitions': ['house', 'home'], 'examples': ['Das Haus ist groß.']},
+                {'part_of_speech': 'verb', 'definitions': ['to dwell'], 'examples': []},
+            ],
+            'pronunciation': 'https://example.org/haus.mp3',
+            'source': 'wiktionary',
+        })
+        self.assertIsNone(index.lookup('de', 'leer'))
+        self.assertIsNone(index.lookup('es', 'casa'))
+        self.assertEqual(set(index.lookup_many('de', ['haus', 'sehen', 'baum'])), {'haus', 'sehen'})
+
+    @patch('flashcards.dictionary_service.http_client.get')
+    def test_dictionary_service_uses_index_without_network(self, mock_get):
+        """Test indexed words and lemmas are answered locally; other words still use the API."""
+        from flashcards.dictionary_service import get_cached_dictionary_entries
+        self._build()
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_get.return_value = mock_response
+
+        with self.settings(WIKTIONARY_INDEX_PATH=self.path):
+            entry = get_dictionary_entry('Haus!', 'de', 'en')
+            lemma_entry = get_dictionary_entry('sah', 'de', 'en', lemma='sehen')
+            mock_get.assert_not_called()
+            cached = get_cached_dictionary_entries(['Haus', 'sehen', 'Baum'], 'de')
+            self.assertIsNone(get_dictionary_entry('Baum', 'de', 'en'))
+
+        self.assertEqual(entry['meanings'][0]['definitions'], ['house', 'home'])
+        self.assertEqual(lemma_entry['meanings'][0]['definitions'], ['to see'])
+        self.assertEqual(set(cached), {'Haus', 'sehen'})
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_build_command(self):
+        """Test the management command writes the index."""
+        from io import StringIO
+        from django.core.management import call_command
+        from flashcards.wiktionary_index import WiktionaryIndex
+        out = StringIO()
+
+        call_command('build_wiktionary_index', self.jsonl_path, '--languages', 'de', 'es', '--output', self.path, stdout=out)
+
+        self.assertIn('Wrote 3 words', out.getvalue())
+        self.assertEqual(WiktionaryIndex(self.path).count(), 3)
+
+
+class DictionaryServiceTests(TestCase):
+    """Test dictionary service functionality."""
+    
+    def setUp(self):
+        # Misses are cached too; don't let one test's lookups answer another's
+        cache.clear()
+    
+    def test_get_wiktionary_language_code(self):
+        """Test language code mapping."""
+        self.assertEqual(get_wiktionary_language_code('es'), 'Spanish')
+        self.assertEqual(get_wiktionary_language_code('de'), 'German')
+        self.assertEqual(get_wiktionary_language_code('en'), 'English')
+        self.assertEqual(get_wiktionary_language_code('fr'), 'French')
+        self.assertEqual(get_wiktionary_language_code('it'), 'Italian')
+        self.assertEqual(get_wiktionary_language_code('pt'), 'Portuguese')
+        # Fallback for unknown languages
+        self.assertEqual(get_wiktionary_language_code('xx'), 'Xx')
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    @patch('flashcards.dictionary_service.cache')
+    def test_get_dictionary_entry_success(self, mock_cache, mock_get):
+        """Test successful dictionary entry retrieval."""
+        # Mock cache miss
+        mock_cache.get.return_value = None
+        
+        # Mock Wiktionary API response (actual structure)
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            'de': [
+                {
+                    'partOfSpeech': 'noun',
+                    'definitions': [
+                        {
+                            'definition': '<span>greeting, hello</span>'
+                        }
+                    ],
+                    'examples': [
+                        {'text': 'Hallo, wie geht es dir?'}
+                    ]
+                }
+            ]
+        }
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+        
+        result = get_dictionary_entry('Hallo', 'de', 'en')
+        
+        self.assertIsNotNone(result)
+        self.assertEqual(result['source'], 'wiktionary')
+        self.assertIn('meanings', result)
+        self.assertEqual(len(result['meanings']), 1)
+        self.assertEqual(result['meanings'][0]['part_of_speech'], 'noun')
+        self.assertIn('definitions', result['meanings'][0])
+        self.assertIn('examples', result['meanings'][0])
+        mock_cache.set.assert_called_once()
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    @patch('flashcards.dictionary_service.cache')
+    def test_get_dictionary_entry_cache_hit(self, mock_cache, mock_get):
+        """Test dictionary entry cache hit."""
+        cached_entry = {
+            'meanings': [{'part_of_speech': 'noun', 'definitions': ['hello'], 'examples': []}],
+            'source': 'wiktionary'
+        }
+        mock_cache.get.return_value = cached_entry
+        
+        result = get_dictionary_entry('Hallo', 'de', 'en')
+        
+        self.assertEqual(result, cached_entry)
+        mock_get.assert_not_called()
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    def test_get_dictionary_entry_not_found(self, mock_get):
+        """Test dictionary entry when word not found."""
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_get.return_value = mock_response
+        
+        result = get_dictionary_entry('NonexistentWord12345', 'de', 'en')
+        
+        self.assertIsNone(result)
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    def test_get_dictionary_entry_api_error(self, mock_get):
+        """Test dictionary entry when API error occurs."""
+        mock_get.side_effect = Exception("API Error")
+        
+        result = get_dictionary_entry('Hallo', 'de', 'en')
+        
+        self.assertIsNone(result)
+    
+    def test_parse_wiktionary_response_valid(self):
         """Test parsing valid Wiktionary response."""
         data = {
             'de': [
@@ -2051,7 +4157,7 @@ class DictionaryServiceTests(TestCase):
     
     def test_get_dictionary_entry_normalizes_word(self):
         """Test that dictionary entry normalizes word before lookup."""
-        with patch('flashcards.dictionary_service.requests.get') as mock_get:
+        with patch('flashcards.dictionary_service.http_client.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
             mock_response.json.return_value = {'de': {'definitions': []}}
@@ -2063,6 +4169,75 @@ class DictionaryServiceTests(TestCase):
             # Check that normalized word was used in URL
             call_args = mock_get.call_args
             self.assertIn('hallo', call_args[0][0].lower())
+    
+    def _entry_response(self, word):
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {'de': [{
+            'partOfSpeech': 'Noun', 'language': 'German',
+            'definitions': [{'definition': f'{word} definition', 'examples': []}],
+        }]}
+        return response
+    
+    def _not_found_response(self):
+        response = MagicMock()
+        response.status_code = 404
+        return response
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    def test_not_found_is_cached(self, mock_get):
+        """Test a word Wiktionary doesn't have is not requested again."""
+        mock_get.return_value = self._not_found_response()
+        
+        self.assertIsNone(get_dictionary_entry('Blorf', 'de', 'en'))
+        self.assertIsNone(get_dictionary_entry('blorf', 'de', 'en'))
+        
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(cache.get('dictionary:de:blorf'), {})
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    def test_errors_are_cached_briefly(self, mock_get):
+        """Test failed requests are cached with the shorter error TTL, refusals are not cached."""
+        import requests
+        from flashcards import http_client
+        mock_get.side_effect = requests.exceptions.ConnectionError('down')
+        
+        with self.settings(DICTIONARY_ERROR_CACHE_TTL=60):
+            with patch('flashcards.dictionary_service.cache.set') as mock_set:
+                self.assertIsNone(get_dictionary_entry('Haus', 'de', 'en'))
+        mock_set.assert_called_once_with('dictionary:de:haus', {}, 60)
+        
+        mock_get.side_effect = http_client.CircuitOpenError('open')
+        self.assertIsNone(get_dictionary_entry('Baum', 'de', 'en'))
+        self.assertIsNone(cache.get('dictionary:de:baum'))
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    def test_lemma_fallback_populates_surface_form(self, mock_get):
+        """Test an inflected form without its own entry gets the lemma's, cached under both."""
+        mock_get.side_effect = lambda url, service, headers: (
+            self._entry_response('Haus') if url.endswith('/haus') else self._not_found_response()
+        )
+        
+        entry = get_dictionary_entry('Häusern', 'de', 'en', lemma='Haus')
+        
+        self.assertIn('Haus definition', entry['meanings'][0]['definitions'][0])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(cache.get('dictionary:de:häusern'), entry)
+        self.assertEqual(cache.get('dictionary:de:haus'), entry)
+        # The form is now a plain cache hit
+        self.assertEqual(get_dictionary_entry('Häusern', 'de', 'en'), entry)
+        self.assertEqual(mock_get.call_count, 2)
+    
+    @patch('flashcards.dictionary_service.http_client.get')
+    def test_cached_lemma_entry_is_shared(self, mock_get):
+        """Test a cached lemma entry answers another inflected form without a request."""
+        entry = {'meanings': [{'part_of_speech': 'verb', 'definitions': ['to see'], 'examples': []}]}
+        cache.set('dictionary:de:sehen', entry)
+        
+        self.assertEqual(get_dictionary_entry('sah', 'de', 'en', lemma='sehen'), entry)
+        
+        mock_get.assert_not_called()
+        self.assertEqual(cache.get('dictionary:de:sah'), entry)
 
 
 class PhraseModelTests(TestCase):
@@ -2083,14 +4258,14 @@ class PhraseModelTests(TestCase):
         self.token1 = Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
         self.token2 = Token.objects.create(
             lesson=self.lesson,
             text='Welt',
-            normalized='welt',
+            lexeme=_lexeme(self.lesson, 'welt'),
             start_offset=6,
             end_offset=10
         )
@@ -2164,14 +4339,14 @@ class PhraseAPITests(APITestCase):
         self.token1 = Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
         self.token2 = Token.objects.create(
             lesson=self.lesson,
             text='Welt',
-            normalized='welt',
+            lexeme=_lexeme(self.lesson, 'welt'),
             start_offset=6,
             end_offset=10
         )
@@ -2335,7 +4510,7 @@ class DictionaryIntegrationTests(APITestCase):
         self.token = Token.objects.create(
             lesson=self.lesson,
             text='Hallo',
-            normalized='hallo',
+            lexeme=_lexeme(self.lesson, 'hallo'),
             start_offset=0,
             end_offset=5
         )
@@ -2366,7 +4541,7 @@ class DictionaryIntegrationTests(APITestCase):
         self.assertIn('dictionary_entry', response.data['token'])
         
         # Verify dictionary entry was fetched
-        mock_dict_entry.assert_called_once_with('Hallo', 'de', 'en')
+        mock_dict_entry.assert_called_once_with('Hallo', 'de', 'en', lemma=None)
         
         # Verify token was updated with dictionary entry
         self.token.refresh_from_db()
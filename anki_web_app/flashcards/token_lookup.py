@@ -0,0 +1,58 @@
+"""
+Cache-only translation lookups for many tokens at once.
+
+The reader asks for the tokens currently on screen in one request and gets
+whatever is already known about them, so hover/click popovers can open
+without a round trip per token. Sources are checked cheapest first: the token
+row itself, the shared glossary (one query), then the translation and
+dictionary caches (one get_many each). External services are never called;
+tokens that are still missing a translation go through the click endpoint.
+"""
+
+from typing import Dict, List
+
+from . import glossary
+from .dictionary_service import get_cached_dictionary_entries
+from .translation_service import get_cached_translations
+
+
+def _has_meanings(entry) -> bool:
+    return bool(entry and entry.get('meanings'))
+
+
+def lookup_cached(language: str, items: List[Dict], target_lang: str = 'en') -> List[Dict]:
+    """
+    Fill in cached translations and dictionary entries.
+
+    Args:
+        language: Source language of all items
+        items: Dicts with text, normalized, lemma, translation, dictionary_entry
+            (the token row's values, None when unknown); updated in place
+
+    Returns:
+        The items, with 'translation' and 'dictionary_entry' filled where known
+    """
+    pending = [item for item in items if not item['translation'] or not _has_meanings(item['dictionary_entry'])]
+    if not pending:
+        return items
+
+    known = glossary.lookup_many(language, target_lang, ((item['normalized'], item['lemma']) for item in pending))
+    for item in pending:
+        entry = known.get((item['normalized'], item['lemma'] or ''))
+        if entry:
+            item['translation'] = item['translation'] or entry['translation']
+            if not _has_meanings(item['dictionary_entry']) and entry['dictionary_entry']:
+                item['dictionary_entry'] = entry['dictionary_entry']
+
+    # The click endpoint caches translations by surface text and entries by word or lemma
+    untranslated = [item for item in pending if not item['translation']]
+    translations = get_cached_translations((item['text'] for item in untranslated), language, target_lang)
+    for item in untranslated:
+        item['translation'] = translations.get(item['text'])
+
+    undefined = [item for item in pending if not _has_meanings(item['dictionary_entry'])]
+    words = [item['text'] for item in undefined] + [item['lemma'] for item in undefined if item['lemma']]
+    entries = get_cached_dictionary_entries(words, language)
+    for item in undefined:
+        item['dictionary_entry'] = entries.get(item['text']) or (entries.get(item['lemma']) if item['lemma'] else None)
+    return items
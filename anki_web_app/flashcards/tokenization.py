@@ -3,11 +3,34 @@ Tokenization utilities for German, Spanish, and other languages.
 Uses regex-based approach for word segmentation and spaCy for lemmatization.
 """
 
+import os
 import re
-from typing import List, Dict, Tuple, Optional
+import time
+from array import array
+from bisect import bisect_right
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator
+
+# Map language codes to spaCy model names
+SPACY_MODEL_MAP = {
+    'de': 'de_core_news_sm',
+    'es': 'es_core_news_sm',
+    'en': 'en_core_web_sm',
+}
+
+# Short sample sentences used to warm up a freshly loaded pipeline
+WARMUP_SAMPLES = {
+    'de': 'Ich habe gestern einen Film gesehen.',
+    'es': 'Ayer vi una película con mis amigos.',
+    'en': 'I saw a movie with my friends yesterday.',
+}
+
+# Bump whenever tokenize_text output changes for the same input (invalidates the tokenization cache)
+TOKENIZER_VERSION = 1
 
 # Cache for spaCy models to avoid reloading
 _spacy_models = {}
+# Load time in seconds per model name (for the health endpoint)
+_spacy_model_load_times = {}
 
 
 def normalize_token(text: str) -> str:
@@ -36,14 +59,7 @@ def get_spacy_model(language: str):
     Returns:
         spaCy language model or None if not available
     """
-    # Map language codes to spaCy model names
-    model_map = {
-        'de': 'de_core_news_sm',
-        'es': 'es_core_news_sm',
-        'en': 'en_core_web_sm',
-    }
-    
-    model_name = model_map.get(language.lower())
+    model_name = SPACY_MODEL_MAP.get(language.lower())
     if not model_name:
         return None
     
@@ -54,7 +70,9 @@ def get_spacy_model(language: str):
     # Try to load the model
     try:
         import spacy
+        started = time.perf_counter()
         nlp = spacy.load(model_name, disable=['parser', 'ner'])
+        _spacy_model_load_times[model_name] = time.perf_counter() - started
         _spacy_models[model_name] = nlp
         return nlp
     except (ImportError, OSError) as e:
@@ -64,7 +82,122 @@ def get_spacy_model(language: str):
         return None
 
 
-def lemmatize_token(text: str, language: str = 'de') -> Optional[str]:
+def preload_spacy_models(languages: List[str], warm_up: bool = False) -> Dict[str, bool]:
+    """
+    Load the spaCy models for the given languages up front.
+
+    Meant to run once in the gunicorn master (``--preload``) before workers
+    fork, so every worker shares the loaded models copy-on-write instead of
+    loading its own copy on the first lesson creation.
+
+    Args:
+        languages: Language codes to load ('de', 'es', ...)
+        warm_up: Also run a short sample sentence through each pipeline
+
+    Returns:
+        Dict mapping language code to whether its model is ready
+    """
+    ready = {}
+    for language in languages:
+        nlp = get_spacy_model(language)
+        ready[language] = nlp is not None
+        if nlp is None or not warm_up:
+            continue
+        sample = WARMUP_SAMPLES.get(language.lower())
+        if not sample:
+            continue
+        try:
+            nlp(sample)
+        except Exception as e:
+            print(f"[tokenization] Warning: Warm-up failed for '{language}': {e}")
+    return ready
+
+
+def get_spacy_model_status(languages: List[str]) -> Dict[str, Dict]:
+    """
+    Report readiness of the spaCy models for the given languages.
+    Does not trigger a model load.
+
+    Returns:
+        Dict mapping language code to {model, loaded, load_time_seconds}
+    """
+    report = {}
+    for language in languages:
+        model_name = SPACY_MODEL_MAP.get(language.lower())
+        load_time = _spacy_model_load_times.get(model_name)
+        report[language] = {
+            'model': model_name,
+            'loaded': model_name in _spacy_models,
+            'load_time_seconds': round(load_time, 3) if load_time is not None else None,
+        }
+    return report
+
+
+def get_lemmatizer_backend() -> str:
+    """Configured lemmatizer backend: 'spacy' (default) or 'lookup'."""
+    from django.conf import settings
+    return getattr(settings, 'LEMMATIZER_BACKEND', 'spacy')
+
+
+def get_tokenizer_version(language: str) -> str:
+    """
+    Identify everything that affects tokenizer output for a language:
+    the tokenizer code version, the lemmatizer backend and the spaCy model in use.
+    """
+    backend = get_lemmatizer_backend()
+    parts = [str(TOKENIZER_VERSION), backend]
+    nlp = get_spacy_model(language)
+    if nlp is not None:
+        parts.append(f"{nlp.meta.get('name', '')}-{nlp.meta.get('version', '')}")
+    else:
+        parts.append('nospacy')
+    if backend == 'lookup':
+        from .lemma_table import get_lemma_table
+        table = get_lemma_table()
+        parts.append(f"table-{int(os.path.getmtime(table.path))}" if table else 'notable')
+    return ':'.join(parts)
+
+
+def lemmatize_token(text: str, language: str = 'de', backend: Optional[str] = None) -> Optional[str]:
+    """
+    Lemmatize a token.
+    
+    With the 'lookup' backend the lemma comes from the local lemma table and
+    spaCy is only used for forms that are missing from it or ambiguous.
+    
+    Args:
+        text: The token text to lemmatize
+        language: Language code ('de', 'es', etc.)
+        backend: 'spacy' or 'lookup' (defaults to settings.LEMMATIZER_BACKEND)
+    
+    Returns:
+        Lemmatized form or None if lemmatization fails
+    """
+    if (backend or get_lemmatizer_backend()) == 'lookup':
+        lemma = lookup_lemma(text, language)
+        if lemma is not None:
+            return lemma
+    return spacy_lemmatize(text, language)
+
+
+def lookup_lemma(text: str, language: str = 'de') -> Optional[str]:
+    """
+    Lemmatize a token from the lemma lookup table only.
+    
+    Returns:
+        The lemma, or None if the table is missing, the form is unknown, or it is ambiguous
+    """
+    from .lemma_table import get_lemma_table
+    table = get_lemma_table()
+    if table is None:
+        return None
+    entry = table.lookup(language, normalize_token(text))
+    if entry is None or entry[1]:
+        return None
+    return entry[0]
+
+
+def spacy_lemmatize(text: str, language: str = 'de') -> Optional[str]:
     """
     Lemmatize a token using spaCy.
     
@@ -94,6 +227,30 @@ def lemmatize_token(text: str, language: str = 'de') -> Optional[str]:
     return None
 
 
+# Matches words (including accented chars) and punctuation separately
+_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def _build_token(token_text: str, start: int, end: int, language: str) -> Dict[str, any]:
+    """Build the token dict for a single regex match."""
+    is_word = bool(re.match(r'\w+', token_text))
+    
+    # Lemmatize words only (not punctuation)
+    lemma = None
+    if is_word:
+        lemma = lemmatize_token(token_text, language)
+        # If lemmatization fails, lemma remains None (we don't know the base form)
+    
+    return {
+        'text': token_text,
+        'normalized': normalize_token(token_text),
+        'lemma': lemma,
+        'start_offset': start,
+        'end_offset': end,
+        'type': 'word' if is_word else 'punctuation'
+    }
+
+
 def tokenize_text(text: str, language: str = 'de') -> List[Dict[str, any]]:
     """
     Tokenize text (German, Spanish, etc.) into words and punctuation.
@@ -107,35 +264,114 @@ def tokenize_text(text: str, language: str = 'de') -> List[Dict[str, any]]:
     Returns:
         List of token dictionaries with text, normalized, lemma, offsets, and type
     """
-    tokens = []
-    # Simple regex-based tokenization
-    # Matches words (including accented chars) and punctuation separately
-    pattern = r'\w+|[^\w\s]'
+    return list(iter_tokenize_chunks([text], language))
+
+
+def iter_tokenize_chunks(chunks: Iterable[str], language: str = 'de') -> Iterator[Dict[str, any]]:
+    """
+    Tokenize a stream of text chunks, yielding one token dict at a time.
+    Offsets are relative to the start of the whole stream. A word cut in half at
+    a chunk boundary is held back until the next chunk completes it, so the
+    output is identical to tokenize_text on the joined text.
+    
+    Args:
+        chunks: Iterable of text pieces (e.g. decoded upload chunks or lines)
+        language: Language code ('de' for German, 'es' for Spanish, etc.)
+    
+    Yields:
+        Token dictionaries in the same format as tokenize_text
+    """
+    buffer = ''
+    base_offset = 0  # Stream offset of buffer[0]
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        keep_from = len(buffer)
+        for match in _TOKEN_PATTERN.finditer(buffer):
+            if match.end() == len(buffer):
+                # May continue in the next chunk
+                keep_from = match.start()
+                break
+            yield _build_token(match.group(0), base_offset + match.start(), base_offset + match.end(), language)
+        base_offset += keep_from
+        buffer = buffer[keep_from:]
+    
+    for match in _TOKEN_PATTERN.finditer(buffer):
+        yield _build_token(match.group(0), base_offset + match.start(), base_offset + match.end(), language)
+
+
+# Sentence terminator (., ?, !, …, runs like "?!" or "...") plus any closing quotes/brackets
+_SENTENCE_END_PATTERN = re.compile(r'[.!?…]+[\"\'”’»«“)\]]*(?=\s|$)|\n\s*\n')
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    Split text into sentence spans.
+    Handles ., ?, !, … and closing quotes (German „...“, Spanish «...»).
+    A terminator followed by a lowercase letter is not treated as a boundary
+    (abbreviations like "z.B. das").
+    
+    Args:
+        text: Text to split
     
-    offset = 0
-    for match in re.finditer(pattern, text):
-        token_text = match.group(0)
-        start = match.start()
+    Returns:
+        Sorted list of (start_offset, end_offset) tuples with surrounding whitespace trimmed
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_END_PATTERN.finditer(text):
         end = match.end()
-        
-        # Skip pure whitespace matches
-        if token_text.strip():
-            is_word = bool(re.match(r'\w+', token_text))
-            normalized = normalize_token(token_text)
-            
-            # Lemmatize words only (not punctuation)
-            lemma = None
-            if is_word:
-                lemma = lemmatize_token(token_text, language)
-                # If lemmatization fails, lemma remains None (we don't know the base form)
-            
-            tokens.append({
-                'text': token_text,
-                'normalized': normalized,
-                'lemma': lemma,
-                'start_offset': start,
-                'end_offset': end,
-                'type': 'word' if is_word else 'punctuation'
-            })
-    
-    return tokens
+        following = text[end:end + 2].lstrip()
+        if following and following[0].islower():
+            continue
+        _append_trimmed_span(text, start, end, spans)
+        start = end
+    _append_trimmed_span(text, start, len(text), spans)
+    return spans
+
+
+def _append_trimmed_span(text: str, start: int, end: int, spans: List[Tuple[int, int]]):
+    """Append (start, end) to spans with whitespace trimmed, skipping empty spans."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        spans.append((start, end))
+
+
+def pack_sentence_spans(spans: List[Tuple[int, int]]) -> bytes:
+    """
+    Pack sentence spans into a compact byte string for storage.
+    Layout: uint32 array of all start offsets followed by all end offsets.
+    """
+    packed = array('I', [start for start, _ in spans])
+    packed.extend(end for _, end in spans)
+    return packed.tobytes()
+
+
+def unpack_sentence_spans(data: bytes) -> array:
+    """Unpack bytes produced by pack_sentence_spans into a uint32 array."""
+    packed = array('I')
+    if data:
+        packed.frombytes(bytes(data))
+    return packed
+
+
+def find_sentence_span(packed: array, offset: int) -> Optional[Tuple[int, int, int]]:
+    """
+    Find the sentence containing a character offset with a binary search.
+    
+    Args:
+        packed: Array from unpack_sentence_spans
+        offset: Character offset in the lesson text
+    
+    Returns:
+        (sentence_index, start_offset, end_offset) or None if there are no sentences
+    """
+    count = len(packed) // 2
+    if count == 0:
+        return None
+    index = max(0, bisect_right(packed, offset, 0, count) - 1)
+    return index, packed[index], packed[count + index]
@@ -0,0 +1,164 @@
+"""
+Content-addressed cache for tokenizer output.
+
+Lessons created from the same text (e.g. the bundled data/ corpus or a shared
+article) tokenize to the same result, so the output is stored once per
+hash(language, tokenizer version, text) and reused instead of re-running the
+lemmatizer. Only what can't be recomputed cheaply is stored: token offsets and
+lemmas. Surface text, normalized form and type are rebuilt from the text.
+
+Hits are counted on the entry (hit_count); misses leave no entry behind, so
+they are counted per language in a CacheCounter (see cache_counters.py).
+
+Blob layout (zlib-compressed):
+    header      struct '<II': token count, distinct lemma count
+    offsets     array('I'): start, end for every token
+    lemma ids   array('i'): index into the lemma list per token, -1 for no lemma
+    lemmas      distinct lemmas, UTF-8, NUL-separated
+"""
+
+import hashlib
+import re
+import struct
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .tokenization import get_tokenizer_version, iter_tokenize_chunks, normalize_token
+
+# CacheCounter key prefix of the per-language miss counters
+MISS_COUNTER_PREFIX = 'tokenization_cache:misses:'
+
+_HEADER = struct.Struct('<II')
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'TOKENIZATION_CACHE_ENABLED', True)
+
+
+def make_cache_key(text: str, language: str, tokenizer_version: str) -> str:
+    """SHA-256 over language, tokenizer version and text."""
+    digest = hashlib.sha256()
+    for part in (language.lower(), tokenizer_version):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def encode_tokens(tokens: Iterable[Dict]) -> bytes:
+    """Pack token dicts into a compressed blob."""
+    offsets = array('I')
+    lemma_ids = array('i')
+    lemma_index = {}
+    for token in tokens:
+        offsets.append(token['start_offset'])
+        offsets.append(token['end_offset'])
+        lemma = token['lemma']
+        if lemma is None:
+            lemma_ids.append(-1)
+        else:
+            lemma_ids.append(lemma_index.setdefault(lemma, len(lemma_index)))
+    lemmas = '\x00'.join(lemma_index).encode('utf-8')
+    payload = _HEADER.pack(len(lemma_ids), len(lemma_index)) + offsets.tobytes() + lemma_ids.tobytes() + lemmas
+    return zlib.compress(payload)
+
+
+def decode_tokens(data: bytes, text: str) -> Iterator[Dict]:
+    """
+    Rebuild token dicts from a blob produced by encode_tokens.
+    The output matches tokenize_text(text) for the text the blob was built from.
+    """
+    payload = zlib.decompress(bytes(data))
+    count, lemma_count = _HEADER.unpack_from(payload)
+    position = _HEADER.size
+
+    offsets = array('I')
+    offsets.frombytes(payload[position:position + 2 * count * offsets.itemsize])
+    position += 2 * count * offsets.itemsize
+
+    lemma_ids = array('i')
+    lemma_ids.frombytes(payload[position:position + count * lemma_ids.itemsize])
+    position += count * lemma_ids.itemsize
+
+    lemmas = payload[position:].decode('utf-8').split('\x00') if lemma_count else []
+
+    for i in range(count):
+        start, end = offsets[2 * i], offsets[2 * i + 1]
+        token_text = text[start:end]
+        lemma_id = lemma_ids[i]
+        yield {
+            'text': token_text,
+            'normalized': normalize_token(token_text),
+            'lemma': lemmas[lemma_id] if lemma_id >= 0 else None,
+            'start_offset': start,
+            'end_offset': end,
+            'type': 'word' if _WORD_PATTERN.match(token_text) else 'punctuation',
+        }
+
+
+def get_cached_tokens(text: str, language: str) -> Optional[Iterator[Dict]]:
+    """
+    Return cached tokens for the text, or None on a miss.
+    Counts the hit on the cache entry, or the miss on the language's miss counter.
+    """
+    from . import cache_counters
+    from .models import TokenizationCache
+
+    key = make_cache_key(text, language, get_tokenizer_version(language))
+    entry = TokenizationCache.objects.filter(key=key).only('data').first()
+    if entry is None:
+        cache_counters.increment(MISS_COUNTER_PREFIX + language.lower())
+        return None
+    TokenizationCache.objects.filter(key=key).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+    return decode_tokens(entry.data, text)
+
+
+def store_tokens(text: str, language: str, tokens: List[Dict]) -> None:
+    """Store tokenizer output for the text. Concurrent writers of the same key are harmless."""
+    from .models import TokenizationCache
+
+    tokenizer_version = get_tokenizer_version(language)
+    data = encode_tokens(tokens)
+    TokenizationCache.objects.bulk_create(
+        [TokenizationCache(
+            key=make_cache_key(text, language, tokenizer_version),
+            language=language.lower(),
+            tokenizer_version=tokenizer_version,
+            data=data,
+            token_count=len(tokens),
+            size_bytes=len(data),
+        )],
+        ignore_conflicts=True,
+    )
+
+
+def tokenize_text_cached(text: str, language: str = 'de') -> Iterator[Dict]:
+    """
+    Tokenize text, reusing cached output for identical texts.
+
+    Same output as tokenize_text. On a miss the text is tokenized and the result
+    stored; cache errors never prevent tokenization.
+    """
+    if not is_enabled():
+        return iter_tokenize_chunks([text], language)
+
+    try:
+        cached = get_cached_tokens(text, language)
+    except Exception as e:
+        print(f"[tokenization_cache] Warning: cache lookup failed: {e}")
+        return iter_tokenize_chunks([text], language)
+    if cached is not None:
+        return cached
+
+    tokens = list(iter_tokenize_chunks([text], language))
+    try:
+        store_tokens(text, language, tokens)
+    except Exception as e:
+        print(f"[tokenization_cache] Warning: could not store tokens: {e}")
+    return iter(tokens)
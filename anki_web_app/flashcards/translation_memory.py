@@ -0,0 +1,181 @@
+"""
+Persistent translation memory.
+
+Every machine translation is stored once in the TranslationMemory table,
+keyed by hash(source language, target language, text), so it survives
+deploys, is shared by all workers and is never paid for twice. Keys are
+fixed-length regardless of how long the text is.
+
+Each worker keeps a bounded LRU of recent translations in front of the table.
+Lookups count process-wide local hits, database hits and misses (stats()).
+Misses are also added to a persistent per-language-pair CacheCounter (see
+cache_counters.py). Database hits bump the entry's hit_count and last_used_at; local hits are
+written back at most once per TOUCH_INTERVAL per entry, so last_used_at stays
+good enough for pruning without a write per lookup (see the
+translation_memory_stats command).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .lexemes import LOOKUP_BATCH_SIZE
+
+# Seconds between last_used_at updates for entries served from the local LRU
+TOUCH_INTERVAL = 60 * 60
+
+# CacheCounter key prefix of the miss counters, followed by '<source>-><target>'
+MISS_COUNTER_PREFIX = 'translation_memory:misses:'
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+_stats = {'local_hits': 0, 'db_hits': 0, 'misses': 0}
+
+
+class _LocalEntry:
+    __slots__ = ('translation', 'touched_at', 'pending_hits')
+
+    def __init__(self, translation: str):
+        self.translation = translation
+        self.touched_at = time.monotonic()
+        self.pending_hits = 0
+
+
+def make_memory_key(text: str, source_lang: str, target_lang: str) -> str:
+    """SHA-256 over source language, target language and text."""
+    digest = hashlib.sha256()
+    for part in (source_lang.lower(), target_lang.lower()):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _local_max_entries() -> int:
+    return getattr(settings, 'TRANSLATION_MEMORY_LOCAL_CACHE_SIZE', 4096)
+
+
+def _remember(key: str, translation: str) -> None:
+    with _local_lock:
+        _local[key] = _LocalEntry(translation)
+        _local.move_to_end(key)
+        while len(_local) > _local_max_entries():
+            _local.popitem(last=False)
+
+
+def _count(name: str, amount: int = 1) -> None:
+    if amount:
+        with _local_lock:
+            _stats[name] += amount
+
+
+def _local_hit(key: str) -> Optional[str]:
+    """Serve a translation from the LRU, writing back its hits when the entry is due."""
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        _local.move_to_end(key)
+        entry.pending_hits += 1
+        due = time.monotonic() - entry.touched_at >= TOUCH_INTERVAL
+        pending = entry.pending_hits if due else 0
+        if due:
+            entry.touched_at = time.monotonic()
+            entry.pending_hits = 0
+    if pending:
+        _touch([key], pending)
+    return entry.translation
+
+
+def _touch(keys, hits: int = 1) -> None:
+    from .models import TranslationMemory
+
+    TranslationMemory.objects.filter(key__in=keys).update(
+        hit_count=F('hit_count') + hits, last_used_at=timezone.now()
+    )
+
+
+def lookup_many(texts: Iterable[str], source_lang: str, target_lang: str) -> Dict[str, str]:
+    """
+    Stored translations of several texts (one query per LOOKUP_BATCH_SIZE local misses).
+
+    Returns:
+        {text: translation} for the texts in memory
+    """
+    from . import cache_counters
+    from .models import TranslationMemory
+
+    keys = {make_memory_key(text, source_lang, target_lang): text for text in set(texts) if text}
+    found = {}
+    remote = []
+    for key, text in keys.items():
+        translation = _local_hit(key)
+        if translation is None:
+            remote.append(key)
+        else:
+            found[text] = translation
+    _count('local_hits', len(found))
+
+    db_hits = []
+    for start in range(0, len(remote), LOOKUP_BATCH_SIZE):
+        rows = TranslationMemory.objects.filter(key__in=remote[start:start + LOOKUP_BATCH_SIZE])
+        for key, translation in rows.values_list('key', 'translation'):
+            found[keys[key]] = translation
+            _remember(key, translation)
+            db_hits.append(key)
+    if db_hits:
+        _touch(db_hits)
+    _count('db_hits', len(db_hits))
+    misses = len(remote) - len(db_hits)
+    _count('misses', misses)
+    cache_counters.increment(f'{MISS_COUNTER_PREFIX}{source_lang.lower()}->{target_lang.lower()}', misses)
+    return found
+
+
+def lookup(text: str, source_lang: str, target_lang: str) -> Optional[str]:
+    """Stored translation of a text, or None."""
+    return lookup_many([text], source_lang, target_lang).get(text)
+
+
+def store_many(translations: Dict[str, str], source_lang: str, target_lang: str) -> None:
+    """Store new translations. Concurrent writers of the same key are harmless."""
+    from .models import TranslationMemory
+
+    entries = []
+    for text, translation in translations.items():
+        if not text or not translation:
+            continue
+        key = make_memory_key(text, source_lang, target_lang)
+        entries.append(TranslationMemory(
+            key=key,
+            source_lang=source_lang.lower(),
+            target_lang=target_lang.lower(),
+            text=text,
+            translation=translation,
+        ))
+        _remember(key, translation)
+    TranslationMemory.objects.bulk_create(entries, batch_size=LOOKUP_BATCH_SIZE, ignore_conflicts=True)
+
+
+def store(text: str, source_lang: str, target_lang: str, translation: str) -> None:
+    store_many({text: translation}, source_lang, target_lang)
+
+
+def stats() -> Dict[str, int]:
+    """This process's lookup counters: local_hits, db_hits, misses, local_entries."""
+    with _local_lock:
+        return dict(_stats, local_entries=len(_local))
+
+
+def clear_local() -> None:
+    """Drop this process's LRU and counters (tests)."""
+    with _local_lock:
+        _local.clear()
+        for name in _stats:
+            _stats[name] = 0
@@ -1,51 +1,72 @@
 """
 Translation service using DeepL API (free tier: 500k chars/month).
-Caches translations to avoid redundant API calls.
+Translations are kept in the persistent translation memory (translation_memory.py),
+so a text is never sent to DeepL twice.
 """
 
 import os
-import requests
-from django.core.cache import cache
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable, Iterator, List
 from decouple import config
 
+from . import http_client, single_flight, translation_memory
+
 
 DEEPL_API_KEY = config('DEEPL_API_KEY', default='')
 DEEPL_API_URL = 'https://api-free.deepl.com/v2/translate' if not DEEPL_API_KEY.startswith('paid') else 'https://api.deepl.com/v2/translate'
 
+# DeepL takes at most 50 texts per request; the character cap keeps requests well under its 128 KiB body limit
+DEEPL_MAX_TEXTS_PER_REQUEST = 50
+DEEPL_MAX_REQUEST_CHARS = 30000
+
+
+def get_cached_translations(texts, source_lang: str = 'de', target_lang: str = 'en') -> Dict[str, str]:
+    """
+    Stored translations of several texts from the translation memory.
+    Never calls DeepL; texts without a stored translation are left out.
+    """
+    return translation_memory.lookup_many(texts, source_lang, target_lang)
+
 
 def translate_text(text: str, source_lang: str = 'de', target_lang: str = 'en') -> Optional[str]:
     """
     Translate text using DeepL API.
-    Caches results in Django cache.
+    Results are stored in the translation memory. Concurrent requests for the
+    same text share one DeepL call (single_flight.py).
     """
-    # Check cache first
-    cache_key = f"translation:{source_lang}:{target_lang}:{text}"
-    cached = cache.get(cache_key)
+    # Check the translation memory first
+    cached = translation_memory.lookup(text, source_lang, target_lang)
     if cached is not None:
         return cached
 
     if not DEEPL_API_KEY:
         return None
     
+    return single_flight.run(
+        f"translate:{translation_memory.make_memory_key(text, source_lang, target_lang)}",
+        lambda: _request_translation(text, source_lang, target_lang),
+        lookup=lambda: translation_memory.lookup(text, source_lang, target_lang),
+    )
+
+
+def _request_translation(text: str, source_lang: str, target_lang: str) -> Optional[str]:
+    """Translate one text with DeepL and store the result."""
     try:
-        response = requests.post(
+        response = http_client.post(
             DEEPL_API_URL,
+            service='deepl',
             data={
                 'auth_key': DEEPL_API_KEY,
                 'text': text,
                 'source_lang': source_lang.upper(),
                 'target_lang': target_lang.upper(),
             },
-            timeout=10
         )
         response.raise_for_status()
         result = response.json()
         
         if result.get('translations'):
             translation = result['translations'][0]['text']
-            # Cache for 30 days
-            cache.set(cache_key, translation, 60 * 60 * 24 * 30)
+            translation_memory.store(text, source_lang, target_lang, translation)
             return translation
     except Exception as e:
         print(f"Translation error: {e}")
@@ -54,6 +75,72 @@ def translate_text(text: str, source_lang: str = 'de', target_lang: str = 'en')
     return None
 
 
+def _request_batches(texts: List[str]) -> Iterator[List[str]]:
+    """Split texts into DeepL requests by count and total length."""
+    batch = []
+    size = 0
+    for text in texts:
+        if batch and (len(batch) >= DEEPL_MAX_TEXTS_PER_REQUEST or size + len(text) > DEEPL_MAX_REQUEST_CHARS):
+            yield batch
+            batch = []
+            size = 0
+        batch.append(text)
+        size += len(text)
+    if batch:
+        yield batch
+
+
+def translate_many(texts: Iterable[str], source_lang: str = 'de', target_lang: str = 'en') -> List[Optional[str]]:
+    """
+    Translate several texts with as few DeepL requests as possible.
+    
+    Duplicates are translated once, stored translations are read from the
+    translation memory in bulk, and the rest is sent in batches of many `text`
+    parameters per request. New translations are stored in one bulk insert.
+    
+    Args:
+        texts: Texts to translate
+        source_lang: Source language code
+        target_lang: Target language code
+    
+    Returns:
+        Translations in input order (None where a text couldn't be translated)
+    """
+    texts = list(texts)
+    unique = list(dict.fromkeys(text for text in texts if text))
+    translations = get_cached_translations(unique, source_lang, target_lang)
+    misses = [text for text in unique if text not in translations]
+    
+    if misses and DEEPL_API_KEY:
+        fetched = {}
+        for batch in _request_batches(misses):
+            try:
+                response = http_client.post(
+                    DEEPL_API_URL,
+                    service='deepl',
+                    data={
+                        'auth_key': DEEPL_API_KEY,
+                        'text': batch,
+                        'source_lang': source_lang.upper(),
+                        'target_lang': target_lang.upper(),
+                    },
+                )
+                response.raise_for_status()
+                results = response.json().get('translations') or []
+                if len(results) != len(batch):
+                    print(f"Translation error: expected {len(batch)} translations, got {len(results)}")
+                    continue
+                for text, result in zip(batch, results):
+                    fetched[text] = result['text']
+            except Exception as e:
+                print(f"Translation error: {e}")
+        if fetched:
+            translation_memory.store_many(fetched, source_lang, target_lang)
+            translations.update(fetched)
+    
+    return [translations.get(text) if text else None for text in texts]
+
+
 def get_word_translation(word: str, source_lang: str = 'de', target_lang: str = 'en') -> Optional[Dict]:
     """
     Get dictionary-style translation for a single word.
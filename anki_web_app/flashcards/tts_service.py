@@ -4,17 +4,47 @@ Generates audio files and stores them.
 """
 
 import os
-import requests
+import threading
 from typing import Optional
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from decouple import config
 
+from . import circuit_breaker, deadline, http_client
+
 
 GOOGLE_TTS_CREDENTIALS_PATH = config('GOOGLE_TTS_CREDENTIALS_PATH', default='')
 ELEVENLABS_API_KEY = config('ELEVENLABS_API_KEY', default='')
 ELEVENLABS_VOICE_ID = config('ELEVENLABS_VOICE_ID', default='21m00Tcm4TlvDq8ikWAM')  # Default voice: Rachel
 
+# Circuit breaker name for Google TTS (called through its client library, not http_client)
+GOOGLE_TTS_SERVICE = 'google_tts'
+
+# Google TTS clients hold a gRPC channel; one per credentials file is reused across requests
+_google_clients = {}
+_google_clients_lock = threading.Lock()
+
+
+def _get_google_tts_client(credentials_path: str):
+    """The long-lived Google TTS client for a credentials file."""
+    client = _google_clients.get(credentials_path)
+    if client is None:
+        with _google_clients_lock:
+            client = _google_clients.get(credentials_path)
+            if client is None:
+                from google.cloud import texttospeech
+                client = texttospeech.TextToSpeechClient.from_service_account_file(credentials_path)
+                _google_clients[credentials_path] = client
+    return client
+
+
+def _google_call_options() -> dict:
+    """Per-call timeout for the Google client when inside a deadline budget."""
+    remaining = deadline.remaining()
+    if remaining is None:
+        return {}
+    return {'timeout': max(remaining, http_client.MIN_ATTEMPT_SECONDS)}
+
 
 def _get_elevenlabs_voice_id(language_code: str) -> str:
     """Map language code to ElevenLabs voice ID."""
@@ -54,14 +84,16 @@ def _generate_google_tts(text: str, language_code: str, output_filename: str = N
     """
     if not GOOGLE_TTS_CREDENTIALS_PATH or not os.path.exists(GOOGLE_TTS_CREDENTIALS_PATH):
         return None
+    if not circuit_breaker.allow(GOOGLE_TTS_SERVICE):
+        deadline.note_degraded(GOOGLE_TTS_SERVICE)
+        print("Google TTS circuit is open; skipping")
+        return None
     
     try:
         from google.cloud import texttospeech
         import io
         
-        client = texttospeech.TextToSpeechClient.from_service_account_file(
-            GOOGLE_TTS_CREDENTIALS_PATH
-        )
+        client = _get_google_tts_client(GOOGLE_TTS_CREDENTIALS_PATH)
         
         # Google Cloud TTS limit: 5000 characters per request
         MAX_CHARS_PER_REQUEST = 5000
@@ -80,7 +112,8 @@ def _generate_google_tts(text: str, language_code: str, output_filename: str = N
             response = client.synthesize_speech(
                 input=synthesis_input,
                 voice=voice,
-                audio_config=audio_config
+                audio_config=audio_config,
+                **_google_call_options()
             )
             audio_content = response.audio_content
         else:
@@ -108,7 +141,8 @@ def _generate_google_tts(text: str, language_code: str, output_filename: str = N
                     response = client.synthesize_speech(
                         input=synthesis_input,
                         voice=voice,
-                        audio_config=audio_config
+                        audio_config=audio_config,
+                        **_google_call_options()
                     )
                     audio_chunks.append(response.audio_content)
                     
@@ -135,7 +169,8 @@ def _generate_google_tts(text: str, language_code: str, output_filename: str = N
                 response = client.synthesize_speech(
                     input=synthesis_input,
                     voice=voice,
-                    audio_config=audio_config
+                    audio_config=audio_config,
+                    **_google_call_options()
                 )
                 audio_chunks.append(response.audio_content)
             
@@ -144,6 +179,8 @@ def _generate_google_tts(text: str, language_code: str, output_filename: str = N
             audio_content = b''.join(audio_chunks)
             print(f"Combined {len(audio_chunks)} audio chunks")
         
+        circuit_breaker.record_success(GOOGLE_TTS_SERVICE)
+        
         # Save to Django storage
         if not output_filename:
             import hashlib
@@ -159,6 +196,8 @@ def _generate_google_tts(text: str, language_code: str, output_filename: str = N
         return None
     except Exception as e:
         print(f"Google TTS error: {e}")
+        deadline.note_degraded(GOOGLE_TTS_SERVICE)
+        circuit_breaker.record_failure(GOOGLE_TTS_SERVICE)
         import traceback
         traceback.print_exc()
         return None
@@ -188,7 +227,7 @@ def _generate_elevenlabs_tts(text: str, language_code: str, output_filename: str
             }
         }
         
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = http_client.post(url, service='elevenlabs', json=data, headers=headers)
         response.raise_for_status()
         
         # Save to Django storage
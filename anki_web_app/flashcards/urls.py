@@ -18,18 +18,25 @@ from .views import (
     StudySessionEndAPIView,
     StudySessionListAPIView,
     CurrentUserAPIView,
+    HealthAPIView,
     LessonListCreateAPIView,
+    LessonUploadAPIView,
     LessonDetailAPIView,
     LessonUpdateAPIView,
     LessonDeleteAPIView,
     TranslateAPIView,
+    LessonTranslateSentencesAPIView,
+    LessonTokenMaterializeAPIView,
     TokenClickAPIView,
+    TokenLookupAPIView,
     CreatePhraseAPIView,
     AddToFlashcardsAPIView,
     GenerateTTSAPIView,
     UpdateListeningTimeAPIView,
     UpdateReadingProgressAPIView,
     TokenStatusAPIView,
+    BulkTokenStatusAPIView,
+    TopUnknownLemmasAPIView,
 )
 
 app_name = 'flashcards'
@@ -54,17 +61,24 @@ urlpatterns = [
     path('sessions/heartbeat/', StudySessionHeartbeatAPIView.as_view(), name='study_session_heartbeat_api'),
     path('sessions/end/', StudySessionEndAPIView.as_view(), name='study_session_end_api'),
     path('current-user/', CurrentUserAPIView.as_view(), name='current_user_api'),
+    path('health/', HealthAPIView.as_view(), name='health_api'),
     # Reader endpoints
     path('reader/lessons/', LessonListCreateAPIView.as_view(), name='lesson_list_create_api'),
+    path('reader/lessons/upload/', LessonUploadAPIView.as_view(), name='lesson_upload_api'),
     path('reader/lessons/<int:pk>/', LessonDetailAPIView.as_view(), name='lesson_detail_api'),
     path('reader/lessons/<int:pk>/update/', LessonUpdateAPIView.as_view(), name='lesson_update_api'),
     path('reader/lessons/<int:pk>/delete/', LessonDeleteAPIView.as_view(), name='lesson_delete_api'),
     path('reader/translate/', TranslateAPIView.as_view(), name='translate_api'),
+    path('reader/lessons/<int:lesson_id>/translate-sentences/', LessonTranslateSentencesAPIView.as_view(), name='lesson_translate_sentences_api'),
+    path('reader/lessons/<int:lesson_id>/tokens/<int:index>/materialize/', LessonTokenMaterializeAPIView.as_view(), name='lesson_token_materialize_api'),
     path('reader/tokens/<int:token_id>/click/', TokenClickAPIView.as_view(), name='token_click_api'),
+    path('reader/tokens/lookup/', TokenLookupAPIView.as_view(), name='token_lookup_api'),
     path('reader/phrases/create/', CreatePhraseAPIView.as_view(), name='create_phrase_api'),
     path('reader/add-to-flashcards/', AddToFlashcardsAPIView.as_view(), name='add_to_flashcards_api'),
     path('reader/generate-tts/', GenerateTTSAPIView.as_view(), name='generate_tts_api'),
     path('reader/lessons/<int:lesson_id>/listening-time/', UpdateListeningTimeAPIView.as_view(), name='update_listening_time_api'),
     path('reader/lessons/<int:pk>/progress/', UpdateReadingProgressAPIView.as_view(), name='update_reading_progress_api'),
     path('reader/tokens/<int:token_id>/status/', TokenStatusAPIView.as_view(), name='token_status_api'),
+    path('reader/tokens/status/bulk/', BulkTokenStatusAPIView.as_view(), name='token_status_bulk_api'),
+    path('reader/vocabulary/top-unknown/', TopUnknownLemmasAPIView.as_view(), name='top_unknown_lemmas_api'),
 ]
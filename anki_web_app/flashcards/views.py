@@ -4,13 +4,20 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from datetime import timedelta
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import F, FilteredRelation, Q, Sum
 import csv
 import io
 import uuid
+from collections import defaultdict
 
-from .models import Sentence, Review, GRADUATING_INTERVAL_DAYS, Card, CardReview, StudySession, SessionActivity, Lesson, Token, Phrase, TokenStatus
+from .models import Sentence, Review, GRADUATING_INTERVAL_DAYS, Card, CardReview, StudySession, SessionActivity, Lesson, Token, Phrase, UserVocabulary
 from .tokenization import normalize_token
+from .coverage import apply_vocabulary_change, ensure_lesson_coverage
+from .known_words import invalidate_known_words
+from .lemma_frequency import remove_lesson_frequencies, top_unknown_lemmas
+from .phrase_matcher import invalidate_phrase_matcher
+from . import glossary
 from .serializers import (
     SentenceSerializer,
     ReviewInputSerializer,
@@ -24,6 +31,8 @@ from .serializers import (
     LessonDetailSerializer,
     LessonCreateSerializer,
     LessonUpdateSerializer,
+    LessonUploadSerializer,
+    BulkTokenStatusSerializer,
     TokenSerializer,
     TranslateRequestSerializer,
     PhraseSerializer,
@@ -33,7 +42,9 @@ from .serializers import (
 
 from rest_framework.generics import ListAPIView, RetrieveAPIView, ListCreateAPIView, UpdateAPIView, DestroyAPIView
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -472,6 +483,8 @@ class CardImportAPIView(APIView):
     - language: optional language label
     - create_reverse: boolean (default True) - create reverse cards
     - delimiter: optional delimiter (default: auto-detect)
+    - translate_missing: boolean (default False) - fill empty backs by translating the
+      fronts from `language` to English (batched DeepL requests)
     """
     permission_classes = [IsAuthenticated]
     
@@ -489,6 +502,7 @@ class CardImportAPIView(APIView):
         create_reverse = request.data.get('create_reverse', 'true').lower() == 'true'
         delimiter = request.data.get('delimiter', None)
         preview_only = request.data.get('preview_only', 'false').lower() == 'true'
+        translate_missing = request.data.get('translate_missing', 'false').lower() == 'true'
         
         # Detect delimiter if not provided
         if delimiter is None:
@@ -562,6 +576,19 @@ class CardImportAPIView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            # Translate the fronts of rows without a back in batched requests
+            missing_backs = {}
+            if translate_missing and language:
+                from .translation_service import translate_many
+                file_io.seek(0)
+                fronts = list(dict.fromkeys(
+                    (row.get(front_column) or '').strip()
+                    for row in csv.DictReader(file_io, delimiter=delimiter)
+                    if not (row.get(back_column) or '').strip()
+                ))
+                fronts = [front for front in fronts if front]
+                missing_backs = dict(zip(fronts, translate_many(fronts, language, 'en')))
+            
             # Actually import the cards
             file_io.seek(0)
             reader = csv.DictReader(file_io, delimiter=delimiter)
@@ -573,7 +600,7 @@ class CardImportAPIView(APIView):
             for row_num, row in enumerate(reader, start=2):  # start=2 because of header
                 try:
                     front = (row.get(front_column) or '').strip()
-                    back = (row.get(back_column) or '').strip()
+                    back = (row.get(back_column) or '').strip() or missing_backs.get(front) or ''
                     
                     if not front or not back:
                         error_count += 1
@@ -792,15 +819,96 @@ class CurrentUserAPIView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class HealthAPIView(APIView):
+    """
+    Unauthenticated health check.
+    Reports whether the configured spaCy models are loaded and how long each load took,
+    this worker's outbound request latencies per host and the providers' circuit breakers.
+    GET: /api/flashcards/health/
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        from django.conf import settings
+        from .circuit_breaker import states as circuit_states
+        from .http_client import latency_stats
+        from .tokenization import get_spacy_model_status
+
+        models_status = get_spacy_model_status(settings.SPACY_PRELOAD_LANGUAGES)
+        models_ready = all(info['loaded'] for info in models_status.values())
+        return Response({
+            'status': 'ok',
+            'models_ready': models_ready,
+            'models': models_status,
+            'outbound': latency_stats(),
+            'circuits': circuit_states(),
+        }, status=status.HTTP_200_OK)
+
+
 class LessonListCreateAPIView(UserScopedMixin, ListCreateAPIView):
     """
     List or create lessons.
     POST: Create a new lesson (tokenizes automatically).
+    
+    GET supports difficulty sorting/filtering from the stored known-word coverage:
+    - ordering: difficulty (easiest first), -difficulty, known_percentage, unknown_words,
+      unique_words, created_at (prefix '-' for descending)
+    - min_known_percentage, max_known_percentage, max_unknown_words
     """
-    queryset = Lesson.objects.all().order_by('-created_at')
+    queryset = Lesson.objects.defer('packed_tokens').order_by('-created_at')
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
     
+    ORDERING_FIELDS = {
+        'difficulty': '-coverage_known_percentage',
+        '-difficulty': 'coverage_known_percentage',
+        'known_percentage': 'coverage_known_percentage',
+        '-known_percentage': '-coverage_known_percentage',
+        'unknown_words': 'coverage_unknown_words',
+        '-unknown_words': '-coverage_unknown_words',
+        'unique_words': 'coverage_unique_words',
+        '-unique_words': '-coverage_unique_words',
+        'created_at': 'created_at',
+        '-created_at': '-created_at',
+    }
+    FILTERS = {
+        'min_known_percentage': ('coverage_known_percentage__gte', float),
+        'max_known_percentage': ('coverage_known_percentage__lte', float),
+        'max_unknown_words': ('coverage_unknown_words__lte', int),
+    }
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.request.method != 'GET' or not user.is_authenticated:
+            return queryset
+        
+        # Coverage is computed once per lesson and then kept current incrementally
+        ensure_lesson_coverage(user)
+        queryset = queryset.annotate(
+            user_coverage=FilteredRelation('coverages', condition=Q(coverages__user=user)),
+            coverage_unique_words=F('user_coverage__unique_words'),
+            coverage_unknown_words=F('user_coverage__unknown_words'),
+            coverage_total_words=F('user_coverage__total_words'),
+            coverage_known_percentage=F('user_coverage__known_percentage'),
+        )
+        
+        params = self.request.query_params
+        for param, (lookup, cast) in self.FILTERS.items():
+            if params.get(param) not in (None, ''):
+                try:
+                    queryset = queryset.filter(**{lookup: cast(params[param])})
+                except ValueError:
+                    raise ValidationError({param: 'Must be a number'})
+        
+        ordering = params.get('ordering')
+        if ordering:
+            if ordering not in self.ORDERING_FIELDS:
+                raise ValidationError({'ordering': f"Must be one of: {', '.join(self.ORDERING_FIELDS)}"})
+            queryset = queryset.order_by(self.ORDERING_FIELDS[ordering], '-created_at')
+        return queryset
+    
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return LessonCreateSerializer
@@ -810,6 +918,64 @@ class LessonListCreateAPIView(UserScopedMixin, ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
+class LessonUploadAPIView(APIView):
+    """
+    Create lessons from an uploaded text file (e.g. a book).
+    The file is read and tokenized in chunks so memory stays flat regardless of size.
+    POST (multipart): {file, title, language, split_chapters}
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def post(self, request, *args, **kwargs):
+        from .ingestion import ingest_text_stream, iter_decoded_chunks
+        
+        serializer = LessonUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        try:
+            lessons = ingest_text_stream(
+                request.user,
+                iter_decoded_chunks(data['file']),
+                title=data['title'],
+                language=data['language'],
+                split_chapters=data['split_chapters'],
+            )
+        except UnicodeDecodeError:
+            return Response(
+                {'error': 'File encoding error. Please ensure the file is UTF-8 encoded.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            # Nothing was created: the upload runs in a single transaction
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"Lesson upload failed: {e}", exc_info=True)
+            return Response(
+                {'error': f'Error processing file: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        if lessons:
+            # The first chapter is the one read next; later chapters translate lazily
+            from .sentence_prefetch import schedule_sentence_prefetch
+            schedule_sentence_prefetch(lessons[0])
+        
+        return Response({
+            'lessons': [
+                {
+                    'lesson_id': lesson.lesson_id,
+                    'title': lesson.title,
+                    'chapter_number': lesson.chapter_number,
+                    'token_count': lesson.token_count,
+                }
+                for lesson in lessons
+            ],
+            'message': f'Created {len(lessons)} lesson(s)',
+        }, status=status.HTTP_201_CREATED)
+
+
 class LessonDetailAPIView(UserScopedMixin, RetrieveAPIView):
     """
     Get lesson details with tokens.
@@ -842,30 +1008,49 @@ class LessonDeleteAPIView(UserScopedMixin, DestroyAPIView):
     permission_classes = [IsAuthenticated]
     
     def perform_destroy(self, instance):
-        # Delete associated tokens and phrases (CASCADE should handle this, but being explicit)
-        instance.tokens.all().delete()
-        instance.phrases.all().delete()
-        instance.delete()
+        with transaction.atomic():
+            remove_lesson_frequencies(instance)
+            # Delete associated tokens and phrases (CASCADE should handle this, but being explicit)
+            instance.tokens.all().delete()
+            instance.phrases.all().delete()
+            instance.delete()
+            invalidate_phrase_matcher(instance.user_id, instance.language)
 
 
 class TranslateAPIView(APIView):
     """
     Translate text (word or sentence).
     POST: {text, source_lang, target_lang}
+      or: {texts: [str, ...], source_lang, target_lang}  (batched, translations in input order)
     """
     permission_classes = [IsAuthenticated]
     
     def post(self, request, *args, **kwargs):
-        from .translation_service import translate_text
+        from .translation_service import translate_text, translate_many
         
         serializer = TranslateRequestSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        text = serializer.validated_data['text']
         source_lang = serializer.validated_data.get('source_lang', 'de')
         target_lang = serializer.validated_data.get('target_lang', 'en')
         
+        if 'texts' in serializer.validated_data:
+            texts = serializer.validated_data['texts']
+            translations = translate_many(texts, source_lang, target_lang)
+            if not any(translations):
+                return Response(
+                    {'error': 'Translation failed. Check API key configuration.'},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+            return Response({
+                'texts': texts,
+                'translations': translations,
+                'source_lang': source_lang,
+                'target_lang': target_lang,
+            }, status=status.HTTP_200_OK)
+        
+        text = serializer.validated_data['text']
         translation = translate_text(text, source_lang, target_lang)
         
         if translation:
@@ -882,59 +1067,126 @@ class TranslateAPIView(APIView):
             )
 
 
+class LessonTranslateSentencesAPIView(APIView):
+    """
+    Translate all of a lesson's untranslated sentences in batched requests.
+    POST: /api/flashcards/reader/lessons/<lesson_id>/translate-sentences/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, lesson_id, *args, **kwargs):
+        try:
+            lesson = Lesson.objects.defer('packed_tokens').get(lesson_id=lesson_id, user=request.user)
+        except Lesson.DoesNotExist:
+            return Response({'error': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        translated = lesson.translate_sentences()
+        return Response({
+            'translated': translated,
+            'sentence_translations': lesson.get_sentence_translations(),
+        }, status=status.HTTP_200_OK)
+
+
+class LessonTokenMaterializeAPIView(APIView):
+    """
+    Create (or return) the Token row for a packed lesson token.
+    POST: /api/flashcards/reader/lessons/<lesson_id>/tokens/<index>/materialize/
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, lesson_id, index, *args, **kwargs):
+        from .packed_tokens import materialize_token
+        
+        try:
+            lesson = Lesson.objects.defer('text').get(lesson_id=lesson_id, user=request.user)
+        except Lesson.DoesNotExist:
+            return Response({'error': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
+        if lesson.packed_token_count is None:
+            return Response({'error': 'Lesson tokens are not packed'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            token = materialize_token(lesson, index)
+        except IndexError:
+            return Response({'error': 'Token not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        data = TokenSerializer(token, context={'request': request}).data
+        data['index'] = index
+        return Response(data, status=status.HTTP_200_OK)
+
+
 class TokenClickAPIView(APIView):
     """
     Record a token click and return translation.
     GET: /api/flashcards/reader/tokens/<token_id>/click/
     """
     permission_classes = [IsAuthenticated]
+    # Provider reported as degraded when a click lookup fails or runs out of time
+    LOOKUP_SERVICES = {'translation': 'deepl', 'dictionary': 'wiktionary', 'sentence_translation': 'deepl'}
     
     def get(self, request, token_id, *args, **kwargs):
-        from .translation_service import translate_text, get_word_translation
-        from .dictionary_service import get_dictionary_entry
+        from django.conf import settings
+        from . import deadline
         
         try:
-            token = Token.objects.get(token_id=token_id, lesson__user=request.user)
+            token = Token.objects.select_related('lesson', 'lexeme').defer('lesson__text', 'lesson__packed_tokens').get(
+                token_id=token_id, lesson__user=request.user
+            )
         except Token.DoesNotExist:
             return Response({'error': 'Token not found'}, status=status.HTTP_404_NOT_FOUND)
         
+        # Slow or failing providers must not hold the worker: answer with what arrived in time
+        with deadline.budget(getattr(settings, 'TOKEN_CLICK_DEADLINE_SECONDS', 4.0)) as budget:
+            data = self._click(request, token)
+        # Providers whose data is missing (skipped, timed out or circuit open); clicking again retries them
+        data['degraded'] = budget.degraded
+        return Response(data, status=status.HTTP_200_OK)
+    
+    def _click(self, request, token):
+        from . import deadline, lookup_pool
+        from .translation_service import translate_text, get_word_translation
+        
         # Increment click count
         token.clicked_count += 1
+        lesson = token.lesson
         
-        # Get translation if not cached
+        # The shared glossary answers words already looked up in any lesson
+        if not token.translation or not token.dictionary_entry.get('meanings'):
+            known = glossary.lookup(lesson.language, 'en', token.lexeme.normalized, token.lexeme.lemma or None)
+            if known:
+                token.translation = token.translation or known['translation']
+                if not token.dictionary_entry.get('meanings') and known['dictionary_entry']:
+                    token.dictionary_entry = known['dictionary_entry']
+        fetched_translation = None
+        fetched_dictionary_entry = None
+        
+        # Sentence for context, and its cached translation
+        sentence_index, sentence_text = lesson.get_sentence_at(token.start_offset)
+        sentence_translation = lesson.get_sentence_translation(sentence_index)
+        
+        # The remaining lookups are independent: run them concurrently so the click
+        # takes as long as the slowest one, and stop waiting when the budget is spent
+        lookups = {}
         if not token.translation:
-            word_translation = get_word_translation(token.text, token.lesson.language, 'en')
-            if word_translation:
-                token.translation = word_translation.get('translation', '')
-        
-        # Get dictionary entry if not cached
+            lookups['translation'] = lookup_pool.submit(get_word_translation, token.text, lesson.language, 'en')
         # dictionary_entry defaults to empty dict {}, so check if it has meanings
         if not token.dictionary_entry.get('meanings'):
-            try:
-                # Try looking up the word itself first
-                dictionary_entry = get_dictionary_entry(token.text, token.lesson.language, 'en')
-                
-                # If lookup fails and we have a lemma, try the lemma instead
-                if not dictionary_entry and token.lemma and token.lemma != token.normalized:
-                    dictionary_entry = get_dictionary_entry(token.lemma, token.lesson.language, 'en')
-                    if dictionary_entry:
-                        # Log that we used lemma
-                        import logging
-                        logger = logging.getLogger(__name__)
-                        logger.debug(f"Dictionary lookup succeeded for lemma '{token.lemma}' (original: '{token.text}')")
-                
-                if dictionary_entry:
-                    token.dictionary_entry = dictionary_entry
-                else:
-                    # Log when dictionary lookup fails for debugging
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.debug(f"Dictionary lookup returned None for word '{token.text}' (lang: {token.lesson.language}, lemma: {token.lemma})")
-            except Exception as e:
-                # Log errors but don't fail the request
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Dictionary lookup error for '{token.text}': {e}", exc_info=True)
+            lookups['dictionary'] = lookup_pool.submit(
+                self._lookup_dictionary_entry, token.text, token.lexeme.lemma or None, lesson.language
+            )
+        if sentence_translation is None and sentence_text:
+            lookups['sentence_translation'] = lookup_pool.submit(translate_text, sentence_text, lesson.language, 'en')
+        results = lookup_pool.gather(lookups, timeout=deadline.remaining(), services=self.LOOKUP_SERVICES)
+        
+        word_translation = results.get('translation')
+        if word_translation:
+            token.translation = word_translation.get('translation', '')
+            fetched_translation = token.translation
+        if results.get('dictionary'):
+            token.dictionary_entry = results['dictionary']
+            fetched_dictionary_entry = token.dictionary_entry
+        if results.get('sentence_translation'):
+            sentence_translation = results['sentence_translation']
+            lesson.set_sentence_translation(sentence_index, sentence_translation)
         
         # Save token with all updates
         update_fields = ['clicked_count']
@@ -944,38 +1196,113 @@ class TokenClickAPIView(APIView):
         if token.dictionary_entry and token.dictionary_entry.get('meanings'):
             update_fields.append('dictionary_entry')
         token.save(update_fields=update_fields)
+        if fetched_translation or fetched_dictionary_entry:
+            glossary.record(
+                lesson.language, 'en', token.lexeme.normalized, token.lexeme.lemma or None,
+                translation=fetched_translation, dictionary_entry=fetched_dictionary_entry,
+            )
         
-        # Get sentence translation (for context)
-        lesson = token.lesson
-        sentence_text = self._get_sentence_context(lesson.text, token.start_offset)
-        sentence_translation = None
-        if sentence_text in lesson.sentence_translations:
-            sentence_translation = lesson.sentence_translations[sentence_text]
-        else:
-            sentence_translation = translate_text(sentence_text, lesson.language, 'en')
-            if sentence_translation:
-                lesson.sentence_translations[sentence_text] = sentence_translation
-                lesson.save(update_fields=['sentence_translations'])
-        
-        return Response({
+        return {
             'token': TokenSerializer(token, context={'request': request}).data,
             'sentence': sentence_text,
+            'sentence_index': sentence_index,
             'sentence_translation': sentence_translation,
-        }, status=status.HTTP_200_OK)
+        }
     
-    def _get_sentence_context(self, text: str, offset: int) -> str:
-        """Extract sentence containing the token."""
-        # Find sentence boundaries
-        sentence_end = text.find('.', offset)
-        sentence_start = text.rfind('.', 0, offset) + 1
-        if sentence_start == 0:
-            sentence_start = 0
-        if sentence_end == -1:
-            sentence_end = len(text)
-        else:
-            sentence_end += 1
+    @staticmethod
+    def _lookup_dictionary_entry(text, lemma, language):
+        """Dictionary entry for the word or its lemma (runs on the lookup pool)."""
+        from .dictionary_service import get_dictionary_entry
+        import logging
+        logger = logging.getLogger(__name__)
         
-        return text[sentence_start:sentence_end].strip()
+        try:
+            # Falls back to the lemma's entry when the form has none
+            dictionary_entry = get_dictionary_entry(text, language, 'en', lemma=lemma)
+            if not dictionary_entry:
+                # Log when dictionary lookup fails for debugging
+                logger.debug(f"Dictionary lookup returned None for word '{text}' (lang: {language}, lemma: {lemma})")
+            return dictionary_entry
+        except Exception as e:
+            # Log errors but don't fail the request
+            logger.error(f"Dictionary lookup error for '{text}': {e}", exc_info=True)
+            return None
+
+
+class TokenLookupAPIView(APIView):
+    """
+    Cached translations and dictionary entries for many tokens (e.g. the visible ones).
+    POST: {
+        token_ids?: [int, ...],
+        lesson_id?: int, indexes?: [int, ...]   # packed lesson tokens without a row yet
+    }
+    Only token rows, the glossary and the caches are read; external services are
+    never called. Tokens listed in 'missing' have no cached translation yet.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_TOKENS = 1000
+    
+    def post(self, request, *args, **kwargs):
+        from .packed_tokens import get_packed_tokens, load_lexemes
+        from .token_lookup import lookup_cached
+        
+        token_ids = request.data.get('token_ids') or []
+        indexes = request.data.get('indexes') or []
+        lesson_id = request.data.get('lesson_id')
+        if not isinstance(token_ids, list) or not isinstance(indexes, list):
+            return Response({'error': 'token_ids and indexes must be lists'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            token_ids = [int(token_id) for token_id in token_ids]
+            indexes = [int(index) for index in indexes]
+        except (TypeError, ValueError):
+            return Response({'error': 'token_ids and indexes must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not token_ids and not indexes:
+            return Response({'error': 'token_ids or indexes is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(token_ids) + len(indexes) > self.MAX_TOKENS:
+            return Response({'error': f'At most {self.MAX_TOKENS} tokens per request'}, status=status.HTTP_400_BAD_REQUEST)
+        if indexes and not lesson_id:
+            return Response({'error': 'lesson_id is required with indexes'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        items_by_language = {}
+        rows = Token.objects.filter(token_id__in=token_ids, lesson__user=request.user).values_list(
+            'token_id', 'text', 'lexeme__normalized', 'lexeme__lemma', 'translation', 'dictionary_entry', 'lesson__language'
+        )
+        for token_id, text, normalized, lemma, translation, dictionary_entry, language in rows:
+            items_by_language.setdefault(language, []).append({
+                'token_id': token_id, 'text': text, 'normalized': normalized, 'lemma': lemma or None,
+                'translation': translation, 'dictionary_entry': dictionary_entry,
+            })
+        
+        if indexes:
+            try:
+                lesson = Lesson.objects.get(lesson_id=lesson_id, user=request.user)
+            except (Lesson.DoesNotExist, ValueError, TypeError):
+                return Response({'error': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
+            packed = get_packed_tokens(lesson)
+            if packed is None:
+                return Response({'error': 'Lesson tokens are not packed'}, status=status.HTTP_400_BAD_REQUEST)
+            indexes = sorted({index for index in indexes if 0 <= index < packed.count})
+            lexemes = load_lexemes(packed.lexeme_ids[index] for index in indexes)
+            for index in indexes:
+                normalized, lemma, _ = lexemes[packed.lexeme_ids[index]]
+                items_by_language.setdefault(lesson.language, []).append({
+                    'index': index, 'text': lesson.get_text_slice(packed.starts[index], packed.ends[index]),
+                    'normalized': normalized, 'lemma': lemma or None,
+                    'translation': None, 'dictionary_entry': None,
+                })
+        
+        results = []
+        for language, items in items_by_language.items():
+            results.extend(lookup_cached(language, items))
+        tokens = []
+        missing = []
+        for item in results:
+            key = {'token_id': item['token_id']} if 'token_id' in item else {'index': item['index']}
+            dictionary_entry = item['dictionary_entry'] if item['dictionary_entry'] and item['dictionary_entry'].get('meanings') else None
+            tokens.append({**key, 'translation': item['translation'] or None, 'dictionary_entry': dictionary_entry})
+            if not item['translation']:
+                missing.append(key)
+        return Response({'tokens': tokens, 'missing': missing}, status=status.HTTP_200_OK)
 
 
 class CreatePhraseAPIView(APIView):
@@ -997,17 +1324,22 @@ class CreatePhraseAPIView(APIView):
         start_offset = data['start_offset']
         end_offset = data['end_offset']
         
-        # Get lesson
+        # Get lesson (the text is fetched by slice, not loaded whole)
         try:
-            lesson = Lesson.objects.get(lesson_id=lesson_id, user=request.user)
+            lesson = Lesson.objects.defer('text').get(lesson_id=lesson_id, user=request.user)
         except Lesson.DoesNotExist:
             return Response({'error': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Extract phrase text
-        phrase_text = lesson.text[start_offset:end_offset].strip()
+        phrase_text = lesson.get_text_slice(start_offset, end_offset).strip()
         if not phrase_text:
             return Response({'error': 'Selected text is empty'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Packed lessons only have rows for tokens someone interacted with
+        if lesson.packed_token_count is not None:
+            from .packed_tokens import materialize_range
+            materialize_range(lesson, start_offset, end_offset)
+        
         # Find start and end tokens
         tokens = lesson.tokens.filter(
             start_offset__gte=start_offset,
@@ -1026,6 +1358,7 @@ class CreatePhraseAPIView(APIView):
         
         start_token = tokens.first()
         end_token = tokens.last()
+        sentence_index, sentence_text = lesson.get_sentence_at(start_token.start_offset)
         
         # Check if phrase already exists
         existing_phrase = Phrase.objects.filter(
@@ -1038,6 +1371,8 @@ class CreatePhraseAPIView(APIView):
             # Return existing phrase
             return Response({
                 'phrase': PhraseSerializer(existing_phrase).data,
+                'sentence': sentence_text,
+                'sentence_index': sentence_index,
                 'message': 'Phrase already exists'
             }, status=status.HTTP_200_OK)
         
@@ -1058,6 +1393,8 @@ class CreatePhraseAPIView(APIView):
         
         return Response({
             'phrase': PhraseSerializer(phrase).data,
+            'sentence': sentence_text,
+            'sentence_index': sentence_index,
             'message': 'Phrase created successfully'
         }, status=status.HTTP_201_CREATED)
 
@@ -1084,23 +1421,39 @@ class AddToFlashcardsAPIView(APIView):
         
         # Get lesson
         try:
-            lesson = Lesson.objects.get(lesson_id=lesson_id, user=request.user)
+            lesson = Lesson.objects.defer('text').get(lesson_id=lesson_id, user=request.user)
         except Lesson.DoesNotExist:
             return Response({'error': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
         
+        token = None
+        if token_id:
+            token = Token.objects.filter(token_id=token_id, lesson=lesson).select_related('lexeme').first()
+        if not back.strip() and token is not None:
+            # No translation typed: use the token's, or the shared glossary's
+            known = glossary.lookup(lesson.language, 'en', token.lexeme.normalized, token.lexeme.lemma or None)
+            back = token.translation or (known['translation'] if known else None) or ''
+        if not back.strip():
+            return Response({'back': ['No translation given and none known for this word']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
         # Get sentence translation if available
         sentence_translation = None
         if sentence_context:
-            # Check if we have a cached translation for this sentence
-            if sentence_context in lesson.sentence_translations:
-                sentence_translation = lesson.sentence_translations[sentence_context]
-            else:
+            # Locate the sentence by the token/phrase offset so the cache is keyed by sentence index
+            sentence_index = None
+            offset = self._get_source_offset(lesson, token_id, phrase_id)
+            if offset is not None:
+                index, sentence_text = lesson.get_sentence_at(offset)
+                if sentence_text == sentence_context.strip():
+                    sentence_index = index
+            
+            sentence_translation = lesson.get_sentence_translation(sentence_index)
+            if sentence_translation is None:
                 # Try to get translation
                 from .translation_service import translate_text
                 sentence_translation = translate_text(sentence_context, lesson.language, 'en')
-                if sentence_translation:
-                    lesson.sentence_translations[sentence_context] = sentence_translation
-                    lesson.save(update_fields=['sentence_translations'])
+                if sentence_translation and sentence_index is not None:
+                    lesson.set_sentence_translation(sentence_index, sentence_translation)
         
         # Format notes with context and translation
         notes_parts = [f"From lesson: {lesson.title}"]
@@ -1128,14 +1481,13 @@ class AddToFlashcardsAPIView(APIView):
         card = card_serializer.save(user=request.user)
         
         # Update token/phrase
-        if token_id:
-            try:
-                token = Token.objects.get(token_id=token_id, lesson=lesson)
-                token.added_to_flashcards = True
-                token.card_id = card.card_id
-                token.save(update_fields=['added_to_flashcards', 'card_id'])
-            except Token.DoesNotExist:
-                pass
+        if token is not None:
+            token.added_to_flashcards = True
+            token.card_id = card.card_id
+            token.save(update_fields=['added_to_flashcards', 'card_id'])
+            # The card's back becomes the word's glossary translation if there is none yet
+            glossary.record(lesson.language, 'en', token.lexeme.normalized, token.lexeme.lemma or None,
+                            translation=back.strip(), source='flashcard', overwrite=False)
         
         if phrase_id:
             try:
@@ -1150,6 +1502,18 @@ class AddToFlashcardsAPIView(APIView):
             'card_id': card.card_id,
             'message': 'Card created successfully',
         }, status=status.HTTP_201_CREATED)
+    
+    def _get_source_offset(self, lesson, token_id, phrase_id):
+        """Character offset of the token or phrase being added, or None."""
+        if token_id:
+            offset = Token.objects.filter(token_id=token_id, lesson=lesson).values_list('start_offset', flat=True).first()
+            if offset is not None:
+                return offset
+        if phrase_id:
+            return Phrase.objects.filter(phrase_id=phrase_id, lesson=lesson).values_list(
+                'token_start__start_offset', flat=True
+            ).first()
+        return None
 
 
 class GenerateTTSAPIView(APIView):
@@ -1176,6 +1540,8 @@ class GenerateTTSAPIView(APIView):
         return language_map.get(language.lower(), f"{language}-{language.upper()}")
     
     def post(self, request, *args, **kwargs):
+        from django.conf import settings
+        from . import deadline
         from .tts_service import generate_tts_audio
         import logging
         
@@ -1205,7 +1571,16 @@ class GenerateTTSAPIView(APIView):
             language_code = 'de-DE'  # Default fallback
         
         logger.info(f"Generating TTS for text length {len(text)}, language: {language_code}")
-        audio_url = generate_tts_audio(text, language_code)
+        with deadline.budget(getattr(settings, 'TTS_DEADLINE_SECONDS', 20.0)) as budget:
+            audio_url = generate_tts_audio(text, language_code)
+        
+        if not audio_url and budget.degraded:
+            # Providers are down or too slow right now; fail fast instead of tying up the worker
+            logger.error(f"TTS providers unavailable: {budget.degraded}")
+            return Response(
+                {'error': 'TTS providers are unavailable, try again later', 'degraded': budget.degraded},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         
         if audio_url:
             logger.info(f"TTS generated successfully: {audio_url}")
@@ -1330,13 +1705,39 @@ class UpdateReadingProgressAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def _parse_vocabulary_level(status_value, raw_level):
+    """
+    Level for a status update: the explicit level if given, otherwise
+    MAX_LEVEL for 'known' and 0 for 'unknown'. Returns None if invalid.
+    """
+    if raw_level is None:
+        return UserVocabulary.MAX_LEVEL if status_value == 'known' else 0
+    try:
+        level = int(raw_level)
+    except (TypeError, ValueError):
+        return None
+    return level if 0 <= level <= UserVocabulary.MAX_LEVEL else None
+
+
 class TokenStatusAPIView(APIView):
     """
-    Mark a token as known or unknown for the current user.
-    POST: {token_id, status} where status is 'known' or 'unknown'
+    Mark a token's word as known or unknown for the current user.
+    The status is stored per word (lemma, or normalized form) in UserVocabulary,
+    so it applies to every occurrence in every lesson.
+    POST: {status, level?} where status is 'known' or 'unknown' and level is 0-5
     """
     permission_classes = [IsAuthenticated]
     
+    def _get_token(self, request, token_id):
+        try:
+            token = Token.objects.select_related('lesson', 'lexeme').defer('lesson__text', 'lesson__packed_tokens').get(token_id=token_id)
+        except Token.DoesNotExist:
+            return None
+        # Verify user has access to the lesson
+        if token.lesson.user_id != request.user.id:
+            return None
+        return token
+    
     def post(self, request, token_id, *args, **kwargs):
         # token_id comes from URL path
         status_value = request.data.get('status')
@@ -1347,53 +1748,198 @@ class TokenStatusAPIView(APIView):
         if status_value not in ['known', 'unknown']:
             return Response({'error': "status must be 'known' or 'unknown'"}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            token = Token.objects.get(token_id=token_id)
-            # Verify user has access to the lesson
-            if token.lesson.user != request.user:
-                return Response({'error': 'Token not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Token.DoesNotExist:
-            return Response({'error': 'Token not found'}, status=status.HTTP_404_NOT_FOUND)
+        level = _parse_vocabulary_level(status_value, request.data.get('level'))
+        if level is None:
+            return Response(
+                {'error': f'level must be between 0 and {UserVocabulary.MAX_LEVEL}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Get or create TokenStatus
-        token_status, created = TokenStatus.objects.get_or_create(
-            user=request.user,
-            token=token,
-            defaults={'status': status_value}
-        )
+        token = self._get_token(request, token_id)
+        if token is None:
+            return Response({'error': 'Token not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        if not created:
-            token_status.status = status_value
-            token_status.save(update_fields=['status'])
+        language = token.lesson.language
+        with transaction.atomic():
+            # Lock the row so a concurrent change can't slip between reading the previous
+            # status and writing the new one; a concurrent first mark waits on the unique insert
+            entry, created = UserVocabulary.objects.select_for_update().get_or_create(
+                user=request.user,
+                language=language,
+                key=token.vocabulary_key,
+                defaults={'status': status_value, 'level': level}
+            )
+            previous_status = None if created else entry.status
+            if not created:
+                entry.status = status_value
+                entry.level = level
+                # save() bumps the known-word set version in this transaction
+                entry.save()
+            if (previous_status == 'known') != (status_value == 'known'):
+                apply_vocabulary_change(request.user, language, [entry.key], status_value == 'known')
         
         return Response({
             'token_id': token.token_id,
-            'status': token_status.status,
+            'vocabulary_key': entry.key,
+            'status': entry.status,
+            'level': entry.level,
             'created': created,
         }, status=status.HTTP_200_OK)
     
     def delete(self, request, token_id, *args, **kwargs):
         """
-        Remove the status for a token (reset to no status).
+        Remove the status for a token's word (reset to no status).
         DELETE: /api/flashcards/reader/tokens/<token_id>/status/
         """
-        try:
-            token = Token.objects.get(token_id=token_id)
-            # Verify user has access to the lesson
-            if token.lesson.user != request.user:
-                return Response({'error': 'Token not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Token.DoesNotExist:
+        token = self._get_token(request, token_id)
+        if token is None:
             return Response({'error': 'Token not found'}, status=status.HTTP_404_NOT_FOUND)
         
+        entries = UserVocabulary.objects.filter(
+            user=request.user,
+            language=token.lesson.language,
+            key=token.vocabulary_key,
+        )
+        with transaction.atomic():
+            was_known = 'known' in entries.select_for_update().values_list('status', flat=True)
+            deleted, _ = entries.delete()
+            if was_known:
+                apply_vocabulary_change(request.user, token.lesson.language, [token.vocabulary_key], now_known=False)
+            if deleted:
+                invalidate_known_words(request.user.pk, token.lesson.language)
+        return Response({
+            'token_id': token.token_id,
+            'vocabulary_key': token.vocabulary_key,
+            'message': 'Status removed' if deleted else 'No status to remove'
+        }, status=status.HTTP_200_OK)
+
+
+class BulkTokenStatusAPIView(APIView):
+    """
+    Set the status of many words in one request.
+    POST: {
+        status: 'known' | 'unknown',
+        level?: 0-5,
+        lesson_id?: int,              # required for 'words' and 'only_unmarked'
+        token_ids?: [int, ...],       # tokens to mark (e.g. the tokens on the current page)
+        words?: [str, ...],           # normalized forms to mark
+        only_unmarked?: bool          # skip words that already have a status
+    }
+    Without token_ids or words, applies to every token in the lesson.
+    All entries are written with a single upsert.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        status_value = request.data.get('status')
+        if status_value not in ['known', 'unknown']:
+            return Response({'error': "status must be 'known' or 'unknown'"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        level = _parse_vocabulary_level(status_value, request.data.get('level'))
+        if level is None:
+            return Response(
+                {'error': f'level must be between 0 and {UserVocabulary.MAX_LEVEL}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = BulkTokenStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        token_ids = serializer.validated_data['token_ids']
+        words = serializer.validated_data['words']
+        lesson_id = serializer.validated_data['lesson_id']
+        only_unmarked = serializer.validated_data['only_unmarked']
+        
+        tokens = Token.objects.filter(lesson__user=request.user)
+        if lesson_id:
+            try:
+                lesson = Lesson.objects.only('lesson_id', 'language', 'packed_token_count').get(lesson_id=lesson_id, user=request.user)
+            except Lesson.DoesNotExist:
+                return Response({'error': 'Lesson not found'}, status=status.HTTP_404_NOT_FOUND)
+            tokens = tokens.filter(lesson=lesson)
+        
+        if token_ids or words:
+            selection = Q()
+            if token_ids:
+                selection |= Q(token_id__in=token_ids)
+            if words:
+                selection |= Q(lexeme__normalized__in=[normalize_token(str(word)) for word in words])
+            tokens = tokens.filter(selection)
+        
+        # Word tokens only; punctuation has no vocabulary entry
+        keys = set()
+        for language, key in tokens.order_by().values_list('lesson__language', 'lexeme__key').distinct():
+            if key and any(ch.isalnum() for ch in key):
+                keys.add((language, key))
+        
+        if lesson_id and lesson.packed_token_count is not None and (words or not token_ids):
+            # Packed lessons only have rows for tokens someone interacted with
+            from .packed_tokens import packed_word_forms
+            wanted = {normalize_token(str(word)) for word in words}
+            for normalized, key in packed_word_forms(lesson).items():
+                if (not words or normalized in wanted) and key and any(ch.isalnum() for ch in key):
+                    keys.add((lesson.language, key))
+        
+        with transaction.atomic():
+            # Lock the existing entries so the flips below are computed from the statuses the upsert replaces
+            existing = {}
+            if keys:
+                rows = UserVocabulary.objects.select_for_update().filter(
+                    user=request.user,
+                    language__in={language for language, _ in keys},
+                    key__in={key for _, key in keys},
+                ).order_by().values_list('language', 'key', 'status')
+                existing = {(language, key): entry_status for language, key, entry_status in rows}
+            if only_unmarked:
+                keys -= set(existing)
+            
+            # Keep lesson coverage current for words whose known-ness flipped
+            flipped = defaultdict(set)
+            for language, key in keys:
+                if (existing.get((language, key)) == 'known') != (status_value == 'known'):
+                    flipped[language].add(key)
+            
+            UserVocabulary.objects.bulk_create(
+                [
+                    UserVocabulary(user=request.user, language=language, key=key, status=status_value, level=level)
+                    for language, key in keys
+                ],
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['user', 'language', 'key'],
+                update_fields=['status', 'level', 'updated_at'],
+            )
+            for language, language_keys in flipped.items():
+                apply_vocabulary_change(request.user, language, language_keys, status_value == 'known')
+            for language in {language for language, key in keys if existing.get((language, key)) != status_value}:
+                invalidate_known_words(request.user.pk, language)
+        
+        return Response({
+            'status': status_value,
+            'level': level,
+            'updated': len(keys),
+            'vocabulary_keys': sorted(key for _, key in keys),
+        }, status=status.HTTP_200_OK)
+
+
+class TopUnknownLemmasAPIView(APIView):
+    """
+    Most frequent words across the user's lessons that aren't marked known.
+    GET: ?language=de&limit=50
+    Served from the LemmaFrequency index; the Token table is not scanned.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_LIMIT = 500
+    
+    def get(self, request, *args, **kwargs):
+        language = request.query_params.get('language') or None
         try:
-            token_status = TokenStatus.objects.get(user=request.user, token=token)
-            token_status.delete()
-            return Response({
-                'token_id': token.token_id,
-                'message': 'Status removed'
-            }, status=status.HTTP_200_OK)
-        except TokenStatus.DoesNotExist:
-            return Response({
-                'token_id': token.token_id,
-                'message': 'No status to remove'
-            }, status=status.HTTP_200_OK)
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        
+        return Response({
+            'language': language,
+            'results': top_unknown_lemmas(request.user, language, limit),
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,202 @@
+"""
+Offline Wiktionary index backed by a local SQLite file.
+
+Maps (language, normalized word) to a dictionary entry in the same shape
+dictionary_service returns for Wiktionary API responses, so lookups of words
+in the index need no network at all. Entries are stored as zlib-compressed
+JSON. Build the index from Wiktionary extracts in kaikki.org JSONL format
+(one JSON object per word sense group; .jsonl or .jsonl.gz):
+
+    python manage.py build_wiktionary_index kaikki.org-dictionary-German.jsonl.gz --languages de
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from .lexemes import LOOKUP_BATCH_SIZE
+
+SCHEMA = '''
+CREATE TABLE entries (
+    language TEXT NOT NULL,
+    word TEXT NOT NULL,
+    entry BLOB NOT NULL,
+    PRIMARY KEY (language, word)
+) WITHOUT ROWID
+'''
+
+
+def _encode(entry: Dict) -> bytes:
+    return zlib.compress(json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(blob: bytes) -> Dict:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+class WiktionaryIndex:
+    """Read-only access to an index file. One SQLite connection per thread."""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, language: str, word: str) -> Optional[Dict]:
+        """Entry for a normalized word, or None if the word is not in the index."""
+        row = self._connection().execute(
+            'SELECT entry FROM entries WHERE language = ? AND word = ?',
+            (language.lower(), word),
+        ).fetchone()
+        return _decode(row[0]) if row else None
+
+    def lookup_many(self, language: str, words: Iterable[str]) -> Dict[str, Dict]:
+        """Entries of several normalized words (one query per LOOKUP_BATCH_SIZE words)."""
+        words = list(set(words))
+        entries = {}
+        for start in range(0, len(words), LOOKUP_BATCH_SIZE):
+            batch = words[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._connection().execute(
+                f'SELECT word, entry FROM entries WHERE language = ? AND word IN ({placeholders})',
+                [language.lower()] + batch,
+            )
+            for word, blob in rows:
+                entries[word] = _decode(blob)
+        return entries
+
+    def count(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_wiktionary_index() -> Optional[WiktionaryIndex]:
+    """Return the configured index, or None if the file doesn't exist."""
+    global _index
+    path = str(getattr(settings, 'WIKTIONARY_INDEX_PATH', '') or '')
+    if not path or not os.path.exists(path):
+        return None
+    with _index_lock:
+        if _index is None or _index.path != path:
+            _index = WiktionaryIndex(path)
+        return _index
+
+
+def iter_kaikki_records(paths: Iterable[str], languages: Iterable[str]) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Yield (language, normalized word, record) from kaikki.org JSONL files.
+    Records of other languages, without a word or with unreadable JSON are skipped.
+    """
+    from .dictionary_service import normalize_dictionary_word
+
+    languages = {language.lower() for language in languages}
+    for path in paths:
+        opener = gzip.open if str(path).endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                language = str(record.get('lang_code') or '').lower()
+                if language not in languages:
+                    continue
+                word = normalize_dictionary_word(record.get('word') or '')
+                if word:
+                    yield language, word, record
+
+
+def _audio_url(record: Dict) -> Optional[str]:
+    for sound in record.get('sounds') or []:
+        if isinstance(sound, dict):
+            url = sound.get('mp3_url') or sound.get('ogg_url')
+            if url:
+                return url
+    return None
+
+
+def build_entry(language: str, records: List[Dict]) -> Optional[Dict]:
+    """
+    Dictionary entry for one word from its kaikki records (one per part of speech
+    or etymology), in the dictionary_service entry shape.
+    """
+    from .dictionary_service import _parse_wiktionary_response
+
+    # kaikki senses have the glosses/examples layout the API parser already reads
+    api_entries = []
+    for record in records:
+        audio = _audio_url(record)
+        api_entries.append({
+            'partOfSpeech': record.get('pos') or '',
+            'senses': record.get('senses') or [],
+            'pronunciations': [{'audio': [audio]}] if audio else [],
+        })
+    return _parse_wiktionary_response({language: api_entries}, language, 'en')
+
+
+def write_wiktionary_index(path: str, records: Iterable[Tuple[str, str, Dict]]) -> int:
+    """
+    Build a new index file from (language, word, record) tuples, replacing any
+    existing file atomically. Records are staged on disk first, so the records
+    of a word don't need to be adjacent in the input.
+
+    Returns:
+        Number of words written
+    """
+    tmp_path = f'{path}.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(SCHEMA)
+        conn.execute('CREATE TABLE staged (language TEXT NOT NULL, word TEXT NOT NULL, record TEXT NOT NULL)')
+        batch = []
+        for language, word, record in records:
+            batch.append((language, word, json.dumps(record, ensure_ascii=False)))
+            if len(batch) >= 10000:
+                conn.executemany('INSERT INTO staged VALUES (?, ?, ?)', batch)
+                batch = []
+        if batch:
+            conn.executemany('INSERT INTO staged VALUES (?, ?, ?)', batch)
+
+        count = 0
+        rows = []
+        staged = conn.execute('SELECT language, word, record FROM staged ORDER BY language, word, rowid')
+        for (language, word), group in groupby(staged, key=lambda row: (row[0], row[1])):
+            entry = build_entry(language, [json.loads(row[2]) for row in group])
+            if entry:
+                rows.append((language, word, _encode(entry)))
+            if len(rows) >= 10000:
+                conn.executemany('INSERT INTO entries VALUES (?, ?, ?)', rows)
+                count += len(rows)
+                rows = []
+        if rows:
+            conn.executemany('INSERT INTO entries VALUES (?, ?, ?)', rows)
+            count += len(rows)
+        conn.execute('DROP TABLE staged')
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return count
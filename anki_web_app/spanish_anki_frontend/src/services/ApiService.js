@@ -180,9 +180,11 @@ export default {
     // Reader API methods
     reader: {
         // Lessons
-        getLessons(page = 1) {
+        getLessons(page = 1, ordering = null) {
             if (!page || page < 1) page = 1
-            return apiClient.get(`/reader/lessons/?page=${page}`).catch(error => {
+            const params = { page }
+            if (ordering) params.ordering = ordering
+            return apiClient.get('/reader/lessons/', { params }).catch(error => {
                 console.error('Error fetching lessons:', error)
                 throw error
             })
@@ -247,6 +249,25 @@ export default {
         },
         
         // Token interaction
+        materializeToken(lessonId, index) {
+            return apiClient.post(`/reader/lessons/${lessonId}/tokens/${index}/materialize/`).catch(error => {
+                console.error('Error materializing token:', error)
+                throw error
+            })
+        },
+        
+        lookupTokens({ tokenIds = [], lessonId = null, indexes = [] } = {}) {
+            const payload = { token_ids: tokenIds }
+            if (indexes.length > 0) {
+                payload.lesson_id = lessonId
+                payload.indexes = indexes
+            }
+            return apiClient.post('/reader/tokens/lookup/', payload).catch(error => {
+                console.error('Error looking up tokens:', error)
+                throw error
+            })
+        },
+        
         clickToken(tokenId) {
             if (!tokenId) {
                 return Promise.reject(new Error('Token ID is required'))
@@ -328,6 +349,22 @@ export default {
             })
         },
         
+        bulkUpdateTokenStatus(status, { lessonId = null, tokenIds = [], words = [], onlyUnmarked = false } = {}) {
+            if (status !== 'known' && status !== 'unknown') {
+                return Promise.reject(new Error("Status must be 'known' or 'unknown'"))
+            }
+            return apiClient.post('/reader/tokens/status/bulk/', {
+                status: status,
+                lesson_id: lessonId,
+                token_ids: tokenIds,
+                words: words,
+                only_unmarked: onlyUnmarked,
+            }).catch(error => {
+                console.error('Error updating token statuses:', error)
+                throw error
+            })
+        },
+        
         removeTokenStatus(tokenId) {
             if (!tokenId) {
                 return Promise.reject(new Error('Token ID is required'))
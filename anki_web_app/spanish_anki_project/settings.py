@@ -97,6 +97,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Seconds a connection is kept open for reuse by request and lookup pool threads (0 closes it after each use)
+        "CONN_MAX_AGE": config('DB_CONN_MAX_AGE', default=60, cast=int),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -193,3 +196,55 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',  # Require authentication by default
     ],
 }
+
+# spaCy model preloading
+# Models for these languages are loaded when the WSGI app is imported. Run gunicorn
+# with --preload so this happens once in the master and workers share the models.
+SPACY_PRELOAD_LANGUAGES = config('SPACY_PRELOAD_LANGUAGES', default='de,es', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+SPACY_WARMUP = config('SPACY_WARMUP', default=False, cast=bool)  # Run a sample sentence through each model after loading
+
+# Lemmatizer backend: 'spacy' runs the spaCy pipeline for every word, 'lookup' reads
+# the local lemma table (python manage.py build_lemma_table) and only falls back to
+# spaCy for unknown or ambiguous forms.
+LEMMATIZER_BACKEND = config('LEMMATIZER_BACKEND', default='spacy')
+LEMMA_TABLE_PATH = config('LEMMA_TABLE_PATH', default=str(BASE_DIR / 'data' / 'lemma_table.sqlite3'))
+
+# Offline Wiktionary index consulted before the Wiktionary API when the file exists
+# (python manage.py build_wiktionary_index, see flashcards/wiktionary_index.py)
+WIKTIONARY_INDEX_PATH = config('WIKTIONARY_INDEX_PATH', default=str(BASE_DIR / 'data' / 'wiktionary_index.sqlite3'))
+
+# Reuse tokenizer output for identical lesson texts (see flashcards/tokenization_cache.py)
+TOKENIZATION_CACHE_ENABLED = config('TOKENIZATION_CACHE_ENABLED', default=True, cast=bool)
+
+# Translations kept in each worker in front of the TranslationMemory table (see flashcards/translation_memory.py)
+TRANSLATION_MEMORY_LOCAL_CACHE_SIZE = config('TRANSLATION_MEMORY_LOCAL_CACHE_SIZE', default=4096, cast=int)
+
+# Seconds dictionary misses are cached: words Wiktionary doesn't have, and failed requests (see flashcards/dictionary_service.py)
+DICTIONARY_NOT_FOUND_CACHE_TTL = config('DICTIONARY_NOT_FOUND_CACHE_TTL', default=60 * 60 * 24, cast=int)
+DICTIONARY_ERROR_CACHE_TTL = config('DICTIONARY_ERROR_CACHE_TTL', default=60 * 5, cast=int)
+
+# Circuit breakers for external providers (see flashcards/circuit_breaker.py)
+CIRCUIT_BREAKER_WINDOW = config('CIRCUIT_BREAKER_WINDOW', default=60, cast=int)
+CIRCUIT_BREAKER_MIN_CALLS = config('CIRCUIT_BREAKER_MIN_CALLS', default=5, cast=int)
+CIRCUIT_BREAKER_FAILURE_RATE = config('CIRCUIT_BREAKER_FAILURE_RATE', default=0.5, cast=float)
+CIRCUIT_BREAKER_OPEN_SECONDS = config('CIRCUIT_BREAKER_OPEN_SECONDS', default=30, cast=int)
+
+# Deadline budgets for outbound calls made by a request (see flashcards/deadline.py)
+TOKEN_CLICK_DEADLINE_SECONDS = config('TOKEN_CLICK_DEADLINE_SECONDS', default=4.0, cast=float)
+TTS_DEADLINE_SECONDS = config('TTS_DEADLINE_SECONDS', default=20.0, cast=float)
+
+# Threads per worker for concurrent provider lookups (see flashcards/lookup_pool.py)
+LOOKUP_POOL_WORKERS = config('LOOKUP_POOL_WORKERS', default=8, cast=int)
+
+# Translate a new lesson's first sentences in the background after it is created (see flashcards/sentence_prefetch.py)
+SENTENCE_TRANSLATION_PREFETCH = config('SENTENCE_TRANSLATION_PREFETCH', default=False, cast=bool)
+SENTENCE_TRANSLATION_PREFETCH_LIMIT = config('SENTENCE_TRANSLATION_PREFETCH_LIMIT', default=200, cast=int)
+
+# (user, language) vocabulary status sets kept in each worker (see flashcards/known_words.py)
+KNOWN_WORDS_LOCAL_CACHE_SIZE = config('KNOWN_WORDS_LOCAL_CACHE_SIZE', default=256, cast=int)
+
+# (user, language) saved-phrase automata kept in each worker (see flashcards/phrase_matcher.py)
+PHRASE_MATCHER_LOCAL_CACHE_SIZE = config('PHRASE_MATCHER_LOCAL_CACHE_SIZE', default=256, cast=int)
+
+# Store new lessons' tokens packed on the lesson row instead of one Token row each (see flashcards/packed_tokens.py)
+PACKED_TOKEN_STORAGE = config('PACKED_TOKEN_STORAGE', default=False, cast=bool)
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "spanish_anki_project.settings")
 
 application = get_wsgi_application()
+
+# Load spaCy models before gunicorn forks workers (requires --preload)
+from django.conf import settings  # noqa: E402
+from flashcards.tokenization import preload_spacy_models  # noqa: E402
+
+if settings.SPACY_PRELOAD_LANGUAGES:
+    preload_spacy_models(settings.SPACY_PRELOAD_LANGUAGES, warm_up=settings.SPACY_WARMUP)
@@ -104,13 +104,13 @@ def test_database_integration():
         print(f"  Lesson ID: {lesson.lesson_id}")
         
         # Check tokens
-        tokens = lesson.tokens.all()
+        tokens = lesson.tokens.select_related('lexeme')
         print(f"\n✓ Generated {tokens.count()} tokens in database")
         
         # Show first few tokens with their lemmas
         print("\nFirst 5 tokens:")
         for token in tokens[:5]:
-            lemma_display = f"'{token.lemma}'" if token.lemma else "None"
+            lemma_display = f"'{token.lexeme.lemma}'" if token.lexeme.lemma else "None"
             print(f"  - '{token.text}' -> lemma: {lemma_display}")
         
         # Cleanup